@@ -0,0 +1,179 @@
+# BatchSimulator.py
+#
+# Runs many Strategy instances over a single pass of the market data. Every event is
+# dispatched to all strategies; each one trades against its own position/cash books,
+# stored as (n_strategies, n_instruments) arrays indexed by strategy id and instrument id.
+
+import numpy as np
+import pandas as pd
+
+from Simulator import Simulator, logger
+from Strategy import Strategy
+from utils.execution import MARKET
+from utils.instruments import grow
+
+
+class StrategyAccount:
+    """
+    The simulator as seen by one strategy of a BatchSimulator.
+
+    Market data (df, chainIndex, priceIndex, symbolUniverse, currentPrice, bars) and the simulated
+    underlyings and expiries are shared by all strategies; orders are booked to this strategy's
+    row of the batch books.
+    """
+
+    def __init__(self, batch, strategy_id):
+        self.batch = batch
+        self.strategy_id = strategy_id
+
+    @property
+    def df(self):
+        return self.batch.df
+
+    @property
+    def chainIndex(self):
+        return self.batch.chainIndex
+
+    @property
+    def symbolUniverse(self):
+        return self.batch.symbolUniverse
+
+    @property
+    def symbolUniverses(self):
+        return self.batch.symbolUniverses
+
+    @property
+    def pointInTimeChain(self):
+        return self.batch.pointInTimeChain
+
+    @property
+    def futuresSymbols(self):
+        return self.batch.futuresSymbols
+
+    @property
+    def expiryOffsets(self):
+        return self.batch.expiryOffsets
+
+    @property
+    def currentPrice(self):
+        return self.batch.currentPrice
+
+    @property
+    def instrumentation(self):
+        return self.batch.instrumentation
+
+    @property
+    def priceIndex(self):
+        return self.batch.priceIndex
+
+    def priceAsOf(self, symbol, time=None, default=None, max_age=None):
+        return self.batch.priceAsOf(symbol, time, default, max_age)
+
+    def bars(self, resolution, max_bars=None):
+        return self.batch.bars(resolution, max_bars)
+
+    def onOrder(self, symbol, side, quantity, price, order_type=MARKET):
+        return self.batch.onStrategyOrder(self.strategy_id, symbol, side, quantity, price, order_type)
+
+
+class StrategyFanout:
+    """Forwards every market event to all strategies of a batch, in strategy id order."""
+
+    def __init__(self, strategies):
+        self.handlers = [strategy.onMarketData for strategy in strategies]
+
+    def onMarketData(self, row):
+        for onMarketData in self.handlers:
+            onMarketData(row)
+
+
+class BatchSimulator(Simulator):
+    def __init__(self, param_sets, strategy_class=Strategy):
+        super().__init__()
+        self.param_sets = [dict(params or {}) for params in param_sets]
+        n_strategies = len(self.param_sets)
+        self.accounts = [StrategyAccount(self, i) for i in range(n_strategies)]
+        self.strategies = [strategy_class(account, params) for account, params in zip(self.accounts, self.param_sets)]
+        self.strategy = StrategyFanout(self.strategies)
+        self.equityRecorder = None  # Single-book recorder; batch P&L is sampled per day in printPnl
+
+        # Books: one row per strategy, one column per instrument id (grown on demand)
+        self.currQuantity = np.zeros((n_strategies, 0))
+        self.buyValue = np.zeros((n_strategies, 0))
+        self.sellValue = np.zeros((n_strategies, 0))
+        self.fees = np.zeros(n_strategies)
+
+    def _symbolColumn(self, symbol):
+        column = self.instruments.intern(symbol)
+        if column >= self.currQuantity.shape[1]:
+            # grow() doubles the capacity, so growing the books stays amortized O(1) per new instrument
+            size = len(self.instruments)
+            self.currQuantity, self.buyValue, self.sellValue = (grow(a, size) for a in (self.currQuantity, self.buyValue, self.sellValue))
+        return column
+
+    def _strategies(self):
+        return self.strategies
+
+    def _books(self):
+        return {**super()._books(), 'fees': self.fees}
+
+    def fork(self, variants):
+        raise TypeError("BatchSimulator already runs one strategy per parameter set; fork a Simulator instead")
+
+    def onOrder(self, symbol, side, quantity, price, order_type=MARKET):
+        raise TypeError("BatchSimulator books orders per strategy; strategies must use their StrategyAccount")
+
+    def onStrategyOrder(self, strategy_id, symbol, side, quantity, price, order_type=MARKET):
+        # All strategies share one execution engine; the order's account routes its fills back
+        return self.execution.submit(symbol, side, quantity, price, order_type, time=self.currentTime, account=strategy_id)
+
+    def _onFill(self, order, quantity, trade_price, fee):
+        strategy_id, side = order.account, order.side
+        trade_value = trade_price * quantity
+        column = self._symbolColumn(order.symbol)
+
+        self.fees[strategy_id] += fee
+        if side == 'BUY':
+            self.currQuantity[strategy_id, column] += quantity
+            self.buyValue[strategy_id, column] += trade_value
+        else:
+            self.currQuantity[strategy_id, column] -= quantity
+            self.sellValue[strategy_id, column] += trade_value
+
+        self.strategies[strategy_id].onTradeConfirmation(order.symbol, side, quantity, trade_price)
+
+    def strategyPnl(self):
+        """Returns the current mark-to-market P&L of every strategy as an array of shape (n_strategies,)."""
+        n_instruments = min(self.currQuantity.shape[1], len(self.instruments))
+        prices = self.currentPrice.array(n_instruments)
+        books = self.sellValue[:, :n_instruments] - self.buyValue[:, :n_instruments]
+        return books.sum(axis=1) - self.fees + self.currQuantity[:, :n_instruments] @ prices
+
+    def underlyingPnl(self):
+        """
+        Mark-to-market P&L of every strategy per simulated underlying, as {underlying: array of shape
+        (n_strategies,)}. Fees are only kept per strategy, so these sub-books are before fees.
+        """
+        n_instruments = min(self.currQuantity.shape[1], len(self.instruments))
+        prices = self.currentPrice.array(n_instruments)
+        books = (self.sellValue[:, :n_instruments] - self.buyValue[:, :n_instruments]
+                 + self.currQuantity[:, :n_instruments] * prices)
+        names = self.instruments.underlying_names(np.arange(n_instruments))
+        return {underlying: books[:, names == underlying].sum(axis=1) for underlying in self.underlyings}
+
+    def printPnl(self, timestamp=None):
+        pnl = self.strategyPnl()
+        self.pnl_history.append(pnl)
+        ts = timestamp if timestamp else "Final"
+        self.pnl_records.append({'time': ts, **{f'strategy_{i}': value for i, value in enumerate(pnl)}})
+        logger.info("P&L at %s across %d strategies: best %.2f, mean %.2f, worst %.2f",
+                    ts, len(pnl), pnl.max(), pnl.mean(), pnl.min())
+
+    def pnlHistory(self, strategy_id):
+        """Returns the P&L history of one strategy, in the same form as Simulator.pnl_history."""
+        return [float(pnl[strategy_id]) for pnl in self.pnl_history]
+
+    def exportPnlToCsv(self, output_file='output.csv'):
+        df_pnl = pd.DataFrame(self.pnl_records)
+        df_pnl.to_csv(output_file, index=False)
+        print(f"P&L history of {len(self.strategies)} strategies exported to {output_file}")
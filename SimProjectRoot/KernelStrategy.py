@@ -0,0 +1,291 @@
+# KernelStrategy.py
+#
+# The straddle Strategy as a compiled kernel over typed arrays. Everything that needs Python
+# objects (event columns, ATM strike lookups in the chain index) is precomputed once per data
+# set and entry time; straddle_kernel then replays the columnar event stream in one loop,
+# compiled with Numba when it is installed (see utils/kernels.py) and plain Python otherwise.
+# Its fills and daily P&L match a Simulator run of Strategy with the same parameters, up to
+# floating point rounding, so sweeps can evaluate many parameter sets per second.
+#
+# Covers what Strategy does with the default execution settings: instant fills at the last
+# price with fixed slippage, no fees (StraddleKernel refuses other configurations).
+#
+# Run from SimProjectRoot:
+#     python KernelStrategy.py                  # kernel vs Strategy on the configured data, with timings
+#     python optimizer.py --kernel --search random --samples 5000
+
+import time as timer
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from Strategy import DEFAULT_PARAMS
+from utils.execution import INSTANT
+from utils.instruments import STALE_MISSING
+from utils.kernels import NUMBA_AVAILABLE, compile_kernel, kernel_inputs
+from utils.marketEvent import build_event_columns
+from utils.optionChain import OptionChainIndex
+
+
+@compile_kernel
+def straddle_kernel(day, instrument_id, price, straddle_start, straddle_end, entry_slot, call_leg, call_distance,
+                    put_leg, put_distance, width, n_instruments, exit_deviation, pnl_stop, quantity,
+                    strike_deviation, slippage, fill_event, fill_instrument, fill_quantity, fill_price, daily_pnl,
+                    equity):
+    """
+    Replays the event stream for one parameter set.
+
+    Events are (day, instrument_id, price) columns. The straddles driven by an instrument's
+    bars are straddle_start[id]:straddle_end[id]. entry_slot[e] >= 0 marks the futures bars at
+    the entry time; their ATM legs are call_leg/put_leg[slot * width + k] for the k-th straddle
+    of the bar's futures (-1: no strike), with the strike's relative distance to the futures
+    price (a leg further away than strike_deviation is not traded, as in get_closest_strikes).
+
+    Fills (event, instrument id, signed quantity, price) and the P&L at every day rollover
+    plus the final one are written to the output arrays; `equity` is filled per event unless
+    it is empty. Returns (number of fills, number of daily P&L points).
+    """
+    n_straddles = 0
+    for i in range(len(straddle_end)):
+        n_straddles = max(n_straddles, straddle_end[i])
+    position = np.zeros(n_instruments)
+    mark = np.zeros(n_instruments)         # Last price (0 until the instrument prints)
+    printed = np.zeros(n_instruments, dtype=np.bool_)
+    is_open = np.zeros(n_straddles, dtype=np.bool_)
+    entry_price = np.zeros(n_straddles)
+    call = np.zeros(n_straddles, dtype=np.int64)
+    put = np.zeros(n_straddles, dtype=np.int64)
+    record_equity = len(equity) > 0
+
+    cash = 0.0
+    market_value = 0.0
+    strategy_pnl = 0.0  # Strategy.total_pnl: premium received minus premium paid
+    n_fills = 0
+    n_days = 0
+    last_day = -1  # Day numbers count from 1970-01-01, so no real day is -1
+    for e in range(len(price)):
+        i = instrument_id[e]
+        p = price[e]
+        market_value += position[i] * (p - mark[i])
+        mark[i] = p
+        printed[i] = True
+
+        for s in range(straddle_start[i], straddle_end[i]):
+            slot = entry_slot[e]
+            if slot >= 0 and not is_open[s]:
+                entry_price[s] = p
+                leg = slot * width + s - straddle_start[i]
+                c = call_leg[leg]
+                q = put_leg[leg]
+                if c >= 0 and q >= 0 and call_distance[leg] <= strike_deviation and put_distance[leg] <= strike_deviation:
+                    call[s] = c
+                    put[s] = q
+                    for j in (c, q):
+                        fill = (mark[j] if printed[j] else p) * (1 - slippage)
+                        cash += fill * quantity
+                        position[j] -= quantity
+                        market_value -= quantity * mark[j]
+                        strategy_pnl += quantity * fill
+                        fill_event[n_fills] = e
+                        fill_instrument[n_fills] = j
+                        fill_quantity[n_fills] = -quantity
+                        fill_price[n_fills] = fill
+                        n_fills += 1
+                    is_open[s] = True
+
+            if is_open[s]:
+                deviation = abs(p - entry_price[s]) / entry_price[s]
+                if deviation > exit_deviation or abs(strategy_pnl) > pnl_stop:
+                    for j in (call[s], put[s]):
+                        fill = (mark[j] if printed[j] else p) * (1 + slippage)
+                        cash -= fill * quantity
+                        position[j] += quantity
+                        market_value += quantity * mark[j]
+                        strategy_pnl -= quantity * fill
+                        fill_event[n_fills] = e
+                        fill_instrument[n_fills] = j
+                        fill_quantity[n_fills] = quantity
+                        fill_price[n_fills] = fill
+                        n_fills += 1
+                    is_open[s] = False
+
+        if record_equity:
+            equity[e] = cash + market_value
+        if last_day == -1:
+            last_day = day[e]
+        if day[e] != last_day:
+            daily_pnl[n_days] = cash + market_value
+            n_days += 1
+            last_day = day[e]
+
+    daily_pnl[n_days] = cash + market_value
+    return n_fills, n_days + 1
+
+
+class StraddleKernel:
+    """
+    Runs the straddle Strategy through straddle_kernel on a simulator's loaded data.
+
+    The simulator provides the data (df, chainIndex), the straddles (futuresSymbols x
+    expiryOffsets, symbolUniverses) and the execution settings. Building the kernel inputs costs
+    about one replay; after that every run() is a single pass over typed arrays. ATM legs are
+    looked up once per entry time (entry_hour, entry_minute) and cached.
+
+    Args:
+        sim (Simulator): Simulator with market data loaded (readData, or df/chainIndex set).
+
+    Raises:
+        ValueError: If the simulator's execution settings are not the ones the kernel models
+                    (instant fills, no fees, stale prices kept).
+    """
+
+    def __init__(self, sim):
+        if sim.df is None:
+            raise ValueError("StraddleKernel needs the simulator's market data; call readData() first")
+        execution = sim.execution
+        if execution.mode != INSTANT or execution.fees or execution.max_participation is not None:
+            raise ValueError("StraddleKernel models instant fills without fees; use the Simulator for "
+                             f"execution mode {execution.mode!r} and fee schedules")
+        if sim.currentPrice.max_age is not None and sim.currentPrice.stale_policy == STALE_MISSING:
+            raise ValueError("StraddleKernel keeps stale prices; use the Simulator with stale_price_policy 'missing'")
+
+        self.sim = sim
+        self.instruments = sim.instruments
+        self.chainIndex = sim.chainIndex if sim.chainIndex is not None else OptionChainIndex(sim.df, sim.instruments)
+        self.slippage = execution.slippage.fraction()
+
+        columns = build_event_columns(sim.df, self.instruments)
+        self.times = columns['time']
+        self.symbols = columns['symbols']
+        self.day = columns['day']
+        self.instrumentId = columns['instrument_id'].astype(np.int64)
+        self.price = columns['price']
+        self.minuteOfDay = self.times.astype('datetime64[m]').astype(np.int64) % 1440
+        self.nInstruments = len(self.instruments)
+        self.nDays = len(np.unique(self.day)) + 1
+
+        # Straddles in Strategy's order, grouped by the futures whose bars drive them
+        self.straddles = [(futures_symbol, sim.instruments.underlying_name(sim.instruments.intern(futures_symbol)),
+                           expiry_days)
+                          for futures_symbol in sim.futuresSymbols for expiry_days in sim.expiryOffsets]
+        self.width = len(sim.expiryOffsets)
+        self.straddleStart = np.zeros(self.nInstruments, dtype=np.int64)
+        self.straddleEnd = np.zeros(self.nInstruments, dtype=np.int64)
+        for k, futures_symbol in enumerate(sim.futuresSymbols):
+            futures_id = sim.instruments.intern(futures_symbol)
+            self.straddleStart[futures_id] = k * self.width
+            self.straddleEnd[futures_id] = (k + 1) * self.width
+        self._streams = kernel_inputs(self.day, self.instrumentId, self.price, self.straddleStart, self.straddleEnd)
+        self._entryTables = {}
+
+    def _leg(self, futures_price, when, underlying, expiry_days, option_type, as_of=None):
+        # get_closest_strikes without the deviation limit: (instrument id, relative strike distance)
+        date = when.date()
+        expiry = date + timedelta(days=expiry_days)
+        side = self.chainIndex.get(date, expiry, option_type, underlying)
+        universe = self.sim.symbolUniverses.get(underlying)
+        listed = universe.symbols(expiry) if universe is not None else None
+        symbol = side.closest(futures_price, np.inf, as_of, listed) if side is not None else None
+        if symbol is None:
+            return -1, np.inf
+        strike = side.strikes[side.symbols.index(symbol)]
+        return self.instruments.intern(symbol), abs(strike - futures_price) / futures_price
+
+    def entryTable(self, entry_hour, entry_minute):
+        """Kernel inputs (entry_slot, call_leg, call_distance, put_leg, put_distance) for one entry time, cached."""
+        key = (entry_hour, entry_minute)
+        table = self._entryTables.get(key)
+        if table is not None:
+            return table
+
+        candidates = np.flatnonzero((self.minuteOfDay == entry_hour * 60 + entry_minute)
+                                    & (self.straddleEnd[self.instrumentId] > self.straddleStart[self.instrumentId]))
+        entry_slot = np.full(len(self.price), -1, dtype=np.int64)
+        entry_slot[candidates] = np.arange(len(candidates))
+        legs = {'call': ([], []), 'put': ([], [])}
+        for e in candidates.tolist():
+            futures_price = float(self.price[e])
+            when = pd.Timestamp(self.times[e]).to_pydatetime()
+            as_of = int(self.times[e].astype(np.int64)) if self.sim.pointInTimeChain else None
+            first = self.straddleStart[self.instrumentId[e]]
+            for _, underlying, expiry_days in self.straddles[first:first + self.width]:
+                for option_type, (ids, distances) in legs.items():
+                    instrument_id, distance = self._leg(futures_price, when, underlying, expiry_days, option_type, as_of)
+                    ids.append(instrument_id)
+                    distances.append(distance)
+
+        self.nInstruments = len(self.instruments)  # Lookups may intern listed contracts that never printed
+        table = kernel_inputs(entry_slot, np.array(legs['call'][0], dtype=np.int64),
+                              np.array(legs['call'][1], dtype=np.float64), np.array(legs['put'][0], dtype=np.int64),
+                              np.array(legs['put'][1], dtype=np.float64))
+        self._entryTables[key] = (table, len(candidates))
+        return self._entryTables[key]
+
+    def run(self, params=None, record_equity=False):
+        """
+        Runs one parameter set (overrides of Strategy.DEFAULT_PARAMS).
+
+        Returns:
+            dict: 'pnl_history' (np.ndarray, the points of Simulator.pnl_history), 'n_trades',
+                  'fills' ({'event', 'instrument_id', 'quantity' (signed), 'price'} arrays) and
+                  'equity' (total P&L after every event, or None without record_equity).
+        """
+        params = {**DEFAULT_PARAMS, **(params or {})}
+        table, n_candidates = self.entryTable(params['entry_hour'], params['entry_minute'])
+        max_fills = 4 * n_candidates * self.width
+        fills = {'event': np.zeros(max_fills, dtype=np.int64), 'instrument_id': np.zeros(max_fills, dtype=np.int64),
+                 'quantity': np.zeros(max_fills), 'price': np.zeros(max_fills)}
+        daily_pnl = np.zeros(self.nDays)
+        equity = np.zeros(len(self.price) if record_equity else 0)
+
+        n_fills, n_days = straddle_kernel(
+            *self._streams[:5], *table, self.width, self.nInstruments, float(params['exit_deviation']),
+            float(params['pnl_stop']), float(params['quantity']), float(params['strike_deviation']), self.slippage,
+            fills['event'], fills['instrument_id'], fills['quantity'], fills['price'], daily_pnl, equity)
+        return {
+            'pnl_history': daily_pnl[:n_days],
+            'n_trades': n_fills,
+            'fills': {name: values[:n_fills] for name, values in fills.items()},
+            'equity': equity if record_equity else None,
+        }
+
+    def trades(self, result):
+        """The fills of a run() result as Strategy.trades records ({'symbol', 'side', 'qty', 'price'})."""
+        fills = result['fills']
+        symbols = self.instruments.symbols
+        return [{'symbol': symbols[instrument_id], 'side': 'BUY' if quantity > 0 else 'SELL', 'qty': abs(quantity),
+                 'price': price}
+                for instrument_id, quantity, price in zip(fills['instrument_id'].tolist(), fills['quantity'].tolist(),
+                                                          fills['price'].tolist())]
+
+
+if __name__ == '__main__':
+    from Simulator import Simulator
+    from utils.logs import set_level
+
+    set_level('WARNING')
+    sim = Simulator()
+    sim.readData()
+    kernel = StraddleKernel(sim)
+    print(f"Kernel path: {'Numba' if NUMBA_AVAILABLE else 'pure Python (Numba is not installed)'}")
+
+    for params in ({}, {'entry_hour': 16}, {'entry_hour': 11, 'exit_deviation': 0.005, 'pnl_stop': 250}):
+        reference = Simulator(strategy_params=params)
+        reference.df, reference.chainIndex, reference.priceIndex = sim.df, sim.chainIndex, sim.priceIndex
+        start = timer.perf_counter()
+        reference.startSimulation()
+        python_seconds = timer.perf_counter() - start
+
+        kernel.run(params)  # Entry table (and JIT compilation) outside the timing
+        start = timer.perf_counter()
+        result = kernel.run(params)
+        kernel_seconds = timer.perf_counter() - start
+
+        same = (np.allclose(result['pnl_history'], reference.pnl_history, rtol=1e-9, atol=1e-9)
+                and len(result['pnl_history']) == len(reference.pnl_history)
+                and kernel.trades(result) == reference.strategy.trades)
+        print(f"{params or 'defaults'}: final P&L {result['pnl_history'][-1]:.2f} "
+              f"(Strategy {reference.pnl_history[-1]:.2f}), {result['n_trades']} fills, "
+              f"{'match' if same else 'MISMATCH'}; Strategy {python_seconds * 1e3:.1f} ms, "
+              f"kernel {kernel_seconds * 1e3:.2f} ms")
@@ -1,130 +1,453 @@
 # Simulator.py
 
 import os
+import numpy as np
 import pandas as pd
 from datetime import timedelta
-from config import simStartDate, simEndDate, symbols, data_path
+from config import simStartDate, simEndDate, symbols, expiry_offsets, data_path, cache_path, use_data_cache, streaming_mode
+from config import replay_resolution, point_in_time_chain
+from config import equity_resolution, equity_output, use_symbol_universe, universe_path
+from config import execution_mode, fee_schedule, slippage_bps, market_impact, max_participation
+from config import price_max_age, stale_price_policy
+from config import log_level, instrumentation, instrumentation_memory, instrumentation_output, profiler, profile_output
+from config import checkpoint_every, checkpoint_path, resume_from_checkpoint
 from Strategy import Strategy
 from stats.printStats import printStats  # Moved here
-from glob import glob
+from utils.marketEvent import MarketEvent, build_event_columns
+from utils.optionChain import OptionChainIndex
+from utils.priceIndex import AsOfPriceIndex, as_timedelta
+from utils.dayStream import iter_day_frames, merge_day_streams
+from utils.ledger import PositionLedger
+from utils.bars import BarAggregator
+from utils.equityRecorder import EquityRecorder
+from utils.greeks import GreeksEngine
+from utils.symbolUniverse import SymbolUniverse
+from utils.instruments import DEFAULT_REGISTRY, KIND_NAMES, PriceBook, futures_underlying, grow
+from utils.execution import MARKET, ExecutionEngine, SlippageModel
+from utils.instrumentation import NULL_INSTRUMENTATION, Instrumentation, profiled
+from utils.logs import get_logger, set_level
+from utils.checkpoint import dumps, loads, load_snapshot, save_snapshot
 import csv 
 
+logger = get_logger('simulator')
+
+
 class Simulator:
-    def __init__(self):
+    def __init__(self, strategy_params=None, instruments=None):
+        # Phase timers, counters and callback timings; a no-op unless config.instrumentation is on
+        self.instrumentation = Instrumentation(trace_memory=instrumentation_memory) if instrumentation else NULL_INSTRUMENTATION
         self.df = None
-        self.currentPrice = {}
-        self.currQuantity = {}
-        self.buyValue = {}
-        self.sellValue = {}
+        self.chainIndex = None
+        self.priceIndex = None
+        # One futures symbol per simulated underlying (config.symbols) and the expiries traded on each
+        self.futuresSymbols = list(symbols)
+        self.underlyings = [futures_underlying(symbol) for symbol in self.futuresSymbols]
+        self.expiryOffsets = list(expiry_offsets)
+        self.symbolUniverses = ({underlying: SymbolUniverse(universe_path, underlying=underlying)
+                                 for underlying in self.underlyings} if use_symbol_universe else {})
+        self.symbolUniverse = self.symbolUniverses.get(self.underlyings[0]) # First underlying's listing
+        # Strike selection sees only contracts printed by the lookup bar (config.point_in_time_chain)
+        self.pointInTimeChain = point_in_time_chain
+        # Symbols are interned to integer ids once; prices and books are arrays indexed by id
+        self.instruments = DEFAULT_REGISTRY if instruments is None else instruments
+        # Still reads like a {symbol: price} dict, and knows when each price was last updated
+        self.priceMaxAge = as_timedelta(price_max_age)
+        self.currentPrice = PriceBook(self.instruments, self.priceMaxAge, stale_price_policy, clock=lambda: self.currentTime)
+        self.currQuantity = np.zeros(0)
+        self.buyValue = np.zeros(0)
+        self.sellValue = np.zeros(0)
         self.pnl_history = []
-        self.strategy = Strategy(self)
+        # Bar size replayed (config.replay_resolution; None: as stored), and the higher-timeframe
+        # bars built during the replay for strategies that asked for them (see bars)
+        self.resolution = replay_resolution
+        self.barAggregators = {}
+        self.strategy = Strategy(self, strategy_params)
         self.pnl_records = [] 
+        # One book across all underlyings, with a P&L sub-book per underlying (see underlyingPnl)
+        self.ledger = PositionLedger(expiry_of=self.instruments.expiry_date, group_of=self.instruments.underlying_name)
+        self.equityRecorder = EquityRecorder(equity_resolution) if equity_resolution else None
+        self.currentTime = None
+        self.greeks = GreeksEngine()
+        # Orders go through the execution engine; its fills are booked by _onFill
+        self.feesPaid = 0.0
+        self.execution = ExecutionEngine(self.instruments, self.currentPrice, self._onFill, mode=execution_mode,
+                                         fees=fee_schedule, slippage=SlippageModel(slippage_bps, market_impact),
+                                         max_participation=max_participation)
+        # Replay position: rows of self.df replayed so far, and the (day, date) the replay is in
+        self.cursor = 0
+        self._replayDay = (None, None)
+        self.dataRange = None
+        # Snapshot the whole state every checkpoint_every events (see checkpointState)
+        self.checkpointEvery = checkpoint_every
+        self.checkpointPath = checkpoint_path
+
+    def readData(self, start_date=None, end_date=None, resolution=None):
+        # Each day folder is parsed once into a typed columnar cache; later runs memory-map it.
+        # start_date/end_date override config.simStartDate/simEndDate (e.g. for walk-forward windows),
+        # resolution overrides config.replay_resolution (each resampled day is cached as well)
+        cache_root = cache_path if use_data_cache else None
+        self.dataRange = (start_date or simStartDate, end_date or simEndDate)
+        self.resolution = resolution or self.resolution
+        with self.instrumentation.phase('readData'):
+            day_frames = iter_day_frames(*self.dataRange, data_path, cache_root, self.resolution)
+            all_data = [self._selectUnderlyings(day_df) for day_df in day_frames]
 
-    def readData(self):
-        all_data = []
-        date = simStartDate
-        while date <= simEndDate:
-            folder = os.path.join(data_path, date.strftime('%Y%m%d'))
-            if not os.path.exists(folder):
-                print(f"Warning: folder not found for date {date.strftime('%Y-%m-%d')}")
-                date += timedelta(days=1)
-                continue
-
-            for file_path in glob(os.path.join(folder, '*.csv')):
-                df = pd.read_csv(file_path)
-                
-                # Check if it's an options file by looking for 'option_type' and 'strike_price'
-                if 'option_type' in df.columns and 'strike_price' in df.columns:
-                    # It's an options file, keep all relevant columns
-                    if {'symbol', 'time', 'close', 'strike_price', 'option_type'}.issubset(df.columns):
-                        df_processed = df[['time', 'symbol', 'close', 'strike_price', 'option_type']].copy()
-                    else:
-                        print(f"Skipped options file (missing required columns): {file_path}")
-                        continue # Skip to the next file
-                else:
-                    # Assume it's a futures/spot file (like BTCUSDT.csv)
-                    if {'symbol', 'time', 'close'}.issubset(df.columns):
-                        df_processed = df[['time', 'symbol', 'close']].copy()
-                    else:
-                        print(f"Skipped futures/spot file (missing required columns): {file_path}")
-                        continue # Skip to the next file
-
-                df_processed.rename(columns={'close': 'price'}, inplace=True)
-                all_data.append(df_processed)
-            
-            date += timedelta(days=1)
-                                                       
         if all_data:
-            self.df = pd.concat(all_data, ignore_index=True) # Add ignore_index=True for cleaner concat
-            self.df['time'] = pd.to_datetime(self.df['time'])
-            self.df.sort_values('time', inplace=True)
-            self.df.reset_index(drop=True, inplace=True)
-            # Fill NaN values for 'option_type' and 'strike_price' that will exist for futures data
-            # This is important because futures data won't have these columns, and concat will fill them with NaN
-            self.df['option_type'] = self.df['option_type'].fillna('') # Fill with empty string or another suitable default
-            self.df['strike_price'] = self.df['strike_price'].fillna(0) # Fill with 0 or another suitable default
+            with self.instrumentation.phase('concatDays'):
+                self.df = self._concatDays(all_data)
+            with self.instrumentation.phase('buildIndexes'):
+                self.chainIndex = OptionChainIndex(self.df, self.instruments)
+                self.priceIndex = AsOfPriceIndex(self.df, self.instruments)
+            self.instrumentation.count('rows_loaded', len(self.df))
         else:
             raise ValueError("No valid data files found.")
 
 
-    def startSimulation(self):
-        last_processed_date = None
-        for _, row in self.df.iterrows():
-            symbol = row['symbol']
-            price = row['price']
-            self.currentPrice[symbol] = price
-            self.strategy.onMarketData(row)
+    def _selectUnderlyings(self, day_df):
+        # Day folders can hold several underlyings; keep the configured ones (the frame itself if that is all)
+        names = self.instruments.underlying_names(self.instruments.ids_for(day_df['symbol']))
+        keep = np.isin(names, self.underlyings)
+        return day_df if keep.all() else day_df[keep].reset_index(drop=True)
+
+    def _concatDays(self, day_frames):
+        # 'symbol' becomes a categorical whose codes are the instrument ids, and
+        # 'option_type' a three-value categorical instead of a Python string per row
+        instrument_ids = np.concatenate([self.instruments.ids_for(day_df['symbol']) for day_df in day_frames])
+        df = pd.concat([day_df.drop(columns='symbol') for day_df in day_frames], ignore_index=True)
+        df.insert(1, 'symbol', pd.Categorical.from_codes(instrument_ids, categories=self.instruments.symbols))
+        df['option_type'] = df['option_type'].astype(pd.CategoricalDtype(KIND_NAMES))
+        # Days are already time-sorted, so the stable sort only has to merge them
+        df.sort_values('time', kind='stable', inplace=True)
+        df.reset_index(drop=True, inplace=True)
+        return df
+
+    def startSimulation(self, until=None):
+        # Replays self.df from the cursor (the start, or where a restored checkpoint left off).
+        # With `until` (a timestamp) only the events before it are replayed and the final P&L is
+        # not printed yet: the run can be continued with another startSimulation() call, or forked.
+        # Every checkpointEvery events the state is saved to checkpointPath.
+        if self.chainIndex is None or self.priceIndex is None:
+            with self.instrumentation.phase('buildIndexes'):
+                if self.chainIndex is None:
+                    self.chainIndex = OptionChainIndex(self.df, self.instruments)
+                if self.priceIndex is None:
+                    self.priceIndex = AsOfPriceIndex(self.df, self.instruments)
+
+        # Replay over columnar NumPy arrays instead of DataFrame.iterrows(), which built a
+        # pandas Series for every candle. Strategy receives a lightweight MarketEvent that
+        # still supports row['column'] access.
+        with self.instrumentation.phase('buildEvents'):
+            columns = build_event_columns(self.df, self.instruments)
+
+        n_events = len(self.df)
+        end = n_events if until is None else int(np.searchsorted(columns['time'], np.datetime64(pd.Timestamp(until))))
+        # Checkpoints fall between chunks, so they cost nothing per event
+        chunk = self.checkpointEvery or max(end - self.cursor, 1)
+        self.currentPrice.reserve(len(self.instruments))
+        with self.instrumentation.phase('replay'):
+            while self.cursor < end:
+                stop = min(self.cursor + chunk, end)
+                self._replay(self._eventRange(columns, self.cursor, stop), final=stop == n_events)
+                self.cursor = stop
+                if self.checkpointEvery and stop < n_events:
+                    self.saveCheckpoint()
+
+    def _eventRange(self, columns, start, stop):
+        # .tolist() yields Python scalars, which are much cheaper to iterate than NumPy scalars
+        instrument_ids = columns['instrument_id'][start:stop]
+        return zip(
+            columns['time'][start:stop].astype('datetime64[us]').tolist(),
+            columns['day'][start:stop].tolist(),
+            instrument_ids.tolist(),
+            columns['symbols'][instrument_ids].tolist(),
+            *(columns[name][start:stop].tolist()
+              for name in ('price', 'strike_price', 'option_type', 'open', 'high', 'low', 'volume')),
+        )
 
-            current_date = row['time'].date()
-            if last_processed_date is None:
-                last_processed_date = current_date
+    def startStreamingSimulation(self):
+        # Pulls one day folder at a time instead of materializing the whole date range in self.df.
+        # Only the last few days are held (see merge_day_streams); older ones are released once replayed.
+        cache_root = cache_path if use_data_cache else None
+        day_frames = map(self._selectUnderlyings,
+                         iter_day_frames(simStartDate, simEndDate, data_path, cache_root, self.resolution))
+        with self.instrumentation.phase('replay'):
+            self._replay(merge_day_streams(day_frames, on_window=self._onStreamWindow, instruments=self.instruments))
 
-            if current_date != last_processed_date:
+    def _onStreamWindow(self, day_frames):
+        # self.df and the chain index cover only the held days, which include every row
+        # sharing a calendar date with the events about to be replayed
+        self.df = self._concatDays(day_frames)
+        self.chainIndex = OptionChainIndex(self.df, self.instruments)
+        self.priceIndex = AsOfPriceIndex(self.df, self.instruments)
+        self.currentPrice.reserve(len(self.instruments))  # _concatDays interned the new day's symbols
+
+    def _replay(self, events, final=True):
+        # Every id the events can carry is interned and reserved before it is emitted (by
+        # startSimulation, or per day by _onStreamWindow), so the loop indexes without checks.
+        # A run can be replayed in consecutive pieces; only the last one (final) ends the run.
+        prices = self.currentPrice.values
+        price_times = self.currentPrice.times
+        onMarketData = self.instrumentation.wrap('onMarketData', self.strategy.onMarketData) # Unwrapped when off
+        ledger = self.ledger
+        open_positions = ledger.positions
+        pending_orders = self.execution.pending
+        match_orders = self.execution.onBar
+        recorder = self.equityRecorder
+        record_equity = recorder.onEvent if recorder is not None and recorder.mode in ('bar', 'interval') else None
+        bar_aggregators = self.barAggregators
+        last_processed_day, last_processed_date = self._replayDay
+        for time, day, instrument_id, symbol, price, strike, option_type, open_, high, low, volume in events:
+            self.currentTime = time
+            prices[instrument_id] = price
+            price_times[instrument_id] = time
+            if instrument_id in open_positions:
+                ledger.mark(instrument_id, price) # Only instruments we hold need re-marking
+            if instrument_id in pending_orders:
+                match_orders(instrument_id, time, open_, high, low, volume) # Orders from earlier bars fill on this one
+            if bar_aggregators:
+                for aggregator in bar_aggregators.values():
+                    aggregator.update(symbol, time, open_, high, low, price, volume)
+            onMarketData(MarketEvent(time, symbol, price, strike, option_type, instrument_id, open_, high, low, volume))
+            if record_equity is not None:
+                record_equity(time, ledger.totalPnl())
+
+            if last_processed_day is None:
+                last_processed_day = day
+                last_processed_date = time.date()
+
+            if day != last_processed_day:
                 self.printPnl(timestamp=last_processed_date) # Record P&L at end of day
-                last_processed_date = current_date
+                last_processed_day = day
+                last_processed_date = time.date()
+                ledger.evictExpired(last_processed_date) # Settle contracts that expired before today
+                self.execution.cancelExpired(last_processed_date) # Their working orders can no longer fill
+
+        self._replayDay = (last_processed_day, last_processed_date)
+        if not final:
+            return
+        if self.currentTime is None:
+            raise ValueError("No valid data files found.")
+        if recorder is not None:
+            recorder.flush()
+        self.printPnl(timestamp=self.currentTime.date())
+
+    def bars(self, resolution, max_bars=None):
+        # Higher-timeframe bars of every instrument, updated as the replay goes (see
+        # utils.bars.BarAggregator). Ask for them before the replay, e.g. in the strategy's
+        # __init__: an aggregator created later only sees the events from then on.
+        aggregator = self.barAggregators.get(resolution)
+        if aggregator is None:
+            aggregator = self.barAggregators[resolution] = BarAggregator(resolution, max_bars)
+        return aggregator
+
+    def _strategies(self):
+        return [self.strategy]
+
+    def _books(self):
+        return {'currQuantity': self.currQuantity, 'buyValue': self.buyValue, 'sellValue': self.sellValue}
 
-        self.printPnl(timestamp=self.df['time'].iloc[-1].date())
+    def checkpointState(self):
+        # Everything a replay needs to continue from the cursor: books, ledger, prices, working
+        # orders, equity and P&L buffers, and each strategy's attributes except its `sim` reference.
+        # The market data is not included: a resumed run reads the same dataRange again.
+        # Values are live references; saveCheckpoint/fork serialize them right away.
+        return {
+            'cursor': self.cursor,
+            'replay_day': self._replayDay,
+            'data_range': self.dataRange,
+            'resolution': self.resolution,
+            'rows': None if self.df is None else len(self.df),
+            'symbols': list(self.instruments.symbols),
+            'current_time': self.currentTime,
+            'prices': self.currentPrice.snapshot(),
+            'books': self._books(),
+            'fees_paid': self.feesPaid,
+            'pnl_history': self.pnl_history,
+            'pnl_records': self.pnl_records,
+            'bars': self.barAggregators,
+            'ledger': self.ledger.snapshot(),
+            'equity': self.equityRecorder,
+            'execution': self.execution.snapshot(),
+            'strategies': [{name: value for name, value in vars(strategy).items() if name != 'sim'}
+                           for strategy in self._strategies()],
+        }
 
-    def onOrder(self, symbol, side, quantity, price):
-        epsilon = 0.0001
-        trade_price = price * (1 + epsilon) if side == 'BUY' else price * (1 - epsilon)
+    def restoreState(self, state):
+        # Inverse of checkpointState, on a simulator holding the same market data (self.df)
+        if self.df is not None and state['rows'] is not None and len(self.df) != state['rows']:
+            raise ValueError(f"Checkpoint was taken on {state['rows']} rows, the loaded data has {len(self.df)}")
+        # Instrument ids index every book: intern the checkpoint's symbols in their original order
+        for instrument_id, symbol in enumerate(state['symbols']):
+            if self.instruments.intern(symbol) != instrument_id:
+                raise ValueError("Checkpoint instrument ids do not match this process's registry")
+        self.currentPrice.reserve(len(self.instruments))
+        self.cursor = state['cursor']
+        self._replayDay = state['replay_day']
+        self.dataRange = state['data_range']
+        self.resolution = state['resolution']
+        self.currentTime = state['current_time']
+        self.currentPrice.restore(state['prices'])
+        for name, values in state['books'].items():
+            setattr(self, name, values)
+        self.feesPaid = state['fees_paid']
+        self.pnl_history = state['pnl_history']
+        self.pnl_records = state['pnl_records']
+        self.barAggregators.clear()
+        self.barAggregators.update(state['bars'])
+        self.ledger.restore(state['ledger'])
+        self.equityRecorder = state['equity']
+        self.execution.restore(state['execution'])
+        for strategy, attributes in zip(self._strategies(), state['strategies']):
+            vars(strategy).update(attributes)
+
+    def saveCheckpoint(self, path=None):
+        path = path or self.checkpointPath
+        with self.instrumentation.phase('checkpoint'):
+            size = save_snapshot(self.checkpointState(), path)
+        logger.debug("Checkpoint at event %d (%s): %d bytes written to %s", self.cursor, self.currentTime, size, path)
+        return size
+
+    @classmethod
+    def resume(cls, path=None, **kwargs):
+        # A simulator (built with kwargs, e.g. strategy_params) restored from the snapshot at `path`
+        # (default: config.checkpoint_path), with its date range loaded again; startSimulation()
+        # continues where the checkpoint was taken
+        state = load_snapshot(path or checkpoint_path)
+        sim = cls(**kwargs)
+        sim.readData(*state['data_range'], resolution=state['resolution'])
+        sim.restoreState(state)
+        logger.info("Resumed at event %d of %d (%s)", sim.cursor, len(sim.df), sim.currentTime)
+        return sim
+
+    def fork(self, variants):
+        # Independent copies of this simulator's current state (e.g. after a warm-up replayed with
+        # startSimulation(until=...)), one per dict of strategy parameter overrides. They share
+        # the market data and indexes, so continuing each costs only the rest of the replay.
+        snapshot = dumps(self.checkpointState())
+        children = []
+        for params in variants:
+            child = type(self)(instruments=self.instruments)
+            child.df, child.chainIndex, child.priceIndex = self.df, self.chainIndex, self.priceIndex
+            child.restoreState(loads(snapshot))
+            child.strategy.params = {**child.strategy.params, **(params or {})}
+            children.append(child)
+        return children
+
+    def onOrder(self, symbol, side, quantity, price, order_type=MARKET):
+        # In 'instant' execution mode this fills right away at price +/- slippage; otherwise the
+        # order works until a later bar of the symbol fills it (see utils.execution)
+        self.instrumentation.count('orders')
+        return self.execution.submit(symbol, side, quantity, price, order_type, time=self.currentTime)
+
+    def _onFill(self, order, quantity, trade_price, fee):
         trade_value = trade_price * quantity
+        instrument_id = order.instrument_id
+        if instrument_id >= len(self.currQuantity):
+            size = len(self.instruments)
+            self.currQuantity, self.buyValue, self.sellValue = (grow(a, size) for a in (self.currQuantity, self.buyValue, self.sellValue))
 
-        if side == 'BUY':
-            self.currQuantity[symbol] = self.currQuantity.get(symbol, 0) + quantity
-            self.buyValue[symbol] = self.buyValue.get(symbol, 0) + trade_value
+        mark_price = self.currentPrice.getById(instrument_id, 0)
+        self.instrumentation.count('fills')
+        self.feesPaid += fee
+        if order.side == 'BUY':
+            self.currQuantity[instrument_id] += quantity
+            self.buyValue[instrument_id] += trade_value
+            self.ledger.onFill(instrument_id, quantity, -trade_value - fee, mark_price)
         else:
-            self.currQuantity[symbol] = self.currQuantity.get(symbol, 0) - quantity
-            self.sellValue[symbol] = self.sellValue.get(symbol, 0) + trade_value
+            self.currQuantity[instrument_id] -= quantity
+            self.sellValue[instrument_id] += trade_value
+            self.ledger.onFill(instrument_id, -quantity, trade_value - fee, mark_price)
 
-        self.strategy.onTradeConfirmation(symbol, side, quantity, trade_price)
+        if self.equityRecorder is not None:
+            self.equityRecorder.onFill(self.currentTime, self.ledger.totalPnl())
 
-    def printPnl(self, timestamp=None):
-        total_pnl = 0
-        for symbol in set(self.buyValue) | set(self.sellValue):
-            buy_val = self.buyValue.get(symbol, 0)
-            sell_val = self.sellValue.get(symbol, 0)
-            quantity = self.currQuantity.get(symbol, 0)
-            current_price = self.currentPrice.get(symbol, 0)
-            pnl = sell_val - buy_val + quantity * current_price
-            total_pnl += pnl
+        self.strategy.onTradeConfirmation(order.symbol, order.side, quantity, trade_price)
+
+    def priceAsOf(self, symbol, time=None, default=None, max_age=None):
+        # Price of the symbol's last bar at or before `time` (default: the current bar), by binary
+        # search in the as-of index; max_age (minutes or an offset like '2h', as config.price_max_age)
+        # defaults to config.price_max_age
+        time = self.currentTime if time is None else time
+        max_age = self.priceMaxAge if max_age is None else max_age
+        return self.priceIndex.priceAsOf(symbol, time, default, max_age)
+
+    def currentPnl(self):
+        # O(1): the ledger keeps running totals, so this can be queried after every event
+        return self.ledger.totalPnl()
 
+    def underlyingPnl(self):
+        # P&L sub-book of every configured underlying (they add up to currentPnl)
+        pnl = self.ledger.groupPnl()
+        return {underlying: pnl.get(underlying, 0.0) for underlying in self.underlyings}
+
+    def portfolioGreeks(self, futures_symbol=None):
+        # Black-76 Greeks of the open positions on one underlying (by default the first configured)
+        # at the current bar, marked at currentPrice and priced off that underlying's futures
+        futures_symbol = futures_symbol or self.futuresSymbols[0]
+        underlying = futures_underlying(futures_symbol)
+        instruments = self.instruments
+        positions = {instruments.symbols[instrument_id]: position[0]
+                     for instrument_id, position in self.ledger.positions.items()
+                     if instruments.underlying_name(instrument_id) == underlying}
+        return self.greeks.portfolioGreeks(self.currentTime, self.currentPrice.get(futures_symbol),
+                                           positions, self.currentPrice)
+
+    def underlyingGreeks(self):
+        # portfolioGreeks of every configured underlying
+        return {underlying: self.portfolioGreeks(futures_symbol)
+                for underlying, futures_symbol in zip(self.underlyings, self.futuresSymbols)}
+
+    def printPnl(self, timestamp=None):
+        total_pnl = self.currentPnl()
         self.pnl_history.append(total_pnl)
         ts = timestamp if timestamp else "Final"
-        self.pnl_records.append({'time': ts, 'PnL': total_pnl})
-        print(f"Current Total P&L at {ts}: {total_pnl:.2f}")
+        record = {'time': ts, 'PnL': total_pnl}
+        if len(self.underlyings) > 1:
+            books = self.underlyingPnl()
+            record.update((f'PnL_{underlying}', pnl) for underlying, pnl in books.items())
+            logger.info("Current Total P&L at %s: %.2f (%s)", ts, total_pnl,
+                        ', '.join(f'{underlying} {pnl:.2f}' for underlying, pnl in books.items()))
+        else:
+            logger.info("Current Total P&L at %s: %.2f", ts, total_pnl)
+        self.pnl_records.append(record)
     
     def exportPnlToCsv(self, output_file='output.csv'):
         df_pnl = pd.DataFrame(self.pnl_records)
         df_pnl.to_csv(output_file, index=False)
         print(f"P&L history exported to {output_file}")
 
+    def exportEquity(self, output_file=None):
+        output_file = output_file or equity_output
+        self.equityRecorder.export(output_file)
+        print(f"Equity curve ({self.equityRecorder.size} points at '{self.equityRecorder.resolution}' resolution) exported to {output_file}")
+
 
 
 if __name__ == '__main__':
-    sim = Simulator()
-    sim.readData()
-    sim.startSimulation()
-    sim.printPnl()
-    printStats(sim.pnl_history)
-    sim.exportPnlToCsv()
+    set_level(log_level)
+    resuming = resume_from_checkpoint and not streaming_mode and os.path.exists(checkpoint_path)
+    sim = Simulator.resume(checkpoint_path) if resuming else Simulator()
+    run = sim.instrumentation
+    with profiled(profiler, profile_output):
+        if streaming_mode:
+            sim.startStreamingSimulation()
+        else:
+            if not resuming:
+                sim.readData()
+            sim.startSimulation()
+        sim.printPnl()
+        with run.phase('printStats'):
+            if sim.equityRecorder is not None:
+                # Dense equity curve; the annualization factor follows its sampling interval
+                equity_times, equity = sim.equityRecorder.toArrays()
+                printStats(equity, times=equity_times)
+            else:
+                printStats(sim.pnl_history)
+        with run.phase('export'):
+            sim.exportPnlToCsv()
+            if sim.equityRecorder is not None:
+                sim.exportEquity()
+    if run.enabled:
+        print(run.format())
+        run.export(instrumentation_output)
+        print(f"Run statistics exported to {instrumentation_output}")
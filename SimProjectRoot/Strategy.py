@@ -69,73 +69,164 @@
 
 import pandas as pd
 from utils.getStrikes import get_closest_strikes # Ensure this import is correct
-
-class Strategy:
-    def __init__(self, simulator):
-        self.sim = simulator
+from utils.instruments import futures_underlying
+from utils.logs import get_logger
+
+logger = get_logger('strategy')  # Lazy %-formatting: messages cost nothing when the level is above INFO
+
+# Tunable thresholds of the straddle strategy (overridden per run by the optimizer)
+DEFAULT_PARAMS = {
+    'entry_hour': 13,            # Entry time of day (hour)
+    'entry_minute': 0,           # Entry time of day (minute)
+    'exit_deviation': 0.01,      # Exit when futures move this fraction away from the entry price
+    'pnl_stop': 500,             # Exit when abs(total_pnl) exceeds this
+    'quantity': 0.1,             # Contracts sold per leg
+    'strike_deviation': 0.02,    # Max strike distance from futures for ATM selection
+}
+
+class Straddle:
+    # State of the short straddle on one underlying and expiry. position_open follows the fills:
+    # it is set once the entry orders are done (see Strategy.syncOrders) and cleared once the
+    # exit orders are, with `orders` holding the entry or exit orders while any of them works.
+    __slots__ = ('futures_symbol', 'underlying', 'expiry_days', 'entry_price', 'entry_time', 'call_symbol',
+                 'put_symbol', 'position_open', 'orders', 'call_quantity', 'put_quantity')
+
+    def __init__(self, futures_symbol, expiry_days):
+        self.futures_symbol = futures_symbol
+        self.underlying = futures_underlying(futures_symbol)
+        self.expiry_days = expiry_days
         self.entry_price = None
         self.entry_time = None
         self.call_symbol = None
         self.put_symbol = None
         self.position_open = False
+        self.orders = []          # [call order, put order] of the entry or exit in progress (None: leg not traded)
+        self.call_quantity = 0.0  # Quantity of each leg sold at entry (what the exit buys back)
+        self.put_quantity = 0.0
+
+class Strategy:
+    def __init__(self, simulator, params=None):
+        self.sim = simulator
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        # One straddle per simulated underlying (sim.futuresSymbols, from config.symbols) and expiry
+        # offset (sim.expiryOffsets), keyed by the futures symbol whose bars drive them. The book-wide
+        # total_pnl below is shared, so the P&L stop applies to the whole book.
+        self.straddles = {
+            futures_symbol: [Straddle(futures_symbol, expiry_days) for expiry_days in simulator.expiryOffsets]
+            for futures_symbol in simulator.futuresSymbols
+        }
         self.trades = []
         self.total_pnl = 0 # This will track a basic PnL for strategy's internal use
 
     def onMarketData(self, row):
+        # Entries and exits are only decided on the futures bars of the simulated underlyings,
+        # so the bars of every other instrument are skipped with one dict lookup
+        straddles = self.straddles.get(row['symbol'])
+        if straddles is None:
+            return
+
+        # The simulator has already recorded this price in currentPrice (by instrument id)
+        # before calling onMarketData, so there is nothing to update here
         time = row['time']
-        symbol = row['symbol']
         price = row['price']
+        for straddle in straddles:
+            self.onFuturesBar(straddle, time, price)
 
-        # Always update the simulator's current price for the symbol received
-        # This ensures currentPrice dict has the latest values for all instruments
-        self.sim.currentPrice[symbol] = price 
+    def onFuturesBar(self, straddle, time, price):
+        # Outside 'instant' execution mode the orders of the last entry/exit may still be working
+        self.syncOrders(straddle, time, price)
 
         # --- Entry Logic ---
-        # Trigger entry only if it's 1 PM, no position is open, AND the current row is the BTCUSDT futures
-        if time.hour == 13 and time.minute == 0 and not self.position_open:
-            if symbol == 'BTCUSDT': # Ensure this row is for the futures contract
-                self.entry_time = time
-                self.entry_price = price # Store the futures price at entry
-                
-                # Call get_closest_strikes with the futures price, current time, and the full simulation DataFrame
-                self.call_symbol, self.put_symbol = get_closest_strikes(
-                    futures_price=self.entry_price,     # The futures price at 1 PM
+        # Trigger entry only if it's 1 PM and no position is open (or being opened/closed) on this straddle
+        params = self.params
+        if (time.hour == params['entry_hour'] and time.minute == params['entry_minute']
+                and not straddle.position_open and not straddle.orders):
+            straddle.entry_time = time
+            straddle.entry_price = price # Store the futures price at entry
+
+            # Call get_closest_strikes with the futures price, current time, and the chain index (or,
+            # without one, the full simulation DataFrame, which is not even read otherwise)
+            chain_index = self.sim.chainIndex
+            with self.sim.instrumentation.timer('get_closest_strikes'):
+                straddle.call_symbol, straddle.put_symbol = get_closest_strikes(
+                    futures_price=straddle.entry_price, # The futures price at 1 PM
                     current_time_obj=time,              # The current timestamp
-                    all_sim_df=self.sim.df              # The entire DataFrame of loaded data
+                    all_sim_df=self.sim.df if chain_index is None else None, # The entire DataFrame of loaded data
+                    price_deviation_percent=params['strike_deviation'],
+                    chain_index=chain_index,            # Precomputed chain snapshots (binary search, no DataFrame scan)
+                    universe=self.sim.symbolUniverses.get(straddle.underlying), # Listed contracts only (None: no filtering)
+                    underlying=straddle.underlying,     # This underlying's chain
+                    expiry_days=straddle.expiry_days,   # This straddle's expiry
+                    as_of=pd.Timestamp(time).value if self.sim.pointInTimeChain else None # Contracts printed by now only
                 )
-                
-                if self.call_symbol and self.put_symbol: # Only proceed if both ATM call and put symbols were found
-                    # Get the actual current market price of the selected options from simulator's currentPrice
-                    # Use the futures price as a fallback if the option price isn't yet updated in currentPrice
-                    call_current_price = self.sim.currentPrice.get(self.call_symbol, price)
-                    put_current_price = self.sim.currentPrice.get(self.put_symbol, price)
-                    
-                    self.sim.onOrder(self.call_symbol, 'SELL', 0.1, call_current_price)
-                    self.sim.onOrder(self.put_symbol, 'SELL', 0.1, put_current_price)
-                    self.position_open = True
-                    print(f"Opened position at {time}: Futures {self.entry_price:.2f}, Sold Call {self.call_symbol} at {call_current_price:.2f}, Sold Put {self.put_symbol} at {put_current_price:.2f}")
-                else:
-                    print(f"Could not find ATM call/put for {time} at futures price {self.entry_price:.2f}")
+
+            if straddle.call_symbol and straddle.put_symbol: # Only proceed if both ATM call and put symbols were found
+                # Get the actual current market price of the selected options from simulator's currentPrice
+                # Use the futures price as a fallback if the option price isn't yet updated in currentPrice
+                call_current_price = self.sim.currentPrice.get(straddle.call_symbol, price)
+                put_current_price = self.sim.currentPrice.get(straddle.put_symbol, price)
+
+                straddle.orders = [
+                    self.sim.onOrder(straddle.call_symbol, 'SELL', params['quantity'], call_current_price),
+                    self.sim.onOrder(straddle.put_symbol, 'SELL', params['quantity'], put_current_price),
+                ]
+                self.syncOrders(straddle, time, price) # Opens the position right away if both legs filled
+            else:
+                logger.info("Could not find ATM call/put for %s at futures price %.2f", time, straddle.entry_price)
 
         # --- Exit Logic ---
-        # Only check exit conditions if a position is open AND the current market data row is for BTCUSDT (futures)
-        if self.position_open:
-            if symbol == 'BTCUSDT': # We only use futures price for deviation check
-                futures_current_price = price # This 'price' is already the BTCUSDT price for this row
-                deviation = abs(futures_current_price - self.entry_price) / self.entry_price
-                
-                # Exit condition: futures price deviation OR strategy's internal P&L threshold
-                # Note: self.total_pnl here is a simple sum of trade values, for a true P&L from straddle,
-                # you'd track individual leg P&L or rely on simulator's comprehensive P&L.
-                if deviation > 0.01 or abs(self.total_pnl) > 500:
-                    # Get the actual current market price of the options to close the trade
-                    call_buy_price = self.sim.currentPrice.get(self.call_symbol, futures_current_price)
-                    put_buy_price = self.sim.currentPrice.get(self.put_symbol, futures_current_price)
-                    
-                    self.sim.onOrder(self.call_symbol, 'BUY', 0.1, call_buy_price)
-                    self.sim.onOrder(self.put_symbol, 'BUY', 0.1, put_buy_price)
-                    self.position_open = False
-                    print(f"Closed position at {time}: Futures {futures_current_price:.2f}, Strategy P&L {self.total_pnl:.2f}, Deviation {deviation:.4f}")
+        # Only check exit conditions if a position is open and not already being closed
+        # (the deviation uses this straddle's futures price)
+        if straddle.position_open and not straddle.orders:
+            futures_current_price = price # This 'price' is the straddle's futures price for this row
+            deviation = abs(futures_current_price - straddle.entry_price) / straddle.entry_price
+
+            # Exit condition: futures price deviation OR strategy's internal P&L threshold
+            # Note: self.total_pnl here is a simple sum of trade values, for a true P&L from straddle,
+            # you'd track individual leg P&L or rely on simulator's comprehensive P&L.
+            if deviation > params['exit_deviation'] or abs(self.total_pnl) > params['pnl_stop']:
+                # Get the actual current market price of the options to close the trade
+                call_buy_price = self.sim.currentPrice.get(straddle.call_symbol, futures_current_price)
+                put_buy_price = self.sim.currentPrice.get(straddle.put_symbol, futures_current_price)
+
+                # Legs that never filled at entry have nothing to buy back (None)
+                straddle.orders = [
+                    self.sim.onOrder(symbol, 'BUY', quantity, buy_price) if quantity > 0 else None
+                    for symbol, quantity, buy_price in ((straddle.call_symbol, straddle.call_quantity, call_buy_price),
+                                                        (straddle.put_symbol, straddle.put_quantity, put_buy_price))
+                ]
+                self.syncOrders(straddle, time, price) # Closes the position right away if both legs filled
+
+    def syncOrders(self, straddle, time, price):
+        # Moves the straddle on once none of its entry/exit orders is working any more. An order
+        # stops working when it fills or is cancelled (e.g. the simulator cancels orders on expired
+        # options), so the entry opens the position with whatever each leg actually sold, and an
+        # exit cancelled on expired options still closes it.
+        orders = straddle.orders
+        if not orders or any(order is not None and order.working for order in orders):
+            return
+        straddle.orders = []
+        call_order, put_order = orders
+        if not straddle.position_open:
+            straddle.call_quantity, straddle.put_quantity = call_order.filled, put_order.filled
+            straddle.position_open = straddle.call_quantity > 0 or straddle.put_quantity > 0
+            if straddle.position_open:
+                # Average fill prices; a leg cancelled before any fill shows as nan
+                logger.info("Opened position at %s: Futures %.2f, Sold Call %s at %.2f, Sold Put %s at %.2f",
+                            straddle.entry_time, straddle.entry_price,
+                            straddle.call_symbol, call_order.average_price or float('nan'),
+                            straddle.put_symbol, put_order.average_price or float('nan'))
+            else:
+                logger.info("Entry orders for %s/%s cancelled unfilled", straddle.call_symbol, straddle.put_symbol)
+        else:
+            straddle.position_open = False
+            straddle.call_quantity = straddle.put_quantity = 0.0
+            if any(order is not None and order.cancelled for order in orders):
+                logger.info("Exit orders for %s/%s cancelled at expiry; position dropped at %s",
+                            straddle.call_symbol, straddle.put_symbol, time)
+            else:
+                logger.info("Closed position at %s: Futures %.2f, Strategy P&L %.2f, Deviation %.4f",
+                            time, price, self.total_pnl, abs(price - straddle.entry_price) / straddle.entry_price)
 
     def onTradeConfirmation(self, symbol, side, quantity, price):
         # This method records individual trades and updates a simplified strategy-level P&L.
@@ -151,4 +242,5 @@ class Strategy:
         self.total_pnl += direction * quantity * price 
         
         self.trades.append({'symbol': symbol, 'side': side, 'qty': quantity, 'price': price})
-        print(f"Trade confirmed: {side} {quantity} {symbol} at {price:.2f}. Current Strategy Total P&L: {self.total_pnl:.2f}")
+        logger.info("Trade confirmed: %s %s %s at %.2f. Current Strategy Total P&L: %.2f",
+                    side, quantity, symbol, price, self.total_pnl)
@@ -0,0 +1,271 @@
+"""
+Reproducible benchmark suite on synthetic data (see benchmarks/syntheticData.py).
+
+Times the stages of a run on a generated dataset of a fixed size:
+    read_csv          Simulator.readData parsing the CSVs (no cache)
+    read_cache_build  readData parsing the CSVs and writing the columnar cache
+    read_cached       readData from a warm cache
+    start_simulation  Simulator.startSimulation (event columns + replay of the Strategy)
+    straddle_kernel   StraddleKernel.run, the same strategy as a compiled kernel (KernelStrategy.py)
+    closest_strikes   get_closest_strikes on the chain index, at random futures bars
+    print_stats       printStats on the replay's equity curve, charts included
+
+Every benchmark reports its best wall time over --repeat runs, its throughput (rows, lookups
+or equity points per second) and the tracemalloc peak of one extra run. The results are
+compared with a baseline file written by --save-baseline; a benchmark slower (or using more
+memory) than the baseline by more than --tolerance is reported as a regression and the exit
+status is 1. Baselines are machine specific: save one on the machine that checks against it.
+
+Run from SimProjectRoot:
+    python -m benchmarks.benchSuite --save-baseline          # record benchmarks/baseline.json
+    python -m benchmarks.benchSuite                          # compare against it
+    python -m benchmarks.benchSuite --days 60 --strikes 80 --resolution 1m --baseline big.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+
+os.environ.setdefault('MPLBACKEND', 'Agg')  # printStats saves its charts; never open a window
+
+import numpy as np
+import pandas as pd
+
+import Simulator as simulator_module
+from KernelStrategy import StraddleKernel
+from Simulator import Simulator
+from benchmarks.syntheticData import generate_dataset
+from stats.printStats import printStats
+from utils.downloader import RESOLUTION_SECONDS
+from utils.getStrikes import get_closest_strikes
+from utils.logs import set_level
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+START_DATE = datetime(2025, 1, 1)
+
+
+@contextmanager
+def _dataset(data_dir, cache_dir=None):
+    """Points the Simulator at another data folder (and cache; None disables it) for the duration."""
+    saved = simulator_module.data_path, simulator_module.cache_path, simulator_module.use_data_cache
+    simulator_module.data_path = data_dir
+    simulator_module.cache_path = cache_dir
+    simulator_module.use_data_cache = cache_dir is not None
+    try:
+        yield
+    finally:
+        simulator_module.data_path, simulator_module.cache_path, simulator_module.use_data_cache = saved
+
+
+def measure(run, repeat, items, setup=None):
+    """
+    Times `run(state)` `repeat` times, `state` being a fresh setup() result each time (excluded
+    from the timing), then runs it once more under tracemalloc for the memory peak.
+
+    Returns:
+        dict: seconds (best), median_seconds, items, per_sec (items / best) and peak_mb.
+    """
+    seconds = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        seconds.append(time.perf_counter() - start)
+
+    state = setup() if setup else None
+    tracemalloc.start()
+    try:
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    best = min(seconds)
+    return {
+        'seconds': best,
+        'median_seconds': statistics.median(seconds),
+        'items': items,
+        'per_sec': items / best if best > 0 else None,
+        'peak_mb': peak / 2 ** 20,
+    }
+
+
+def run_suite(data_dir, start_date, end_date, repeat=5, n_lookups=10000, seed=0):
+    """
+    Runs every benchmark on the day folders in `data_dir`.
+
+    Returns:
+        dict: benchmark name -> measure() result.
+    """
+    results = {}
+    cache_dir = tempfile.mkdtemp(prefix='bench_cache_')
+    work_dir = tempfile.mkdtemp(prefix='bench_stats_')
+    try:
+        def read(state):
+            Simulator().readData(start_date, end_date)
+
+        def clear_cache():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        loaded = Simulator()
+        with _dataset(data_dir, cache_dir):
+            loaded.readData(start_date, end_date)
+        n_rows = len(loaded.df)
+
+        with _dataset(data_dir):
+            results['read_csv'] = measure(read, repeat, n_rows)
+        with _dataset(data_dir, cache_dir):
+            results['read_cache_build'] = measure(read, repeat, n_rows, setup=clear_cache)
+            read(None)  # Leave the cache warm
+            results['read_cached'] = measure(read, repeat, n_rows)
+
+        def fresh_simulator():
+            sim = Simulator()
+            sim.df, sim.chainIndex, sim.priceIndex = loaded.df, loaded.chainIndex, loaded.priceIndex
+            return sim
+
+        results['start_simulation'] = measure(lambda sim: sim.startSimulation(), repeat, n_rows,
+                                              setup=fresh_simulator)
+
+        kernel = StraddleKernel(fresh_simulator())
+        kernel.run()  # Entry table and JIT compilation are one-off costs
+        results['straddle_kernel'] = measure(lambda state: kernel.run(), repeat, n_rows)
+
+        # Lookups at random futures bars, as Strategy makes them
+        futures = loaded.df[loaded.df['option_type'] == '']
+        rng = np.random.default_rng(seed)
+        picks = rng.integers(0, len(futures), n_lookups)
+        probes = list(zip(futures['price'].to_numpy()[picks].tolist(),
+                          futures['time'].iloc[picks].dt.to_pydatetime().tolist()))
+
+        def lookups(state):
+            for price, when in probes:
+                get_closest_strikes(price, when, loaded.df, chain_index=loaded.chainIndex)
+
+        results['closest_strikes'] = measure(lookups, repeat, n_lookups)
+
+        replayed = fresh_simulator()
+        replayed.startSimulation()
+        equity_times, equity = replayed.equityRecorder.toArrays()
+
+        def stats(state):
+            cwd = os.getcwd()
+            os.chdir(work_dir)  # The charts are written to the working directory
+            try:
+                with redirect_stdout(StringIO()):
+                    printStats(equity, times=equity_times)
+            finally:
+                os.chdir(cwd)
+
+        results['print_stats'] = measure(stats, repeat, len(equity))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    (name, metric, baseline value, current value, ratio) of every benchmark whose best time or
+    memory peak exceeds the baseline's by more than `tolerance` (0.25 = 25%).
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if previous.get(metric) and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append((name, metric, previous[metric], current[metric], current[metric] / previous[metric]))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = [f"{'benchmark':<18} {'best s':>9} {'median s':>9} {'per sec':>14} {'peak MB':>9}  vs baseline"]
+    for name, r in results.items():
+        previous = (baseline or {}).get(name)
+        change = f"{r['seconds'] / previous['seconds'] - 1:+7.1%}" if previous and previous.get('seconds') else ''
+        lines.append(f"{name:<18} {r['seconds']:9.4f} {r['median_seconds']:9.4f} {r['per_sec'] or 0:14,.0f} "
+                     f"{r['peak_mb']:9.1f}  {change}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--strikes', type=int, default=40, help='Strikes per day, for calls and puts each')
+    parser.add_argument('--resolution', default='5m', choices=sorted(RESOLUTION_SECONDS))
+    parser.add_argument('--option-fill', type=float, default=0.1, help='Fraction of option bars that print')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark (the best counts)')
+    parser.add_argument('--lookups', type=int, default=10000, help='get_closest_strikes calls per run')
+    parser.add_argument('--data-dir', default=None, help='Write (or reuse) the dataset here instead of a temp dir')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file to compare against or save')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown/memory growth (0.25 = 25%%)')
+    parser.add_argument('--output', default=None, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    set_level('WARNING')  # No per-trade/per-day messages in the measurements
+    dataset = {'days': args.days, 'strikes': args.strikes, 'resolution': args.resolution,
+               'option_fill': args.option_fill, 'seed': args.seed, 'lookups': args.lookups}
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='bench_data_')
+    try:
+        if not os.path.isdir(os.path.join(data_dir, START_DATE.strftime('%Y%m%d'))):
+            generate_dataset(data_dir, START_DATE, args.days, args.strikes, resolution=args.resolution,
+                             option_fill=args.option_fill, seed=args.seed)
+        end_date = START_DATE + timedelta(days=args.days - 1)
+        results = run_suite(data_dir, START_DATE, end_date, args.repeat, args.lookups, args.seed)
+    finally:
+        if args.data_dir is None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'dataset': dataset,
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                        'machine': platform.machine(), 'system': platform.system()},
+        'results': results,
+    }
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('dataset') != dataset:
+            print(f"Baseline {args.baseline} was recorded on a different dataset {baseline.get('dataset')}; not comparing")
+            baseline = None
+
+    print(format_results(results, baseline and baseline['results']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if baseline is None:
+        print("No baseline to compare with; record one with --save-baseline")
+        return
+
+    regressions = compare(results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for name, metric, previous, current, ratio in regressions:
+            print(f"  {name:<18} {metric:<8} {previous:10.4f} -> {current:10.4f}  ({ratio:.2f}x)")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Seeded synthetic market data in the layout of the downloaded day folders.
+
+Writes data/YYYYMMDD/BTCUSDT.csv (one futures file per underlying), calls_YYYY-MM-DD.csv and
+puts_YYYY-MM-DD.csv with the columns perp_futures_btc.py saves, so everything that reads day
+folders (Simulator.readData, the columnar cache, streaming mode) runs on it unchanged. The
+futures follow geometric random walks; each day lists `strikes` calls and puts per underlying
+and expiry around the day's opening price, expiring `expiry_days` later, priced with Black-76
+at a flat volatility. Only a fraction `option_fill` of the option bars print, as option data is
+much sparser than the futures.
+
+Run from SimProjectRoot:
+    python -m benchmarks.syntheticData --output /tmp/synthetic --days 30 --strikes 40
+    python -m benchmarks.syntheticData --output /tmp/synthetic --symbols BTCUSDT ETHUSDT --expiry-days 1 3 7
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.downloader import RESOLUTION_SECONDS, option_symbol
+from utils.greeks import SECONDS_PER_YEAR, black76_price, year_fraction
+from utils.instruments import futures_underlying
+
+# Default opening price and strike spacing per futures symbol; other symbols start at 100 with unit strikes
+SYNTHETIC_UNDERLYINGS = {
+    'BTCUSDT': (100000.0, 1000),
+    'ETHUSDT': (2500.0, 25),
+    'SOLUSDT': (150.0, 2),
+}
+
+FUTURES_COLUMNS = ['close', 'high', 'low', 'open', 'time', 'volume', 'symbol']
+OPTION_COLUMNS = FUTURES_COLUMNS + ['strike_price', 'option_type']
+
+
+def _bars(rng, first_open, n_bars, bar_vol, spread):
+    """(open, high, low, close) arrays of a random walk starting at `first_open`."""
+    close = first_open * np.exp(np.cumsum(rng.normal(0.0, bar_vol, n_bars)))
+    open_ = np.concatenate(([first_open], close[:-1]))
+    wick = np.abs(rng.normal(0.0, spread, (2, n_bars)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    return open_, high, low, close
+
+
+def _write_csv(frame, path, columns):
+    frame.to_csv(path, columns=columns, index=False, lineterminator='\n', date_format='%Y-%m-%d %H:%M:%S')
+
+
+def generate_day(rng, folder, day, first_prices, strikes=20, strike_steps=None, resolution='5m', expiry_days=3,
+                 option_fill=0.1, volatility=0.5):
+    """
+    Writes one day folder: a futures file per symbol of `first_prices` and the options of all
+    underlyings in the shared calls/puts files.
+
+    Args:
+        first_prices (dict): Futures symbol -> opening price of the day.
+        strike_steps (dict, optional): Futures symbol -> strike spacing (default: SYNTHETIC_UNDERLYINGS).
+        expiry_days (int or iterable): Expiry offsets listed, in days after `day`.
+
+    Returns:
+        tuple: ({futures symbol: last price}, number of rows written); the last prices are the
+               next day's first opens.
+    """
+    step = RESOLUTION_SECONDS[resolution]
+    n_bars = 86400 // step
+    times = pd.date_range(day, periods=n_bars, freq=f'{step}s')
+    bar_vol = volatility * np.sqrt(step / SECONDS_PER_YEAR)
+    offsets = [expiry_days] if isinstance(expiry_days, int) else list(expiry_days)
+    date_str = day.strftime('%Y-%m-%d')
+    os.makedirs(folder, exist_ok=True)
+
+    last_prices, n_rows = {}, 0
+    option_frames = {'call': [], 'put': []}
+    for futures_symbol, first_price in first_prices.items():
+        open_, high, low, close = _bars(rng, first_price, n_bars, bar_vol, bar_vol / 2)
+        futures = pd.DataFrame({
+            'close': np.round(close * 2) / 2, 'high': np.round(high * 2) / 2, 'low': np.round(low * 2) / 2,
+            'open': np.round(open_ * 2) / 2, 'time': times, 'volume': rng.integers(50, 1500, n_bars),
+            'symbol': futures_symbol,
+        })
+        _write_csv(futures, os.path.join(folder, f'{futures_symbol}.csv'), FUTURES_COLUMNS)
+        last_prices[futures_symbol] = close[-1]
+        n_rows += n_bars
+
+        # Strikes centred on the opening price; the contracts expire at settlement on each offset
+        strike_step = (strike_steps or {}).get(futures_symbol) or SYNTHETIC_UNDERLYINGS.get(futures_symbol, (0, 1))[1]
+        atm = round(first_price / strike_step) * strike_step
+        grid = atm + strike_step * (np.arange(strikes) - strikes // 2)
+        underlying = futures_underlying(futures_symbol)
+        for offset in offsets:
+            expiry = (day + timedelta(days=offset)).date()
+            # Floored at a minute, so same-day expiries past settlement still price (at about intrinsic)
+            expiry_years = np.maximum([year_fraction(t, expiry) for t in times.to_pydatetime()], 60 / SECONDS_PER_YEAR)
+            for char, option_type in (('C', 'call'), ('P', 'put')):
+                for strike in grid.tolist():
+                    printed = np.flatnonzero(rng.random(n_bars) < option_fill)
+                    if not len(printed):
+                        continue
+                    price = black76_price(close[printed], strike, expiry_years[printed], volatility, option_type == 'call')
+                    price = np.maximum(np.round(price, 1), 0.1)
+                    option_frames[option_type].append(pd.DataFrame({
+                        'close': price, 'high': price, 'low': price, 'open': price, 'time': times[printed],
+                        'volume': rng.integers(1, 100, len(printed)),
+                        'symbol': option_symbol(char, strike, expiry, underlying),
+                        'strike_price': strike, 'option_type': option_type,
+                    }))
+
+    for option_type, file_name in (('call', f'calls_{date_str}.csv'), ('put', f'puts_{date_str}.csv')):
+        if option_frames[option_type]:
+            options = pd.concat(option_frames[option_type], ignore_index=True)
+            _write_csv(options, os.path.join(folder, file_name), OPTION_COLUMNS)
+            n_rows += len(options)
+    return last_prices, n_rows
+
+
+def generate_dataset(output_dir, start_date=datetime(2025, 1, 1), days=7, strikes=20, strike_step=None,
+                     resolution='5m', expiry_days=3, option_fill=0.1, volatility=0.5, first_price=None, seed=0,
+                     symbols=('BTCUSDT',)):
+    """
+    Writes `days` consecutive day folders under `output_dir`. The same arguments always produce
+    the same files.
+
+    Args:
+        output_dir (str): Root of the day folders (used as the simulator's data_path).
+        start_date (datetime.datetime): First day.
+        days (int): Number of day folders.
+        strikes (int): Strikes listed per underlying, expiry and day, for calls and puts each.
+        strike_step (int, optional): Strike spacing of every underlying (default: SYNTHETIC_UNDERLYINGS).
+        resolution (str): Bar size, one of utils.downloader.RESOLUTION_SECONDS ('1m', '5m', ...).
+        expiry_days (int or iterable): Days from the listing day to expiry (3 is what Strategy
+                                       trades by default); several offsets list concurrent expiries.
+        option_fill (float): Probability that an option prints on a given bar.
+        volatility (float): Annualized volatility of the futures walks and of the option prices.
+        first_price (float, optional): Futures price of every underlying at the start
+                                       (default: SYNTHETIC_UNDERLYINGS).
+        seed (int): Random seed.
+        symbols (iterable): Futures symbols of the underlyings, e.g. ('BTCUSDT', 'ETHUSDT').
+
+    Returns:
+        int: Number of rows written.
+    """
+    rng = np.random.default_rng(seed)
+    prices = {symbol: first_price or SYNTHETIC_UNDERLYINGS.get(symbol, (100.0,))[0] for symbol in symbols}
+    steps = {symbol: strike_step for symbol in symbols} if strike_step else None
+    total = 0
+    for i in range(days):
+        day = start_date + timedelta(days=i)
+        prices, n_rows = generate_day(rng, os.path.join(output_dir, day.strftime('%Y%m%d')), day, prices, strikes,
+                                      steps, resolution, expiry_days, option_fill, volatility)
+        total += n_rows
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', required=True, help='Directory to write the day folders to')
+    parser.add_argument('--start', default='2025-01-01', help='First day (YYYY-MM-DD)')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--strikes', type=int, default=20,
+                        help='Strikes per underlying, expiry and day, for calls and puts each')
+    parser.add_argument('--strike-step', type=int, default=None, help='Strike spacing (default: per underlying)')
+    parser.add_argument('--resolution', default='5m', choices=sorted(RESOLUTION_SECONDS))
+    parser.add_argument('--expiry-days', type=int, nargs='+', default=[3])
+    parser.add_argument('--symbols', nargs='+', default=['BTCUSDT'], help='Futures symbols of the underlyings')
+    parser.add_argument('--option-fill', type=float, default=0.1, help='Fraction of option bars that print')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    n_rows = generate_dataset(args.output, datetime.strptime(args.start, '%Y-%m-%d'), args.days, args.strikes,
+                              args.strike_step, args.resolution, args.expiry_days, args.option_fill, seed=args.seed,
+                              symbols=args.symbols)
+    print(f"Wrote {n_rows} rows in {args.days} day folders to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
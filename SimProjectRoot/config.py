@@ -1,15 +1,82 @@
+import os
 from datetime import datetime
 
 # Simulation start and end dates
 simStartDate = datetime(2025, 5, 19)
 simEndDate = datetime(2025, 5, 25)
 
-# Symbols to load
-symbols = [
-    'BTCUSDT',
-    'C-BTC-70000-20240601',
-    'P-BTC-70000-20240601'
-]
+# Futures of the underlyings to simulate, one per underlying asset (e.g. ['BTCUSDT', 'ETHUSDT']).
+# Only these underlyings' futures and options are loaded from the day folders; each gets its own
+# option chain index and P&L sub-book, and Strategy trades a straddle on each
+symbols = ['BTCUSDT']
+
+# Option expiries to trade, in days after the trading day: Strategy runs one straddle per
+# underlying and offset, and perp_futures_btc.py downloads these expiries
+expiry_offsets = [3]
 
 # Path to your data directory
-data_path = 'data/'
\ No newline at end of file
+data_path = 'data/'
+
+# Columnar cache of the parsed day folders (rebuilt automatically when the CSVs change); it lives
+# inside data_path, so every data directory keeps its own cache
+cache_path = os.path.join(data_path, '.cache')
+use_data_cache = True
+
+# Listed option contracts per expiry (cached by perp_futures_btc.py). When enabled, strike
+# selection only considers listed symbols; expiries missing from the cache are not filtered.
+use_symbol_universe = False
+universe_path = os.path.join(cache_path, 'universe')
+
+# Replay the bars aggregated to this size ('15m', '1h', '1d', ...) instead of the stored ones; the
+# aggregated days are cached next to the base cache. None replays the data as downloaded. Coarse
+# bars make exploratory sweeps much faster, at the cost of intrabar detail
+replay_resolution = None
+
+# Strike selection only considers option contracts that have printed by the entry bar. Off, it
+# searches the whole day's chain, which includes contracts that first print later that day
+# (same-day look-ahead); the sample data's options mostly print after 13:00
+point_in_time_chain = False
+
+# Replay one day folder at a time instead of loading the whole range into memory
+streaming_mode = False
+
+# Equity curve sampling: 'bar' (every event), 'fill', 'day', minutes (int) or an offset like '15min'; None disables it
+equity_resolution = '5min'
+equity_output = 'equity.npz'   # .npz (columnar) or .csv
+
+# Order execution: 'instant' fills at the order price (the original behaviour), 'next_open' at
+# the open of the instrument's next bar, 'ohlc' also fills limit orders the next bar's range reaches
+execution_mode = 'instant'
+slippage_bps = 1.0          # Fixed slippage per market fill, in basis points (1 bp = the old 0.0001 epsilon)
+market_impact = 0.0         # Extra slippage per unit of bar participation (fill quantity / bar volume)
+max_participation = None    # Max fraction of a bar's volume that fills per instrument (None: unlimited)
+fee_schedule = None         # None, or a name from utils.execution.FEE_SCHEDULES such as 'delta'
+
+# A price older than this is stale: minutes (int) or an offset like '2h'; None never marks prices stale.
+# 'last' still returns stale prices from currentPrice (check currentPrice.isStale), 'missing' treats them
+# as not printed, so e.g. Strategy falls back to its default price
+price_max_age = None
+stale_price_policy = 'last'
+
+# Checkpoints: every checkpoint_every replayed events (None: never) the full simulation state is
+# saved to checkpoint_path (a compressed binary snapshot, replaced each time). With
+# resume_from_checkpoint, Simulator.py continues from that snapshot if it exists instead of
+# starting over. In-memory replay only (not streaming_mode)
+checkpoint_every = None
+checkpoint_path = 'checkpoint.snap'
+resume_from_checkpoint = False
+
+# Messages below this level are skipped ('DEBUG', 'INFO', 'WARNING'); 'WARNING' silences the
+# per-trade and per-day messages
+log_level = 'INFO'
+
+# Run instrumentation: phase timers, counters, per-callback timings and memory high-water marks,
+# printed at the end and exported as JSON. Near-zero cost when off; instrumentation_memory adds
+# per-phase tracemalloc peaks (slow)
+instrumentation = False
+instrumentation_memory = False
+instrumentation_output = 'run_stats.json'
+
+# Profile the whole run: None, 'cprofile' (pstats file) or 'sampling' (collapsed stacks for flame graphs)
+profiler = None
+profile_output = 'profile.out'
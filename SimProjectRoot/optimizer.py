@@ -0,0 +1,254 @@
+# optimizer.py
+#
+# Parameter sweep over the Strategy thresholds (see Strategy.DEFAULT_PARAMS).
+# Every parameter set runs in its own Simulator on a process pool. Market data is loaded once
+# per worker from the memory-mapped day cache (utils/dataCache.py); only the parameter dicts
+# are sent to the workers. With --batch-size, each task evaluates a whole chunk of parameter sets
+# in one BatchSimulator pass over the data instead of one Simulator run per set. With --kernel,
+# every set runs through the compiled straddle kernel (KernelStrategy.py) instead of Strategy.
+#
+# Run from SimProjectRoot:
+#     python optimizer.py --search grid --workers 4
+#     python optimizer.py --search random --samples 50 --seed 7
+#     python optimizer.py --search random --samples 800 --batch-size 200
+#     python optimizer.py --search random --samples 800 --resolution 1h   # coarse first pass
+#     python optimizer.py --search random --samples 100000 --kernel
+
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import config
+from BatchSimulator import BatchSimulator
+from KernelStrategy import StraddleKernel
+from Simulator import Simulator
+from stats.riskStats import compute_risk_stats
+
+# Default search space: lists are enumerated by the grid search / sampled by the random search,
+# (low, high) tuples are sampled uniformly by the random search.
+DEFAULT_GRID = {
+    'entry_hour': [11, 13, 15],
+    'exit_deviation': [0.005, 0.01, 0.02],
+    'pnl_stop': [250, 500, 1000],
+    'strike_deviation': [0.01, 0.02, 0.03],
+}
+
+DEFAULT_RANDOM_SPACE = {
+    'entry_hour': list(range(9, 21)),
+    'entry_minute': [0, 30],
+    'exit_deviation': (0.002, 0.03),
+    'pnl_stop': (100, 2000),
+    'strike_deviation': (0.005, 0.05),
+}
+
+# Per-worker market data, filled once by init_worker
+_worker_data = {}
+
+
+def grid_search_space(grid):
+    """Yields every combination of a {param: [values]} grid as a parameter dict."""
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def random_search_space(space, n_samples, seed=None):
+    """
+    Samples parameter dicts from a search space.
+
+    Args:
+        space (dict): param -> list of choices, or (low, high) tuple sampled uniformly
+                      (as int if both bounds are ints).
+        n_samples (int): Number of parameter sets to draw.
+        seed (int, optional): Seed for reproducible samples.
+    """
+    rng = random.Random(seed)
+    for _ in range(n_samples):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                params[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(values)
+        yield params
+
+
+def load_market_data(start_date=None, end_date=None, resolution=None):
+    """
+    Loads a date range through the day cache (memory-mapped once it is warm).
+
+    start_date/end_date default to config.simStartDate/simEndDate, resolution (bars aggregated
+    to e.g. '1h') to config.replay_resolution.
+    """
+    sim = Simulator()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.readData(start_date, end_date, resolution)
+    return sim.df, sim.chainIndex
+
+
+def init_worker(start_date=None, end_date=None, resolution=None):
+    """Process pool initializer: loads the market data once per worker (see worker_market_data)."""
+    _worker_data['df'], _worker_data['chain_index'] = load_market_data(start_date, end_date, resolution)
+
+
+def worker_market_data():
+    """The (df, chain_index) loaded by init_worker in this process."""
+    return _worker_data['df'], _worker_data['chain_index']
+
+
+def run_backtest(params, df=None, chain_index=None):
+    """
+    Runs one Simulator with the given Strategy parameters and returns its summary stats.
+
+    Args:
+        params (dict): Overrides for Strategy.DEFAULT_PARAMS.
+        df (pd.DataFrame, optional): Market data; defaults to the worker's shared copy.
+        chain_index (OptionChainIndex, optional): Chain index built from `df`.
+
+    Returns:
+        dict: The parameters plus final_pnl, n_trades, sharpe, sortino, max_drawdown, var_95 and es_95.
+    """
+    sim = Simulator(strategy_params=params)
+    sim.df = _worker_data['df'] if df is None else df
+    sim.chainIndex = _worker_data['chain_index'] if chain_index is None else chain_index
+
+    # Strategy and printPnl print on every trade and day; keep the workers quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.startSimulation()
+
+    return _summarize(params, compute_risk_stats(sim.pnl_history), len(sim.strategy.trades))
+
+
+def run_kernel_backtest(params, df=None, chain_index=None):
+    """
+    Like run_backtest, through the compiled straddle kernel (see KernelStrategy.py). The
+    worker's kernel inputs are built on its first call and reused.
+    """
+    kernel = _worker_data.get('kernel') if df is None else None
+    if kernel is None:
+        sim = Simulator()
+        sim.df = _worker_data['df'] if df is None else df
+        sim.chainIndex = _worker_data['chain_index'] if chain_index is None else chain_index
+        kernel = StraddleKernel(sim)
+        if df is None:
+            _worker_data['kernel'] = kernel
+
+    result = kernel.run(params)
+    return _summarize(params, compute_risk_stats(result['pnl_history']), result['n_trades'])
+
+
+def run_batch_backtest(param_sets, df=None, chain_index=None, point_in_time_chain=None):
+    """
+    Runs a chunk of parameter sets in a single BatchSimulator pass over the data.
+
+    point_in_time_chain overrides config.point_in_time_chain (None: keep it).
+
+    Returns:
+        list: One result dict per parameter set, as returned by run_backtest.
+    """
+    sim = BatchSimulator(param_sets)
+    sim.df = _worker_data['df'] if df is None else df
+    sim.chainIndex = _worker_data['chain_index'] if chain_index is None else chain_index
+    if point_in_time_chain is not None:
+        sim.pointInTimeChain = point_in_time_chain
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.startSimulation()
+
+    # Stats for the whole chunk in one vectorized call over the (n_strategies, n_days) equity matrix
+    stats = compute_risk_stats(np.column_stack(sim.pnl_history))
+    return [
+        _summarize(params, {name: values[i] if np.ndim(values) else values for name, values in stats.items()}, len(strategy.trades))
+        for i, (params, strategy) in enumerate(zip(sim.param_sets, sim.strategies))
+    ]
+
+
+def _summarize(params, stats, n_trades):
+    return {
+        **params,
+        'final_pnl': float(stats['final_pnl']),
+        'n_trades': n_trades,
+        'sharpe': float(stats['sharpe']),
+        'sortino': float(stats['sortino']),
+        'max_drawdown': float(stats['max_drawdown']),
+        'var_95': float(stats['var']),
+        'es_95': float(stats['es']),
+    }
+
+
+def optimize(param_sets, workers=None, rank_by='sharpe', batch_size=None, resolution=None, kernel=False):
+    """
+    Evaluates every parameter set on a process pool.
+
+    Args:
+        param_sets (iterable): Parameter dicts, e.g. from grid_search_space or random_search_space.
+        workers (int, optional): Pool size; defaults to os.cpu_count().
+        rank_by (str): Result column to sort by, descending.
+        batch_size (int, optional): If given, each task runs this many parameter sets in one
+                                    BatchSimulator pass instead of one Simulator per set.
+        resolution (str, optional): Replay bars aggregated to this size (e.g. '1h') instead of
+                                    config.replay_resolution.
+        kernel (bool): Evaluate through the compiled straddle kernel (run_kernel_backtest);
+                       batch_size is then ignored.
+
+    Returns:
+        pd.DataFrame: One row per parameter set, best first.
+    """
+    param_sets = list(param_sets)
+    if not config.use_data_cache:
+        print("Warning: use_data_cache is off, every worker will parse the CSVs itself")
+    else:
+        load_market_data(resolution=resolution)  # Warm the day cache once so workers only memory-map it
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(None, None, resolution)) as pool:
+        if kernel:
+            results = list(pool.map(run_kernel_backtest, param_sets, chunksize=max(1, len(param_sets) // (4 * workers))))
+        elif batch_size:
+            chunks = [param_sets[i:i + batch_size] for i in range(0, len(param_sets), batch_size)]
+            results = [result for chunk in pool.map(run_batch_backtest, chunks) for result in chunk]
+        else:
+            results = list(pool.map(run_backtest, param_sets, chunksize=max(1, len(param_sets) // (4 * workers))))
+
+    table = pd.DataFrame(results)
+    return table.sort_values(rank_by, ascending=False, na_position='last').reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel parameter sweep for the straddle Strategy.')
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=50, help='Parameter sets drawn by the random search')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rank-by', default='sharpe')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Evaluate this many parameter sets per data pass (BatchSimulator)')
+    parser.add_argument('--resolution', default=None,
+                        help="Replay bars aggregated to this size, e.g. '1h' (default: config.replay_resolution)")
+    parser.add_argument('--kernel', action='store_true',
+                        help='Evaluate with the compiled straddle kernel (KernelStrategy.py) instead of Strategy')
+    parser.add_argument('--output', default='optimizer_results.csv')
+    args = parser.parse_args()
+
+    if args.search == 'grid':
+        param_sets = grid_search_space(DEFAULT_GRID)
+    else:
+        param_sets = random_search_space(DEFAULT_RANDOM_SPACE, args.samples, args.seed)
+
+    table = optimize(param_sets, workers=args.workers, rank_by=args.rank_by, batch_size=args.batch_size,
+                     resolution=args.resolution, kernel=args.kernel)
+    print(table.head(20).to_string())
+    table.to_csv(args.output, index=False)
+    print(f"Results for {len(table)} parameter sets exported to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
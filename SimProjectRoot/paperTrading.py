@@ -0,0 +1,253 @@
+# paperTrading.py
+#
+# Runs the backtested Strategy forward on a streaming candle feed. PaperTrader is a Simulator
+# driven by an async feed (utils/liveFeed.py) instead of the day folders: the Strategy sees the
+# same onMarketData/onTradeConfirmation callbacks and places orders through the same onOrder,
+# which goes to a pluggable execution adapter (by default the simulator's own ExecutionEngine,
+# i.e. paper fills). Latencies (time queued behind the strategy, candle to callback return, candle
+# to order) are recorded in histograms.
+#
+# Run from SimProjectRoot:
+#     python paperTrading.py --replay                    # serve the configured days locally and trade them
+#     python paperTrading.py --replay --speed 600        # at 600x real time
+#     python paperTrading.py --replay --synthetic-days 5 # generated days whose options print all day
+#     python -m utils.liveFeed --port 8766 &             # standalone replay feed
+#     python paperTrading.py --port 8766
+
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import config
+from Simulator import Simulator
+from benchmarks.syntheticData import generate_dataset
+from utils.dayStream import iter_day_frames
+from utils.execution import MARKET, ExecutionEngine, SlippageModel
+from utils.instruments import KIND_NAMES
+from utils.latency import LatencyHistogram
+from utils.liveFeed import BLOCK, OVERFLOW_POLICIES, CandleFeed, ReplayFeedServer
+from utils.marketEvent import MarketEvent
+from utils.optionChain import OptionChainIndex
+
+SYNTHETIC_START = datetime(2025, 1, 1)
+
+
+class PaperTrader(Simulator):
+    """
+    A Simulator fed by a live candle stream.
+
+    There is no DataFrame of the whole backtest: `chainIndex` holds only the option bars
+    received so far today (what Strategy's strike selection reads), so the strategy only ever
+    sees contracts that have already printed. Every option bar is appended to its chain side
+    as it arrives (OptionChainIndex.append), so nothing is rebuilt in the strategy's decision
+    path. `df` is the same bars as a DataFrame, built only when read (once per version of the
+    bars); Strategy does not read it while there is a chain index.
+
+    Args:
+        strategy_params (dict, optional): Strategy parameter overrides.
+        execution (callable, optional): Factory `execution(trader)` returning the execution
+            adapter. An adapter provides submit(symbol, side, quantity, price, order_type, time)
+            and cancelExpired(date), a `pending` dict of instrument id -> working orders and
+            onBar(instrument_id, time, open, high, low, volume) to match them, and reports every
+            fill through trader._onFill(order, quantity, price, fee). A live exchange adapter can
+            keep `pending` empty and report fills as they arrive. Defaults to the simulator's
+            ExecutionEngine (paper fills, config.execution_mode).
+    """
+
+    def __init__(self, strategy_params=None, execution=None, instruments=None):
+        self._rows = ([], [], [])  # Times, instrument ids and prices of today's option bars
+        self._rowsVersion = 0      # Bumped whenever _rows changes
+        self._liveDf = None
+        self._liveDfVersion = -1
+        self._liveChain = None
+        super().__init__(strategy_params, instruments)
+        self._liveChain = OptionChainIndex(instruments=self.instruments)
+        if execution is not None:
+            self.execution = execution(self)
+        self.queueLatency = LatencyHistogram('queue')      # Socket -> dequeued (grows when the strategy falls behind)
+        self.handlerLatency = LatencyHistogram('handler')  # Dequeued -> strategy callback returned
+        self.orderLatency = LatencyHistogram('order')      # Dequeued -> order submitted
+        self._received = None
+        self._lastDate = None
+
+    @property
+    def df(self):
+        if self._liveDfVersion != self._rowsVersion:
+            self._liveDf = self._rowsFrame()
+            self._liveDfVersion = self._rowsVersion
+        return self._liveDf
+
+    @df.setter
+    def df(self, value):
+        self._liveDf = value
+
+    @property
+    def chainIndex(self):
+        return self._liveChain
+
+    @chainIndex.setter
+    def chainIndex(self, value):
+        self._liveChain = value
+
+    def _rowsFrame(self):
+        instruments = self.instruments
+        times, ids, prices = self._rows
+        ids = np.asarray(ids, dtype=np.int64)
+        return pd.DataFrame({
+            'time': np.asarray(times, dtype=np.int64).view('datetime64[ns]'),
+            'symbol': pd.Categorical.from_codes(ids, categories=instruments.symbols),
+            'price': np.asarray(prices, dtype=np.float64),
+            'strike_price': instruments.strike[ids],
+            'option_type': pd.Categorical.from_codes(instruments.kind[ids], categories=KIND_NAMES),
+        })
+
+    def onOrder(self, symbol, side, quantity, price, order_type=MARKET):
+        order = super().onOrder(symbol, side, quantity, price, order_type)
+        if self._received is not None:
+            self.orderLatency.record(time.perf_counter() - self._received)
+        return order
+
+    def onCandle(self, candle, received=None):
+        """
+        Handles one parsed candle (see utils.liveFeed.parse_candle); the live counterpart of the
+        replay loop body. `received` (time.perf_counter()) starts the handler/order latencies.
+        """
+        bar_time, symbol, open_, high, low, price, volume = candle
+        self._received = received
+        instrument_id = self.instruments.intern(symbol)
+        if instrument_id >= len(self.currentPrice.values):
+            self.currentPrice.reserve(len(self.instruments))
+
+        date = bar_time.date()
+        if self._lastDate is not None and date != self._lastDate:
+            self.printPnl(timestamp=self._lastDate) # Record P&L at end of day
+            self.ledger.evictExpired(date)
+            self.execution.cancelExpired(date)
+            self._rows = ([], [], [])  # Strike selection only looks at the current day
+            self._rowsVersion += 1
+            self._liveChain = OptionChainIndex(instruments=self.instruments)
+        self._lastDate = date
+
+        self.currentTime = bar_time
+        self.currentPrice.values[instrument_id] = price
+        self.currentPrice.times[instrument_id] = bar_time
+        kind = self.instruments.kind[instrument_id]
+        if kind:
+            time_ns = int(np.datetime64(bar_time, 'ns').astype(np.int64))
+            times, ids, prices = self._rows
+            times.append(time_ns)
+            ids.append(instrument_id)
+            prices.append(price)
+            self._rowsVersion += 1
+            self._liveChain.append(instrument_id, time_ns, price)
+        if instrument_id in self.ledger.positions:
+            self.ledger.mark(instrument_id, price)
+        if instrument_id in self.execution.pending:
+            self.execution.onBar(instrument_id, bar_time, open_, high, low, volume)
+
+        self.strategy.onMarketData(MarketEvent(bar_time, symbol, price, float(self.instruments.strike[instrument_id]),
+                                               KIND_NAMES[kind], instrument_id, open_, high, low, volume))
+        if self.equityRecorder is not None and self.equityRecorder.mode in ('bar', 'interval'):
+            self.equityRecorder.onEvent(bar_time, self.ledger.totalPnl())
+        if received is not None:
+            self.handlerLatency.record(time.perf_counter() - received)
+
+    async def run(self, feed):
+        """Trades every candle of `feed` (an async iterator of (received, candle), e.g. CandleFeed) until it ends."""
+        async for received, candle in feed:
+            dequeued = time.perf_counter()
+            self.queueLatency.record(dequeued - received)
+            self.onCandle(candle, dequeued)
+        if self.equityRecorder is not None:
+            self.equityRecorder.flush()
+        if self._lastDate is not None:
+            self.printPnl(timestamp=self._lastDate)
+
+    def latencyReport(self):
+        return '\n'.join(h.format() for h in (self.queueLatency, self.handlerLatency, self.orderLatency))
+
+
+def synthetic_replay_frame(days, seed=0):
+    """
+    `days` generated days (benchmarks/syntheticData.py) of the configured underlyings and expiries,
+    as one time-sorted frame for ReplayFeedServer. Their options print throughout the day, so
+    unlike the sample data's (mostly after 13:00) the strategy finds strikes at its entry time
+    and trades, which exercises the order path and its latency histogram.
+    """
+    with tempfile.TemporaryDirectory(prefix='paper_synthetic_') as data_dir:
+        generate_dataset(data_dir, SYNTHETIC_START, days, strikes=20, expiry_days=config.expiry_offsets,
+                         option_fill=0.5, seed=seed, symbols=tuple(config.symbols))
+        frames = list(iter_day_frames(SYNTHETIC_START, SYNTHETIC_START + timedelta(days=days - 1), data_dir))
+    return pd.concat(frames, ignore_index=True).sort_values('time', kind='stable', ignore_index=True)
+
+
+async def paper_trade(host=None, port=None, replay=False, speed=None, queue_size=1024, overflow=BLOCK,
+                      strategy_params=None, execution=None, synthetic_days=None):
+    """
+    Runs a PaperTrader on a feed until it ends.
+
+    With `replay`, the configured date range (or `synthetic_days` generated days, see
+    synthetic_replay_frame) is served by a local ReplayFeedServer at `speed`; otherwise the
+    feed at host:port is used.
+
+    Returns:
+        tuple: (PaperTrader, CandleFeed)
+    """
+    trader = PaperTrader(strategy_params, execution)
+    server = None
+    if replay:
+        if synthetic_days:
+            replay_df = synthetic_replay_frame(synthetic_days)
+        else:
+            loader = Simulator()
+            with contextlib.redirect_stdout(io.StringIO()):
+                loader.readData()
+            replay_df = loader.df
+        server = await ReplayFeedServer(replay_df, speed=speed).start()
+        host, port = server.host, server.port
+    feed = CandleFeed(host, port, maxsize=queue_size, overflow=overflow)
+    try:
+        await trader.run(feed)
+    finally:
+        if server is not None:
+            await server.stop()
+    return trader, feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Paper-trade the Strategy on a streaming candle feed.')
+    parser.add_argument('--replay', action='store_true', help='Serve the configured date range locally and trade it')
+    parser.add_argument('--speed', type=float, default=None, help='Replay speed (default: as fast as possible)')
+    parser.add_argument('--synthetic-days', type=int, default=None,
+                        help='With --replay, serve this many generated days instead of the configured range')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--queue-size', type=int, default=1024)
+    parser.add_argument('--overflow', choices=OVERFLOW_POLICIES, default=BLOCK)
+    parser.add_argument('--execution-mode', default=None, help="Paper fill mode (default: config.execution_mode)")
+    args = parser.parse_args()
+
+    execution = None
+    if args.execution_mode:
+        execution = lambda trader: ExecutionEngine(  # noqa: E731
+            trader.instruments, trader.currentPrice, trader._onFill, mode=args.execution_mode,
+            fees=config.fee_schedule, slippage=SlippageModel(config.slippage_bps, config.market_impact),
+            max_participation=config.max_participation)
+
+    trader, feed = asyncio.run(paper_trade(args.host, args.port, args.replay, args.speed, args.queue_size,
+                                           args.overflow, execution=execution, synthetic_days=args.synthetic_days))
+    stats = feed.stats()
+    print(f"\nFeed: {stats['received']} candles, {stats['dropped']} dropped, "
+          f"queue high-water {stats['queue_high_water']}/{stats['queue_size']}")
+    print(trader.latencyReport())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,120 +1,66 @@
-import requests
-import pandas as pd
-from datetime import datetime, timedelta, timezone
+# perp_futures_btc.py
+#
+# Downloads perpetual futures and option candles into data/YYYYMMDD/: BTCUSDT and BTC options by
+# default, or every underlying of --symbols (their options share the day's calls/puts files).
+# Requests run concurrently through utils.downloader (pooled session, rate limit, retries).
+# Syncing is incremental: each day folder keeps a manifest of what is on disk, and a re-run
+# only requests missing candles (an interrupted run resumes, today's file is topped up).
+# Option contracts come from the products endpoint (utils.symbolUniverse, cached per expiry),
+# so only listed strikes within STRIKES are requested; --brute-force probes the whole grid.
+#
+#   python perp_futures_btc.py                                   # May 19 - 25 from Delta Exchange
+#   python perp_futures_btc.py --symbols BTCUSDT ETHUSDT --expiry-days 1 3 7
+#   python -m utils.stubServer --port 8765 &                     # local stand-in for the API
+#   python perp_futures_btc.py --base-url http://127.0.0.1:8765 --data-dir /tmp/data
+
+import argparse
 import os
+from datetime import datetime, timezone
 
-headers = {
-    'Accept': 'application/json'
-}
-
-url = "https://api.delta.exchange/v2/history/candles"
+import config
+from utils.downloader import DEFAULT_BASE_URL, CandleClient, load_symbol_list, sync_range
+from utils.instruments import futures_underlying
+from utils.symbolUniverse import SymbolUniverse
 
 # Define the perpetual futures symbol
 PERPETUAL_FUTURES_SYMBOL = "BTCUSDT"
+STRIKES = range(90000, 117000, 200)
+# Strike range per underlying (the grid probed with --brute-force); listed strikes outside it are skipped
+STRIKE_GRIDS = {
+    'BTC': STRIKES,
+    'ETH': range(1500, 4000, 20),
+}
 
-# Loop through each date from May 19 to May 25
-for i in range(1, 8):
-    start_time = datetime(2025, 5, 18 + i, 9, 0, tzinfo=timezone.utc)
-    end_time = start_time + timedelta(days=1)
-    start_unix = int(start_time.timestamp())
-    end_unix = int(end_time.timestamp())
-    
-    date_str = start_time.strftime("%Y-%m-%d")
-    
-    # Create the directory for the current date if it doesn't exist
-    daily_data_dir = os.path.join("data", start_time.strftime('%Y%m%d'))
-    os.makedirs(daily_data_dir, exist_ok=True)
-
-    print(f"\n--- Fetching data for {date_str} ---")
-
-    # --- Fetch Perpetual Futures Data ---
-    futures_df = pd.DataFrame()
-    
-    print(f"Trying to fetch data for perpetual futures: {PERPETUAL_FUTURES_SYMBOL}")
-
-    params = {
-        "resolution": "5m", # Adjust resolution as needed (e.g., "1m", "1h")
-        "symbol": PERPETUAL_FUTURES_SYMBOL,
-        "start": start_unix,
-        "end": end_unix
-    }
-
-    response = requests.get(url, params=params)
-
-    if response.status_code == 200:
-        result = response.json().get("result", [])
-        if result:
-            df = pd.DataFrame(result)
-            df["time"] = pd.to_datetime(df["time"], unit="s")
-            df = df.sort_values("time")
-            df["symbol"] = PERPETUAL_FUTURES_SYMBOL # Explicitly set symbol
-            
-            # Save the futures data to a CSV in the daily folder
-            futures_file_path = os.path.join(daily_data_dir, f"{PERPETUAL_FUTURES_SYMBOL}.csv")
-            df.to_csv(futures_file_path, index=False)
-            print(f"Saved perpetual futures data to {futures_file_path}")
-        else:
-            print(f"No candlestick data returned for {PERPETUAL_FUTURES_SYMBOL}.")
-    else:
-        print(f"API request failed for {PERPETUAL_FUTURES_SYMBOL} with status code {response.status_code}: {response.text}")
-
-    # --- Your existing logic to fetch and save Call/Put Options Data ---
-    # It's good practice to integrate this into the same daily loop if possible
-    # to ensure all data for a specific day is in its correct folder.
-    # I'm slightly modifying your existing options saving part to use the daily_data_dir.
-
-    calls_df = pd.DataFrame()
-    puts_df = pd.DataFrame()
-
-    # Assuming expiry_date_obj is calculated correctly for options for each day
-    # For the assignment, it might be simpler to use a fixed expiry or calculate it dynamically
-    # based on the options available for that specific date in the data.
-    # For now, I'll keep your original expiry_date calculation for consistency with your previous code.
-    expiry_date_obj = start_time + timedelta(days=3) # Your original calculation
-    expiry_date = expiry_date_obj.strftime("%d%m%y") # Your original calculation
-
-    for strike_price in range(90000, 117000, 200):
-        for option_type_char in ['C', 'P']: # Renamed to avoid conflict with 'option_type' column name
-            symbol = f"{option_type_char}-BTC-{strike_price}-{expiry_date}"
-            # print(f"Trying to fetch data for: {symbol}") # Keep this for debugging if needed
-
-            params = {
-                "resolution": "5m",
-                "symbol": symbol,
-                "start": start_unix,
-                "end": end_unix
-            }
-
-            response = requests.get(url, params=params)
-
-            if response.status_code == 200:
-                result = response.json().get("result", [])
-                if result:
-                    df = pd.DataFrame(result)
-                    df["time"] = pd.to_datetime(df["time"], unit="s")
-                    df = df.sort_values("time")
-                    df["symbol"] = symbol
-                    df["strike_price"] = strike_price
-                    df["option_type"] = "call" if option_type_char == 'C' else "put"
-
-                    if option_type_char == 'C':
-                        calls_df = pd.concat([calls_df, df], ignore_index=True)
-                    else:
-                        puts_df = pd.concat([puts_df, df], ignore_index=True)
-                # else:
-                #     print(f"No candlestick data returned for {symbol}.") # Uncomment for more verbose output
-            # else:
-            #     print(f"API request failed for {symbol} with status code {response.status_code}: {response.text}") # Uncomment for more verbose output
-
-    # Save daily options files into the respective daily subfolder
-    if not calls_df.empty:
-        calls_file_path = os.path.join(daily_data_dir, f"calls_{date_str}.csv")
-        calls_df.to_csv(calls_file_path, index=False)
-        print(f"Saved call options data to {calls_file_path}")
-
-    if not puts_df.empty:
-        puts_file_path = os.path.join(daily_data_dir, f"puts_{date_str}.csv")
-        puts_df.to_csv(puts_file_path, index=False)
-        print(f"Saved put options data to {puts_file_path}")
-
-print("\nData fetching complete!")
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Download futures and option candles.")
+    parser.add_argument('--start', default='2025-05-19', help="First day, YYYY-MM-DD (each day starts at 09:00 UTC)")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('--resolution', default='5m', help="Candle resolution (e.g. '1m', '5m', '1h')")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent requests")
+    parser.add_argument('--rate-limit', type=float, default=10.0, help="Max requests per second")
+    parser.add_argument('--symbols-file', default=None, help="CSV with a 'symbol' column of listed option contracts")
+    parser.add_argument('--brute-force', action='store_true', help="Probe every strike instead of the listed contracts")
+    parser.add_argument('--full', action='store_true', help="Delete and re-download every day instead of syncing")
+    parser.add_argument('--symbols', nargs='+', default=config.symbols,
+                        help="Futures symbols of the underlyings to download (default: config.symbols)")
+    parser.add_argument('--expiry-days', nargs='+', type=int, default=config.expiry_offsets,
+                        help="Option expiries, in days after each day (default: config.expiry_offsets)")
+    args = parser.parse_args()
+
+    client = CandleClient(base_url=args.base_url, max_workers=args.workers, rate_limit=args.rate_limit)
+    first_start_time = datetime.strptime(args.start, '%Y-%m-%d').replace(hour=9, tzinfo=timezone.utc)
+    listed = load_symbol_list(args.symbols_file) if args.symbols_file else None
+    n_requests = 0
+    for futures_symbol in args.symbols:
+        underlying = futures_underlying(futures_symbol)
+        universe = None if args.brute_force else SymbolUniverse(os.path.join(args.data_dir, '.cache', 'universe'), client,
+                                                                underlying=underlying)
+        # --full only clears a folder once, before the first underlying writes to it
+        full = args.full and futures_symbol == args.symbols[0]
+        n_requests += sync_range(client, first_start_time, args.days, args.data_dir, futures_symbol,
+                                 STRIKE_GRIDS.get(underlying, ()), expiry_days=args.expiry_days,
+                                 resolution=args.resolution, listed=listed, universe=universe, full=full)
+
+    print(f"\nData fetching complete! ({n_requests} API requests)")
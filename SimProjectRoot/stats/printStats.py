@@ -1,29 +1,45 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
-def printStats(pnl_history):
-    df = pd.DataFrame({'PnL': pnl_history})
-    df['Returns'] = df['PnL'].pct_change().fillna(0)
-    sharpe = df['Returns'].mean() / df['Returns'].std() * np.sqrt(252)
+from stats.riskStats import compute_risk_stats, drawdown, plot_equity
 
-    cum_pnl = df['PnL'].cumsum()
-    drawdown = cum_pnl - cum_pnl.cummax()
-    max_drawdown = drawdown.min()
+def computeStats(pnl_history, times=None, periods_per_year=None, interval=None):
+    # pnl_history is the cumulative P&L (equity) curve; statistics use its per-period changes.
+    # Without times/interval the samples are taken to be daily.
+    equity = np.asarray(pnl_history, dtype=np.float64)
+    stats = compute_risk_stats(equity, times=times, periods_per_year=periods_per_year, interval=interval)
 
-    var_95 = df['Returns'].quantile(0.05)
-    es_95 = df['Returns'][df['Returns'] <= var_95].mean()
+    return {
+        'mean_pnl': equity.mean(),
+        'median_pnl': np.median(equity),
+        'sharpe': stats['sharpe'],
+        'sortino': stats['sortino'],
+        'max_drawdown': stats['max_drawdown'],
+        'max_drawdown_duration': stats['max_drawdown_duration'],
+        'var_95': stats['var'],
+        'es_95': stats['es'],
+        'parametric_var_95': stats['parametric_var'],
+        'parametric_es_95': stats['parametric_es'],
+        'periods_per_year': stats['periods_per_year'],
+        'cum_pnl': equity,
+        'drawdown': drawdown(equity),
+    }
 
-    print("Mean PnL:", df['PnL'].mean())
-    print("Median PnL:", df['PnL'].median())
-    print("Sharpe Ratio:", sharpe)
-    print("Max Drawdown:", max_drawdown)
-    print("VaR (95%):", var_95)
-    print("ES (95%):", es_95)
+def printStats(pnl_history, plot=True, times=None, periods_per_year=None, interval=None):
+    stats = computeStats(pnl_history, times=times, periods_per_year=periods_per_year, interval=interval)
 
-    cum_pnl.plot(title='Cumulative PnL')
-    plt.savefig('cumulative_pnl.png')
-    plt.clf()
+    print("Mean PnL:", stats['mean_pnl'])
+    print("Median PnL:", stats['median_pnl'])
+    print("Sharpe Ratio:", stats['sharpe'])
+    print("Sortino Ratio:", stats['sortino'])
+    print("Max Drawdown:", stats['max_drawdown'])
+    print("Max Drawdown Duration (periods):", stats['max_drawdown_duration'])
+    print("VaR (95%):", stats['var_95'])
+    print("ES (95%):", stats['es_95'])
+    print("Parametric VaR (95%):", stats['parametric_var_95'])
+    print("Parametric ES (95%):", stats['parametric_es_95'])
 
-    drawdown.plot(title='Drawdown')
-    plt.savefig('drawdown.png')
+    # Plotting is optional and imports matplotlib lazily, so sweeps never pay for it
+    if plot:
+        plot_equity(stats['cum_pnl'], times=times)
+
+    return stats
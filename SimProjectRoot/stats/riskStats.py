@@ -0,0 +1,188 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Crypto trades around the clock, so a year is 365 full days
+NS_PER_YEAR = 365 * 24 * 3600 * 10**9
+
+
+def annualization_factor(times=None, interval=None):
+    """
+    Number of sampling periods in a year, used to annualize Sharpe/Sortino.
+
+    Args:
+        times (np.ndarray, optional): Sample timestamps (datetime64 or int64 ns). The period is
+                                      the median positive spacing between samples.
+        interval (str or pd.Timedelta or np.timedelta64, optional): Explicit sampling interval,
+                                      e.g. '5min' or '1D'. Takes precedence over `times`.
+
+    Returns:
+        float: Periods per year (365 for daily samples).
+    """
+    if interval is not None:
+        period_ns = pd.Timedelta(interval).value
+    elif times is not None:
+        steps = np.diff(np.asarray(times).view(np.int64))
+        steps = steps[steps > 0]
+        if steps.size == 0:
+            return np.nan
+        period_ns = float(np.median(steps))
+    else:
+        raise ValueError("annualization_factor needs either times or interval")
+    return NS_PER_YEAR / period_ns
+
+
+def with_initial_equity(equity, initial_equity=0.0):
+    """
+    The equity curve with `initial_equity` prepended along the last axis: the level before the
+    first sample. The curves the simulator records hold the P&L at the end of each period, so
+    without it the first period's P&L would be lost to the differences and the running peak.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    start = np.full(equity.shape[:-1] + (1,), initial_equity, dtype=np.float64)
+    return np.concatenate([start, equity], axis=-1)
+
+
+def pnl_changes(equity, initial_equity=0.0):
+    """
+    Per-period P&L from an equity (cumulative P&L) curve, along the last axis; the first one
+    is measured from `initial_equity`, so there are as many changes as samples.
+
+    Works on P&L differences rather than pct_change of levels: cumulative P&L starts at 0
+    and crosses zero, which makes percentage returns meaningless.
+    """
+    return np.diff(with_initial_equity(equity, initial_equity), axis=-1)
+
+
+def sharpe_ratio(changes, periods_per_year):
+    """Annualized Sharpe ratio of per-period P&L (or returns), along the last axis."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return changes.mean(axis=-1) / changes.std(axis=-1, ddof=1) * np.sqrt(periods_per_year)
+
+
+def sortino_ratio(changes, periods_per_year):
+    """Annualized Sortino ratio: mean over downside deviation (target 0), along the last axis."""
+    downside = np.sqrt(np.mean(np.minimum(changes, 0.0) ** 2, axis=-1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return changes.mean(axis=-1) / downside * np.sqrt(periods_per_year)
+
+
+def drawdown(equity, initial_equity=0.0):
+    """
+    Drawdown from the running peak of an equity curve (<= 0), along the last axis. The peak
+    starts at `initial_equity`, so a curve that loses from its first period is under water.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity - np.maximum(np.maximum.accumulate(equity, axis=-1), initial_equity)
+
+
+def max_drawdown(equity, initial_equity=0.0):
+    """
+    Deepest drawdown and longest time under water, along the last axis, with the curve
+    starting from `initial_equity`.
+
+    Returns:
+        tuple: (max_drawdown (<= 0), max_drawdown_duration in periods)
+    """
+    equity = with_initial_equity(equity, initial_equity)
+    dd = equity - np.maximum.accumulate(equity, axis=-1)
+    steps = np.broadcast_to(np.arange(dd.shape[-1]), dd.shape)
+    # Index of the most recent peak at every step; the distance to it is the time under water
+    last_peak = np.maximum.accumulate(np.where(dd == 0, steps, 0), axis=-1)
+    return dd.min(axis=-1), (steps - last_peak).max(axis=-1)
+
+
+def historical_var(changes, level=0.95):
+    """Historical VaR: the (1 - level) quantile of per-period P&L (negative = loss)."""
+    return np.quantile(changes, 1 - level, axis=-1)
+
+
+def historical_es(changes, level=0.95):
+    """Historical expected shortfall: mean per-period P&L at or below the historical VaR."""
+    var = historical_var(changes, level)
+    tail = changes <= np.expand_dims(var, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(tail, changes, 0.0).sum(axis=-1) / tail.sum(axis=-1)
+
+
+def parametric_var(changes, level=0.95):
+    """Gaussian VaR: mean + z * std of per-period P&L, with z the (1 - level) normal quantile."""
+    z = NormalDist().inv_cdf(1 - level)
+    return changes.mean(axis=-1) + z * changes.std(axis=-1, ddof=1)
+
+
+def parametric_es(changes, level=0.95):
+    """Gaussian expected shortfall: mean - std * pdf(z) / (1 - level)."""
+    z = NormalDist().inv_cdf(1 - level)
+    return changes.mean(axis=-1) - changes.std(axis=-1, ddof=1) * NormalDist().pdf(z) / (1 - level)
+
+
+def compute_risk_stats(equity, times=None, periods_per_year=None, interval=None, level=0.95, initial_equity=0.0):
+    """
+    Risk statistics for one or many equity curves at once.
+
+    Args:
+        equity (np.ndarray): Cumulative P&L, shape (time,) or (n_strategies, time).
+        times (np.ndarray, optional): Sample timestamps, used to infer the annualization factor.
+        periods_per_year (float, optional): Explicit annualization factor. Defaults to one
+                                            inferred from `times`/`interval`, else 365 (daily).
+        interval (optional): Explicit sampling interval, e.g. '5min' (see annualization_factor()).
+        level (float): VaR/ES confidence level.
+        initial_equity (float): Equity before the first sample (cumulative P&L starts at 0).
+
+    Returns:
+        dict: Arrays (or scalars for a 1-D input) of final_pnl, sharpe, sortino, max_drawdown,
+              max_drawdown_duration (periods), var, es, parametric_var, parametric_es,
+              plus the periods_per_year used.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if periods_per_year is None:
+        periods_per_year = annualization_factor(times, interval) if times is not None or interval is not None else 365.0
+
+    changes = pnl_changes(equity, initial_equity)
+    mdd, mdd_duration = max_drawdown(equity, initial_equity)
+    return {
+        'final_pnl': equity[..., -1],
+        'sharpe': sharpe_ratio(changes, periods_per_year),
+        'sortino': sortino_ratio(changes, periods_per_year),
+        'max_drawdown': mdd,
+        'max_drawdown_duration': mdd_duration,
+        'var': historical_var(changes, level),
+        'es': historical_es(changes, level),
+        'parametric_var': parametric_var(changes, level),
+        'parametric_es': parametric_es(changes, level),
+        'periods_per_year': periods_per_year,
+    }
+
+
+def plot_equity(equity, times=None, prefix=''):
+    """Saves cumulative P&L and drawdown charts. matplotlib is only imported when plotting."""
+    import matplotlib.pyplot as plt
+
+    x = times if times is not None else np.arange(len(equity))
+    for values, title, file_name in ((equity, 'Cumulative PnL', 'cumulative_pnl.png'),
+                                     (drawdown(equity), 'Drawdown', 'drawdown.png')):
+        fig, ax = plt.subplots()
+        ax.plot(x, values)
+        ax.set_title(title)
+        fig.autofmt_xdate()
+        fig.savefig(prefix + file_name)
+        plt.close(fig)
+
+
+if __name__ == '__main__':
+    # Regression checks, run from SimProjectRoot: python -m stats.riskStats
+    # A curve that loses on its first period and then stays flat: the loss is a drawdown and a P&L change
+    flat_after_loss = compute_risk_stats([-4.212] * 7)
+    assert np.isclose(flat_after_loss['max_drawdown'], -4.212), flat_after_loss['max_drawdown']
+    assert np.isclose(flat_after_loss['var'], np.quantile([-4.212] + [0.0] * 6, 0.05))
+    assert np.isfinite(flat_after_loss['sharpe']) and flat_after_loss['sharpe'] < 0
+    # The sample run's daily P&L: day 1 already loses 4.10, the worst point is -8.29
+    sample = compute_risk_stats([-4.10, -8.29, -8.29])
+    assert np.isclose(sample['max_drawdown'], -8.29) and sample['max_drawdown_duration'] == 3
+    # A batch (n_strategies, time) gives each row's own statistics
+    batch = compute_risk_stats(np.array([[-4.10, -8.29, -8.29], [-4.212] * 3]))
+    assert np.allclose(batch['max_drawdown'], [-8.29, -4.212]) and np.isclose(batch['sharpe'][0], sample['sharpe'])
+    assert np.allclose(drawdown([-1.0, 2.0, 1.0]), [-1.0, 0.0, -1.0])
+    print("riskStats checks passed")
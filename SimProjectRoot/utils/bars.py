@@ -0,0 +1,133 @@
+from collections import deque, namedtuple
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# Candle sizes the exchange serves (and the simulator can aggregate to), in seconds
+RESOLUTION_SECONDS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '2h': 7200,
+                      '4h': 14400, '6h': 21600, '1d': 86400, '1w': 604800}
+
+# A completed or forming OHLCV bar; `time` is the start of its bucket, like the downloaded candles
+Bar = namedtuple('Bar', ['time', 'open', 'high', 'low', 'close', 'volume'])
+
+
+def resolution_seconds(resolution):
+    """Bar size in seconds of a resolution name such as '15m', '1h' or '1d'."""
+    try:
+        return RESOLUTION_SECONDS[resolution]
+    except KeyError:
+        raise ValueError(f"Unknown resolution {resolution!r}; expected one of {sorted(RESOLUTION_SECONDS)}") from None
+
+
+def resample_day(day_df, resolution):
+    """
+    Aggregates one day's bars (the read_day_folder layout) into `resolution` bars per instrument.
+
+    Buckets are counted from the first full hour of the day's data, so intraday resolutions line
+    up with the clock and '1d' gives one bar per instrument per day folder (09:00 to 09:00 UTC
+    for downloaded data). Each bar is labelled with the start of its bucket, as the downloaded
+    candles are: open is the first open, high/low the extremes, price the last close and volume
+    the sum (NaN if no bar in the bucket had one).
+
+    Args:
+        day_df (pd.DataFrame): Time-sorted day frame, e.g. from utils.dataCache.read_day_folder.
+        resolution (str): Target resolution, a key of RESOLUTION_SECONDS.
+
+    Returns:
+        pd.DataFrame: Same columns and dtypes as `day_df`, time-sorted; instruments sharing a
+                      bucket keep the order in which they first appear in the day.
+    """
+    step = np.int64(resolution_seconds(resolution) * 10 ** 9)
+    if day_df.empty:
+        return day_df
+    times = day_df['time'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    origin = times.min() // (3600 * 10 ** 9) * (3600 * 10 ** 9)
+    buckets = origin + (times - origin) // step * step
+
+    # Vectorized groupby over (symbol, bucket); sort=False keeps first-appearance order
+    grouped = day_df.assign(time=buckets).groupby(['symbol', 'time'], observed=True, sort=False)
+    bars = grouped.agg(
+        price=('price', 'last'),
+        strike_price=('strike_price', 'first'),
+        option_type=('option_type', 'first'),
+        open=('open', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+    )
+    bars['volume'] = grouped['volume'].sum(min_count=1)
+    bars.reset_index(inplace=True)
+    bars['time'] = bars['time'].to_numpy().view('datetime64[ns]')
+    bars = bars[list(day_df.columns)].astype(day_df.dtypes.to_dict())
+    bars.sort_values('time', kind='stable', inplace=True)
+    bars.reset_index(drop=True, inplace=True)
+    return bars
+
+
+class BarAggregator:
+    """
+    Higher-timeframe bars built incrementally from the replayed events, for strategies.
+
+    The simulator feeds every event to update() before the strategy sees it (see
+    Simulator.bars), so during onMarketData current(symbol) already includes the event's bar
+    and completed(symbol) holds the bars whose buckets have closed. Each update is O(1).
+
+    Buckets follow resample_day: counted from `origin`, which defaults to the first full hour
+    of the first event, so replaying pre-resampled bars and aggregating the base bars agree.
+
+    Args:
+        resolution (str): Bar size, e.g. '15m', '1h' or '1d'.
+        max_bars (int, optional): Completed bars kept per instrument (None: all).
+        origin (datetime.datetime, optional): Start of the first bucket.
+    """
+
+    def __init__(self, resolution, max_bars=None, origin=None):
+        self.resolution = resolution
+        self.step = timedelta(seconds=resolution_seconds(resolution))
+        self.max_bars = max_bars
+        self.origin = origin
+        self.forming = {}   # symbol -> [bucket start, open, high, low, close, volume]
+        self.history = {}   # symbol -> deque of the closed buckets' Bars, oldest first
+
+    def update(self, symbol, time, open_, high, low, close, volume):
+        if self.origin is None:
+            self.origin = time.replace(minute=0, second=0, microsecond=0)
+        bucket = time - (time - self.origin) % self.step
+        bar = self.forming.get(symbol)
+        if bar is not None and bar[0] == bucket:
+            if high > bar[2]:
+                bar[2] = high
+            if low < bar[3]:
+                bar[3] = low
+            bar[4] = close
+            if volume == volume:  # Not NaN
+                bar[5] = volume if bar[5] != bar[5] else bar[5] + volume
+            return
+        if bar is not None:
+            history = self.history.get(symbol)
+            if history is None:
+                history = self.history[symbol] = deque(maxlen=self.max_bars)
+            history.append(Bar(*bar))
+        self.forming[symbol] = [bucket, open_, high, low, close, volume]
+
+    def current(self, symbol):
+        """The forming bar of `symbol` (including the latest event), or None if it has not printed."""
+        bar = self.forming.get(symbol)
+        return Bar(*bar) if bar is not None else None
+
+    def completed(self, symbol, n=None):
+        """The last `n` (default: all kept) closed bars of `symbol`, oldest first."""
+        history = list(self.history.get(symbol, ()))
+        return history if n is None else history[-n:]
+
+    def last(self, symbol):
+        """The most recent closed bar of `symbol`, or None."""
+        history = self.history.get(symbol)
+        return history[-1] if history else None
+
+    def toFrame(self, symbol, include_forming=False):
+        """The closed bars of `symbol` (and the forming one) as a DataFrame indexed by bar start."""
+        bars = self.completed(symbol)
+        if include_forming and symbol in self.forming:
+            bars.append(self.current(symbol))
+        return pd.DataFrame(bars, columns=Bar._fields).set_index('time')
@@ -0,0 +1,60 @@
+import os
+import pickle
+import struct
+import zlib
+
+# File layout: MAGIC, then the format version and the payload length (little-endian uint16,
+# uint64), then the zlib-compressed pickle of the state dict
+MAGIC = b'SIMSNAP\x00'
+SNAPSHOT_VERSION = 2  # Bump when a pickled class (e.g. Order, Straddle) changes its slots
+_HEADER = struct.Struct('<HQ')
+
+
+def dumps(state, level=6):
+    """A state dict as snapshot bytes (see save_snapshot)."""
+    payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), level)
+    return MAGIC + _HEADER.pack(SNAPSHOT_VERSION, len(payload)) + payload
+
+
+def loads(data):
+    """The state dict of snapshot bytes. Raises ValueError if they are not a snapshot of this version."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a simulation snapshot")
+    version, length = _HEADER.unpack_from(data, len(MAGIC))
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot version {version} is not supported (expected {SNAPSHOT_VERSION})")
+    payload = data[len(MAGIC) + _HEADER.size:]
+    if len(payload) != length:
+        raise ValueError(f"Truncated snapshot: {len(payload)} of {length} payload bytes")
+    return pickle.loads(zlib.decompress(payload))
+
+
+def save_snapshot(state, path):
+    """
+    Writes a state dict (e.g. Simulator.checkpointState()) to `path` as a compressed binary
+    snapshot. The file is written next to `path` and renamed over it, so a crash mid-write
+    leaves the previous snapshot intact.
+
+    Returns:
+        int: Size of the snapshot in bytes.
+    """
+    data = dumps(state)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def load_snapshot(path):
+    """
+    Reads a snapshot written by save_snapshot.
+
+    Snapshots are pickles: only load files this simulator wrote.
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+from glob import glob
+
+import numpy as np
+import pandas as pd
+
+from utils.bars import resample_day
+from utils.logs import get_logger
+
+logger = get_logger('data')
+
+# Bump when the cached layout or the CSV processing changes, so stale caches are rebuilt
+CACHE_VERSION = 3
+
+DAY_COLUMNS = ['time', 'symbol', 'price', 'strike_price', 'option_type', 'open', 'high', 'low', 'volume']
+BAR_COLUMNS = ['open', 'high', 'low', 'volume']
+OPTION_TYPE_CATEGORIES = ['', 'call', 'put']
+# Spellings of the option types found in CSVs, after lower-casing
+OPTION_TYPE_ALIASES = {'': '', 'call': 'call', 'c': 'call', 'put': 'put', 'p': 'put'}
+
+
+def read_day_folder(folder):
+    """
+    Parses every CSV in one data/YYYYMMDD folder into a single typed DataFrame.
+
+    Args:
+        folder (str): Path to the day folder.
+
+    Returns:
+        pd.DataFrame: Columns 'time' (datetime64[ns]), 'symbol' (category), 'price' (float64, the
+                      bar close), 'strike_price' (float64, 0 for futures), 'option_type' ('' for
+                      futures; option types are normalized to 'call'/'put' and rows with any
+                      other type are dropped with a warning) and the bar's 'open', 'high', 'low',
+                      'volume' (float64; the close and NaN volume if a file lacks them), stably
+                      sorted by time; or None if the folder has no usable file.
+    """
+    frames = []
+    for file_path in sorted(glob(os.path.join(folder, '*.csv'))):
+        df = pd.read_csv(file_path)
+
+        # Check if it's an options file by looking for 'option_type' and 'strike_price'
+        if 'option_type' in df.columns and 'strike_price' in df.columns:
+            if not {'symbol', 'time', 'close', 'strike_price', 'option_type'}.issubset(df.columns):
+                logger.warning("Skipped options file (missing required columns): %s", file_path)
+                continue
+            df_processed = df[['time', 'symbol', 'close', 'strike_price', 'option_type'] + [c for c in BAR_COLUMNS if c in df.columns]].copy()
+        else:
+            # Assume it's a futures/spot file (like BTCUSDT.csv)
+            if not {'symbol', 'time', 'close'}.issubset(df.columns):
+                logger.warning("Skipped futures/spot file (missing required columns): %s", file_path)
+                continue
+            df_processed = df[['time', 'symbol', 'close'] + [c for c in BAR_COLUMNS if c in df.columns]].copy()
+
+        df_processed.rename(columns={'close': 'price'}, inplace=True)
+        frames.append(df_processed)
+
+    if not frames:
+        return None
+
+    day_df = pd.concat(frames, ignore_index=True).reindex(columns=DAY_COLUMNS)
+    day_df['time'] = pd.to_datetime(day_df['time']).astype('datetime64[ns]')
+    day_df['symbol'] = day_df['symbol'].astype('category')
+    day_df['price'] = day_df['price'].astype(np.float64)
+    day_df['strike_price'] = day_df['strike_price'].fillna(0).astype(np.float64)
+    # Normalized before caching: the cache stores option types as codes over OPTION_TYPE_CATEGORIES
+    option_type = day_df['option_type'].fillna('').astype(str).str.strip().str.lower().map(OPTION_TYPE_ALIASES)
+    unknown = option_type.isna()
+    if unknown.any():
+        logger.warning("Skipped %d rows with unknown option types %s in %s", int(unknown.sum()),
+                       sorted(day_df.loc[unknown, 'option_type'].astype(str).unique()), folder)
+        day_df = day_df[~unknown].copy()
+        option_type = option_type[~unknown]
+    day_df['option_type'] = option_type.astype(str)
+    for column in ('open', 'high', 'low'):
+        day_df[column] = day_df[column].fillna(day_df['price']).astype(np.float64)
+    day_df['volume'] = day_df['volume'].astype(np.float64)
+    day_df.sort_values('time', kind='stable', inplace=True)
+    day_df.reset_index(drop=True, inplace=True)
+    return day_df
+
+
+def file_sha1(file_path):
+    """Hex SHA-1 of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_fingerprints(folder, with_hash=False):
+    fingerprints = {}
+    for file_path in sorted(glob(os.path.join(folder, '*.csv'))):
+        stat = os.stat(file_path)
+        fingerprint = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        if with_hash:
+            fingerprint['sha1'] = file_sha1(file_path)
+        fingerprints[os.path.basename(file_path)] = fingerprint
+    return fingerprints
+
+
+def _is_fresh(folder, meta):
+    """True if the cached sources still match the CSVs on disk (mtime, falling back to content hash)."""
+    if meta.get('version') != CACHE_VERSION:
+        return False
+    cached = meta.get('sources', {})
+    current = _source_fingerprints(folder)
+    if set(cached) != set(current):
+        return False
+    for name, fingerprint in current.items():
+        old = cached[name]
+        if old['size'] != fingerprint['size']:
+            return False
+        # A touched-but-identical file only costs one hash, not a rebuild
+        if old['mtime_ns'] != fingerprint['mtime_ns'] and old['sha1'] != file_sha1(os.path.join(folder, name)):
+            return False
+    return True
+
+
+def write_day_cache(day_df, cache_dir, sources):
+    """Writes one day's DataFrame as per-column .npy files plus a meta.json written last."""
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # Invalidate first so a crash mid-write never leaves a "valid" cache
+
+    option_types = pd.Categorical(day_df['option_type'], categories=OPTION_TYPE_CATEGORIES)
+    if (option_types.codes < 0).any():
+        raise ValueError(f"Cannot cache option types outside {OPTION_TYPE_CATEGORIES}; normalize them with read_day_folder")
+    columns = {
+        'time': day_df['time'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+        'symbol': day_df['symbol'].cat.codes.to_numpy(dtype=np.int32),
+        'price': day_df['price'].to_numpy(dtype=np.float64),
+        'strike_price': day_df['strike_price'].to_numpy(dtype=np.float64),
+        'option_type': option_types.codes.astype(np.int8),
+        **{name: day_df[name].to_numpy(dtype=np.float64) for name in BAR_COLUMNS},
+    }
+    for name, values in columns.items():
+        np.save(os.path.join(cache_dir, f'{name}.npy'), values)
+
+    meta = {
+        'version': CACHE_VERSION,
+        'rows': len(day_df),
+        'symbols': day_df['symbol'].cat.categories.tolist(),
+        'sources': sources,
+    }
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def read_day_cache(cache_dir, meta):
+    """Loads one day's cached columns via memory mapping."""
+    columns = {
+        name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r')
+        for name in DAY_COLUMNS
+    }
+    return pd.DataFrame({
+        'time': columns['time'].view('datetime64[ns]'),
+        'symbol': pd.Categorical.from_codes(columns['symbol'], categories=meta['symbols']),
+        'price': columns['price'],
+        'strike_price': columns['strike_price'],
+        'option_type': np.asarray(OPTION_TYPE_CATEGORIES, dtype=object)[columns['option_type']],
+        **{name: columns[name] for name in BAR_COLUMNS},
+    })
+
+
+def load_day(folder, cache_root, resolution=None):
+    """
+    Returns the DataFrame for one day folder, from the columnar cache when it is fresh.
+
+    On a miss (no cache, new/removed/changed CSV, or a cache version bump) the CSVs are
+    parsed once with read_day_folder and the result is written to `cache_root/YYYYMMDD/`.
+    Resampled views (see utils.bars.resample_day) are built from that and cached the same
+    way under `cache_root/<resolution>/YYYYMMDD/`, tied to the same source files.
+
+    Args:
+        folder (str): Path to the data/YYYYMMDD folder.
+        cache_root (str): Directory holding one cache folder per day.
+        resolution (str, optional): Bar size to aggregate to, e.g. '1h'; None keeps the
+                                    stored bars.
+
+    Returns:
+        pd.DataFrame or None: Same layout as read_day_folder.
+    """
+    day = os.path.basename(os.path.normpath(folder))
+    cache_dir = os.path.join(cache_root, resolution, day) if resolution else os.path.join(cache_root, day)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if _is_fresh(folder, meta):
+            return read_day_cache(cache_dir, meta)
+
+    if resolution:
+        day_df = load_day(folder, cache_root)
+        if day_df is not None:
+            day_df = resample_day(day_df, resolution)
+    else:
+        day_df = read_day_folder(folder)
+    if day_df is not None:
+        write_day_cache(day_df, cache_dir, _source_fingerprints(folder, with_hash=True))
+    return day_df
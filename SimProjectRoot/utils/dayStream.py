@@ -0,0 +1,122 @@
+import heapq
+import os
+from collections import deque
+from datetime import timedelta
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+from utils.bars import resample_day
+from utils.dataCache import load_day, read_day_folder
+from utils.instruments import DEFAULT_REGISTRY
+from utils.logs import get_logger
+
+logger = get_logger('data')
+
+
+def iter_day_frames(start_date, end_date, data_path, cache_root=None, resolution=None):
+    """
+    Yields one DataFrame per data/YYYYMMDD folder between start_date and end_date, in date order.
+
+    Args:
+        start_date (datetime.datetime): First day to load.
+        end_date (datetime.datetime): Last day to load (inclusive).
+        data_path (str): Root of the day folders.
+        cache_root (str, optional): Columnar cache directory; None parses the CSVs directly.
+        resolution (str, optional): Aggregate the bars to this size (e.g. '1h', see
+                                    utils.bars.resample_day); None keeps the stored bars.
+
+    Yields:
+        pd.DataFrame: The day's rows, time-sorted (see utils.dataCache.read_day_folder).
+    """
+    date = start_date
+    while date <= end_date:
+        folder = os.path.join(data_path, date.strftime('%Y%m%d'))
+        if not os.path.exists(folder):
+            logger.warning("Warning: folder not found for date %s", date.strftime('%Y-%m-%d'))
+        else:
+            if cache_root:
+                day_df = load_day(folder, cache_root, resolution)
+            else:
+                day_df = read_day_folder(folder)
+                if day_df is not None and resolution:
+                    day_df = resample_day(day_df, resolution)
+            if day_df is not None:
+                yield day_df
+        date += timedelta(days=1)
+
+
+def _event_rows(df, instruments):
+    """
+    Turns a time-sorted frame into an iterator of
+    (time, day, instrument_id, symbol, price, strike_price, option_type, open, high, low, volume).
+    """
+    times = df['time'].to_numpy(dtype='datetime64[us]')
+    instrument_ids = instruments.ids_for(df['symbol'])
+    return zip(
+        times.tolist(),
+        times.astype('datetime64[D]').astype('int64').tolist(),
+        instrument_ids.tolist(),
+        np.asarray(instruments.symbols, dtype=object)[instrument_ids].tolist(),
+        df['price'].tolist(),
+        df['strike_price'].tolist(),
+        df['option_type'].tolist(),
+        df['open'].tolist(),
+        df['high'].tolist(),
+        df['low'].tolist(),
+        df['volume'].tolist(),
+    )
+
+
+def _instrument_streams(day_df, instruments):
+    """Splits a day into its futures, call and put streams, each still time-sorted."""
+    option_type = day_df['option_type']
+    return [_event_rows(day_df[option_type == kind], instruments) for kind in ('', 'call', 'put')]
+
+
+def merge_day_streams(day_frames, on_window=None, window=3, instruments=None):
+    """
+    k-way heap merge of the futures/calls/puts streams of consecutive days into one event stream.
+
+    Day folders span 09:00 to 09:00 UTC, so a day can overlap the next one in time. Each day is
+    therefore only emitted up to the first timestamp of the following day; its tail is merged
+    with the following day's streams. At most `window` days are held in memory at once.
+
+    Ties are resolved in the same order as the batch loader's stable sort (earlier day first,
+    then futures, calls, puts), so the strategy sees the same events as in batch mode.
+
+    Args:
+        day_frames (iterable): Time-sorted day DataFrames, e.g. from iter_day_frames.
+        on_window (callable, optional): Called with the list of held day frames every time a
+                                        new day is loaded, before any of its events are emitted.
+        window (int): Number of most recent day frames passed to on_window.
+        instruments (InstrumentRegistry, optional): Registry for the instrument ids; defaults to
+                                                    DEFAULT_REGISTRY.
+
+    Yields:
+        tuple: (time, day, instrument_id, symbol, price, strike_price, option_type, open, high, low,
+               volume) in time order.
+    """
+    instruments = DEFAULT_REGISTRY if instruments is None else instruments
+    held = deque(maxlen=window)
+    merged = iter(())
+    for day_df in day_frames:
+        if day_df.empty:
+            continue
+        held.append(day_df)
+        if on_window is not None:
+            on_window(list(held))
+
+        # Release everything that happens strictly before the new day starts
+        day_start = day_df['time'].iloc[0].to_pydatetime()
+        for row in merged:
+            if row[0] >= day_start:
+                merged = chain([row], merged)
+                break
+            yield row
+
+        # heapq.merge yields earlier iterables first on ties: the previous day's tail, then futures, calls, puts
+        merged = heapq.merge(merged, *_instrument_streams(day_df, instruments), key=itemgetter(0))
+
+    yield from merged
@@ -0,0 +1,266 @@
+import csv
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.bars import RESOLUTION_SECONDS
+from utils.instruments import futures_underlying
+from utils.syncManifest import MANIFEST_NAME, DayManifest
+
+DEFAULT_BASE_URL = "https://api.delta.exchange"
+CANDLES_PATH = "/v2/history/candles"
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` acquisitions per second, bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CandleClient:
+    """
+    Pooled HTTP client for the Delta Exchange REST API (candles, and products for SymbolUniverse).
+
+    Requests run on a bounded thread pool sharing one keep-alive session, go through a
+    token-bucket rate limiter, and are retried with exponential backoff (plus jitter) on
+    connection errors, 429 and 5xx responses and 200 responses whose body is not JSON. A
+    429/503 Retry-After header is honoured.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, max_workers=8, rate_limit=10.0, max_retries=5,
+                 backoff=0.5, timeout=15):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept'] = 'application/json'
+        self.request_count = 0
+        self._count_lock = threading.Lock()  # get_json runs on the pool threads
+
+    def get_json(self, path, params, label=None):
+        """
+        GETs `path` with retries.
+
+        Returns:
+            dict: The decoded JSON body, or None if the request failed for good.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            with self._count_lock:
+                self.request_count += 1
+            delay = self.backoff * (2 ** attempt) * (1 + random.random())
+            try:
+                response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+            except requests.RequestException as exc:
+                error = str(exc)
+            else:
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError:  # Truncated or non-JSON body (e.g. a proxy error page): retry
+                        error = f"invalid JSON body: {response.text[:200]}"
+                else:
+                    error = f"status code {response.status_code}: {response.text[:200]}"
+                    if response.status_code not in RETRY_STATUS:
+                        break
+                    retry_after = response.headers.get('Retry-After')
+                    if retry_after and retry_after.isdigit():
+                        delay = max(delay, float(retry_after))
+            if attempt < self.max_retries:
+                time.sleep(delay)
+
+        print(f"API request failed for {label or path} with {error}")
+        return None
+
+    def fetch(self, symbol, start_unix, end_unix, resolution='5m'):
+        """
+        Fetches the candles of one symbol.
+
+        Returns:
+            list: Candle dicts from the 'result' field (empty if the symbol has no data),
+                  or None if the request failed for good.
+        """
+        params = {"resolution": resolution, "symbol": symbol, "start": start_unix, "end": end_unix}
+        body = self.get_json(CANDLES_PATH, params, label=symbol)
+        return None if body is None else body.get("result", [])
+
+    def fetch_many(self, requests, resolution='5m'):
+        """Fetches (symbol, start_unix, end_unix) requests concurrently. Returns their candles (or None), in order."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda request: self.fetch(*request, resolution), requests))
+
+
+def option_symbol(option_type_char, strike_price, expiry_date, underlying='BTC'):
+    return f"{option_type_char}-{underlying}-{strike_price}-{expiry_date.strftime('%d%m%y')}"
+
+
+def candles_to_frame(candles, symbol, strike_price=None, option_type=None):
+    df = pd.DataFrame(candles)
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    df = df.sort_values("time")
+    df["symbol"] = symbol
+    if strike_price is not None:
+        df["strike_price"] = strike_price
+        df["option_type"] = option_type
+    return df
+
+
+def load_symbol_list(file_path):
+    """Reads a symbols CSV with a 'symbol' column, as written by week 1/strike_price.py."""
+    with open(file_path, newline='') as f:
+        return {row['symbol'] for row in csv.DictReader(f) if row.get('symbol')}
+
+
+def sync_day(client, start_time, data_dir, futures_symbol, strikes, expiry_days=3, resolution='5m',
+             listed=None, universe=None, full=False, now=None):
+    """
+    Brings one day (start_time to start_time + 1 day) in data_dir/YYYYMMDD/ up to date.
+
+    Only the candles missing from the folder's manifest are requested: symbols already synced
+    to the end of the day cost no request, partially synced ones are fetched from where they
+    stopped, and symbols known to have no listing are skipped. New rows are appended to
+    <futures_symbol>.csv, calls_<date>.csv and puts_<date>.csv with one write per file.
+    Only completed bars (before `now`) are stored, so today's file can be refreshed later.
+
+    Args:
+        futures_symbol (str): Futures of the underlying, e.g. 'BTCUSDT'; its options are on the
+                              same underlying ('C-BTC-...'). Several underlyings can sync into the
+                              same day folder: their options share the calls/puts files.
+        strikes (iterable): Strikes to probe; with a universe, the range of listed strikes to keep.
+        expiry_days (int or iterable): Option expiry in days after start_time; several offsets
+                                       sync several concurrent expiries.
+        listed (set, optional): Option symbols known to exist; other strikes are never requested.
+        universe (SymbolUniverse, optional): Request exactly the contracts listed for the day's expiries
+                                             instead of the `strikes` grid (falls back to the grid if
+                                             the listing is unavailable).
+        full (bool): Delete the day's files and manifest first and download everything again.
+        now (int, optional): Current unix time, for tests. Defaults to the wall clock.
+
+    Returns:
+        bool: True if every wanted symbol is synced to the end of the day.
+    """
+    step = RESOLUTION_SECONDS[resolution]
+    end_time = start_time + timedelta(days=1)
+    start_unix, end_unix = int(start_time.timestamp()), int(end_time.timestamp())
+    date_str = start_time.strftime("%Y-%m-%d")
+    daily_data_dir = os.path.join(data_dir, start_time.strftime('%Y%m%d'))
+
+    underlying = futures_underlying(futures_symbol)
+    contracts = {futures_symbol: (f"{futures_symbol}.csv", None, None)}
+    files = {'call': f"calls_{date_str}.csv", 'put': f"puts_{date_str}.csv"}
+    for offset in ([expiry_days] if isinstance(expiry_days, int) else expiry_days):
+        expiry_date = start_time + timedelta(days=offset)
+        universe_contracts = universe.contracts(expiry_date.date()) if universe is not None else None
+        if universe_contracts is not None:
+            # Only the contracts the exchange listed, within the strike range
+            low, high = (min(strikes), max(strikes)) if strikes else (-float('inf'), float('inf'))
+            for symbol, option_type, strike in universe_contracts:
+                if low <= strike <= high:
+                    contracts[symbol] = (files[option_type], int(strike) if strike.is_integer() else strike, option_type)
+        else:
+            if universe is not None:
+                print(f"No {underlying} listing for expiry {expiry_date.strftime('%d%m%y')}; probing every strike")
+            for strike in strikes:
+                for char, option_type in (('C', 'call'), ('P', 'put')):
+                    contracts[option_symbol(char, strike, expiry_date, underlying)] = (files[option_type], strike, option_type)
+
+    if full:
+        for file_name in {entry[0] for entry in contracts.values()} | {MANIFEST_NAME}:
+            file_path = os.path.join(daily_data_dir, file_name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    os.makedirs(daily_data_dir, exist_ok=True)
+    manifest = DayManifest.load(daily_data_dir, start_unix, end_unix, resolution, step)
+
+    now = int(time.time()) if now is None else now
+    sync_end = min(end_unix, now - now % step)
+    wanted = [s for s in contracts if s == futures_symbol or listed is None or s in listed]
+    pending = [(s, manifest.fetch_start(s), sync_end) for s in wanted if manifest.fetch_start(s) < sync_end]
+    if not pending:
+        print(f"{date_str} is up to date")
+        return all(manifest.fetch_start(s) >= end_unix for s in wanted)
+
+    print(f"\n--- Fetching {len(pending)} symbols for {date_str} ---")
+    new_rows = {}  # file name -> [(symbol, candles)]
+    for (symbol, fetch_start, _), candles in zip(pending, client.fetch_many(pending, resolution)):
+        if candles is None:
+            continue  # Failed for good: the symbol keeps its sync point and is retried next run
+        last_time = manifest.symbols.get(symbol, {}).get('last_time')
+        candles = [c for c in candles if fetch_start <= c['time'] < sync_end
+                   and (last_time is None or c['time'] > last_time)]
+        if candles:
+            new_rows.setdefault(contracts[symbol][0], []).append((symbol, candles))
+        else:
+            manifest.record(symbol, contracts[symbol][0], [], None, sync_end)
+
+    for file_name, symbol_candles in new_rows.items():
+        file_path = os.path.join(daily_data_dir, file_name)
+        header = None
+        if os.path.exists(file_path) and os.path.getsize(file_path):
+            with open(file_path, newline='') as f:
+                header = f.readline().rstrip('\r\n').split(',')
+
+        chunks, n_rows = [], 0
+        for symbol, candles in symbol_candles:
+            _, strike, option_type = contracts[symbol]
+            frame = candles_to_frame(candles, symbol, strike, option_type)
+            header = header or list(frame.columns)
+            text = frame.reindex(columns=header).to_csv(header=False, index=False, lineterminator='\n')
+            lines = text.splitlines()
+            manifest.record(symbol, file_name, lines, max(c['time'] for c in candles), sync_end)
+            chunks.append(text)
+            n_rows += len(lines)
+
+        is_new = not os.path.exists(file_path) or not os.path.getsize(file_path)
+        with open(file_path, 'a', newline='') as f:
+            if is_new:
+                f.write(','.join(header) + '\n')
+            f.write(''.join(chunks))
+        manifest.touch_file(file_name)
+        print(f"Saved {n_rows} new rows to {file_path}")
+
+    manifest.save()
+    return all(manifest.fetch_start(s) >= end_unix for s in wanted)
+
+
+def sync_range(client, first_start_time, n_days, data_dir, futures_symbol, strikes, **kwargs):
+    """Syncs `n_days` consecutive days (see sync_day()). Returns the number of API requests made."""
+    requests_before = client.request_count
+    for i in range(n_days):
+        start_time = first_start_time + timedelta(days=i)
+        if not sync_day(client, start_time, data_dir, futures_symbol, strikes, **kwargs):
+            print(f"{start_time.strftime('%Y-%m-%d')} is incomplete; the missing candles will be fetched on the next run")
+    return client.request_count - requests_before
@@ -0,0 +1,127 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.priceIndex import as_timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def parse_resolution(resolution):
+    """
+    Normalizes an equity sampling resolution.
+
+    Args:
+        resolution: 'bar' (every event), 'fill' (after every fill), 'day', a number of minutes
+                    (int or float, like config.price_max_age), a pandas-style offset string such
+                    as '15min' or '1h', or None (off).
+
+    Returns:
+        tuple: (mode, interval_ns) where mode is 'bar', 'fill', 'interval' or None.
+    """
+    if resolution is None or resolution in ('bar', 'fill'):
+        return resolution, None
+    if resolution == 'day':
+        resolution = '1D'
+    interval = as_timedelta(resolution)
+    if interval <= pd.Timedelta(0):
+        raise ValueError(f"Equity resolution must be positive, got {resolution!r}")
+    return 'interval', interval.value
+
+
+def to_ns(time):
+    """datetime -> int64 nanoseconds since the epoch (aware times are converted to UTC, naive ones are taken as UTC)."""
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc)  # pd.Timestamp: same as tz_convert('UTC')
+    return (time.replace(tzinfo=None) - _EPOCH) // _ONE_MICROSECOND * 1000
+
+
+class EquityRecorder:
+    """
+    Records the equity curve into preallocated NumPy buffers.
+
+    Times are stored as int64 ns and equity as float64. In append mode the buffers double
+    when full; with `ring_size` they hold only the most recent `ring_size` points, which is
+    what an intraday risk check needs.
+
+    For interval resolutions the last equity seen in each interval is recorded, stamped with
+    the time of that last event.
+    """
+
+    def __init__(self, resolution='bar', capacity=4096, ring_size=None):
+        self.resolution = resolution
+        self.mode, self.interval_ns = parse_resolution(resolution)
+        self.ring_size = ring_size
+        capacity = ring_size or capacity
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.equity = np.empty(capacity, dtype=np.float64)
+        self.size = 0       # Points currently held
+        self.count = 0      # Points recorded in total (> size once a ring buffer wraps)
+        self._bucket = None
+        self._pending = None
+
+    def record(self, time, equity):
+        """Appends one point. `time` is a datetime or int64 ns."""
+        time_ns = time if isinstance(time, (int, np.integer)) else to_ns(time)
+        capacity = len(self.times)
+        if self.ring_size:
+            i = self.count % capacity
+            self.size = min(self.size + 1, capacity)
+        else:
+            if self.size == capacity:
+                self.times = np.resize(self.times, 2 * capacity)
+                self.equity = np.resize(self.equity, 2 * capacity)
+            i = self.size
+            self.size += 1
+        self.times[i] = time_ns
+        self.equity[i] = equity
+        self.count += 1
+
+    def onEvent(self, time, equity):
+        """Called after every market event; samples according to the resolution."""
+        if self.mode == 'bar':
+            self.record(time, equity)
+        elif self.mode == 'interval':
+            time_ns = to_ns(time)
+            bucket = time_ns // self.interval_ns
+            if self._bucket is not None and bucket != self._bucket:
+                self.record(*self._pending)
+            self._bucket = bucket
+            self._pending = (time_ns, equity)
+
+    def onFill(self, time, equity):
+        """Called after every fill."""
+        if self.mode == 'fill':
+            self.record(time, equity)
+
+    def flush(self):
+        """Records the pending point of the last (still open) interval."""
+        if self._pending is not None:
+            self.record(*self._pending)
+            self._pending = None
+            self._bucket = None
+
+    def toArrays(self):
+        """Returns (times as datetime64[ns], equity) in chronological order, as copies."""
+        if self.ring_size and self.count > self.size:
+            start = self.count % self.size
+            order = np.r_[start:self.size, 0:start]
+            times, equity = self.times[order], self.equity[order]
+        else:
+            times, equity = self.times[:self.size].copy(), self.equity[:self.size].copy()
+        return times.view('datetime64[ns]'), equity
+
+    def toFrame(self):
+        times, equity = self.toArrays()
+        return pd.DataFrame({'time': times, 'equity': equity})
+
+    def export(self, output_file):
+        """Writes the curve to .npz (columnar, default) or .csv, picked by the file extension."""
+        if os.path.splitext(output_file)[1].lower() == '.csv':
+            self.toFrame().to_csv(output_file, index=False)
+        else:
+            times, equity = self.toArrays()
+            np.savez(output_file, time=times.view(np.int64), equity=equity)
@@ -0,0 +1,299 @@
+import math
+from itertools import count
+
+from utils.instruments import KIND_CALL, KIND_FUTURE, KIND_PUT
+
+# Execution modes (config.execution_mode)
+INSTANT = 'instant'        # Fill immediately at the order price (the original behaviour)
+NEXT_OPEN = 'next_open'    # Fill at the open of the instrument's next bar
+OHLC = 'ohlc'              # Like NEXT_OPEN, but limit orders also fill when the bar's range reaches them
+EXECUTION_MODES = (INSTANT, NEXT_OPEN, OHLC)
+
+MARKET, LIMIT = 'MARKET', 'LIMIT'
+_QUANTITY_EPSILON = 1e-12
+
+
+class Order:
+    """
+    A working order.
+
+    Attributes:
+        order_id (int): Sequence number, also the priority among orders on one instrument.
+        instrument_id (int): Id in the InstrumentRegistry.
+        symbol (str): Instrument symbol (for the strategy callbacks).
+        side (str): 'BUY' or 'SELL'.
+        quantity (float): Ordered quantity.
+        remaining (float): Quantity not filled yet.
+        order_type (str): MARKET or LIMIT.
+        limit_price (float): Worst acceptable price of a LIMIT order; the reference price of a MARKET order.
+        time (datetime): Time of the event the order was placed on; it can only fill on later bars.
+        account (int): Owner of the order (strategy id in a BatchSimulator, None otherwise).
+        filled_value (float): Sum of fill price * quantity so far.
+        fees (float): Fees paid so far.
+        cancelled (bool): Whether the order was cancelled before it filled completely.
+    """
+
+    __slots__ = ('order_id', 'instrument_id', 'symbol', 'side', 'quantity', 'remaining', 'order_type',
+                 'limit_price', 'time', 'account', 'filled_value', 'fees', 'cancelled')
+
+    def __init__(self, order_id, instrument_id, symbol, side, quantity, order_type, limit_price, time, account=None):
+        self.order_id = order_id
+        self.instrument_id = instrument_id
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.remaining = quantity
+        self.order_type = order_type
+        self.limit_price = limit_price
+        self.time = time
+        self.account = account
+        self.filled_value = 0.0
+        self.fees = 0.0
+        self.cancelled = False
+
+    @property
+    def filled(self):
+        return self.quantity - self.remaining
+
+    @property
+    def working(self):
+        """Whether the order can still fill: neither completely filled nor cancelled."""
+        return not self.cancelled and self.remaining > _QUANTITY_EPSILON
+
+    @property
+    def average_price(self):
+        filled = self.filled
+        return self.filled_value / filled if filled else None
+
+    def __repr__(self):
+        return (f"Order({self.order_id}, {self.side} {self.quantity} {self.symbol} {self.order_type}"
+                f" @ {self.limit_price}, remaining={self.remaining})")
+
+
+class FeeSchedule:
+    """
+    Fee charged on one fill: `rate` of the notional plus `per_unit` per unit of quantity,
+    at least `min_fee`, and at most `cap_rate` of the premium (price * quantity) if set.
+
+    With `on_underlying` the notional is the underlying futures price * quantity, as
+    exchanges charge for options; otherwise it is the fill price * quantity.
+    """
+
+    def __init__(self, rate=0.0, per_unit=0.0, min_fee=0.0, cap_rate=None, on_underlying=False):
+        self.rate = rate
+        self.per_unit = per_unit
+        self.min_fee = min_fee
+        self.cap_rate = cap_rate
+        self.on_underlying = on_underlying
+
+    def fee(self, price, quantity, underlying_price=None):
+        notional_price = underlying_price if self.on_underlying and underlying_price else price
+        fee = max(self.rate * notional_price * quantity + self.per_unit * quantity, self.min_fee)
+        if self.cap_rate is not None:
+            fee = min(fee, self.cap_rate * price * quantity)
+        return fee
+
+
+# Fee schedules by name (config.fee_schedule), each mapping instrument kinds to a FeeSchedule.
+# 'delta' follows Delta Exchange's taker fees: 0.05% of futures notional, and 0.03% of the
+# underlying notional for options, capped at 3.5% of the premium.
+FEE_SCHEDULES = {
+    'none': {},
+    'delta': {
+        KIND_FUTURE: FeeSchedule(rate=0.0005),
+        KIND_CALL: FeeSchedule(rate=0.0003, cap_rate=0.035, on_underlying=True),
+        KIND_PUT: FeeSchedule(rate=0.0003, cap_rate=0.035, on_underlying=True),
+    },
+}
+
+
+class SlippageModel:
+    """
+    Price concession of a market fill: `bps` basis points, plus `impact` times the fill's share
+    of the bar volume (participation). Instant fills have no bar, so only `bps` applies.
+
+    The default of 1 bp is the fixed 0.0001 epsilon the simulator always applied.
+    """
+
+    def __init__(self, bps=1.0, impact=0.0):
+        self.bps = bps
+        self.impact = impact
+
+    def fraction(self, quantity=0.0, bar_volume=None):
+        slip = self.bps * 1e-4
+        if self.impact and bar_volume:
+            slip += self.impact * quantity / bar_volume
+        return slip
+
+    def apply(self, side, price, quantity=0.0, bar_volume=None):
+        slip = self.fraction(quantity, bar_volume)
+        return price * (1 + slip) if side == 'BUY' else price * (1 - slip)
+
+
+class ExecutionEngine:
+    """
+    Matches orders against the market data stream.
+
+    Working orders are kept per instrument id, in priority order, so each bar only visits the
+    orders on its own instrument: the replay loop calls onBar() only when `instrument_id in
+    engine.pending`, which makes matching O(active orders on that instrument) per event and
+    free for everything else.
+
+    In INSTANT mode submit() fills at once (the original behaviour). Otherwise an order waits
+    for the next bar of its instrument:
+      - MARKET orders fill at the bar's open;
+      - LIMIT orders fill at the open if it is at or better than the limit, and in OHLC mode
+        also at the limit price if the bar's low (buy) / high (sell) reaches it.
+    With `max_participation`, the orders on one instrument can fill at most that fraction of a
+    bar's volume, in priority order; the rest stays working for later bars (partial fills).
+    Bars with unknown (NaN) volume are not constrained.
+
+    Every fill is reported through `on_fill(order, quantity, price, fee)`.
+
+    Args:
+        instruments (InstrumentRegistry): Registry the instrument ids refer to.
+        prices (PriceBook): Current prices, for the underlying notional of option fees.
+        on_fill (callable): Fill callback.
+        mode (str): One of EXECUTION_MODES.
+        fees (dict or str, optional): {instrument kind: FeeSchedule}, or a FEE_SCHEDULES name.
+        slippage (SlippageModel, optional): Defaults to SlippageModel() (1 bp).
+        max_participation (float, optional): Max fraction of a bar's volume filled per instrument.
+    """
+
+    def __init__(self, instruments, prices, on_fill, mode=INSTANT, fees=None, slippage=None, max_participation=None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode {mode!r}; expected one of {EXECUTION_MODES}")
+        self.instruments = instruments
+        self.prices = prices
+        self.on_fill = on_fill
+        self.mode = mode
+        self.fees = FEE_SCHEDULES[fees] if isinstance(fees, str) else (fees or {})
+        self.slippage = slippage if slippage is not None else SlippageModel()
+        self.max_participation = max_participation
+        self.pending = {}  # instrument_id -> [Order, ...] in priority order
+        self._order_ids = count()
+        self._futures_ids = {}  # underlying code -> futures instrument id
+
+    def snapshot(self):
+        """Working orders and the next order id, for checkpoints (see Simulator.checkpointState)."""
+        next_order_id = next(self._order_ids)
+        self._order_ids = count(next_order_id)
+        return {'pending': self.pending, 'next_order_id': next_order_id}
+
+    def restore(self, state):
+        """Resumes from snapshot(). `pending` is refilled in place, so references to it stay valid."""
+        self.pending.clear()
+        self.pending.update(state['pending'])
+        self._order_ids = count(state['next_order_id'])
+
+    @property
+    def activeOrders(self):
+        return [order for orders in self.pending.values() for order in orders]
+
+    def submit(self, symbol, side, quantity, price, order_type=MARKET, time=None, account=None):
+        """Places an order. Returns the Order (already filled in INSTANT mode)."""
+        if side not in ('BUY', 'SELL'):
+            raise ValueError(f"Unknown order side {side!r}")
+        if order_type not in (MARKET, LIMIT):
+            raise ValueError(f"Unknown order type {order_type!r}")
+        instrument_id = self.instruments.intern(symbol)
+        order = Order(next(self._order_ids), instrument_id, symbol, side, quantity, order_type, price, time, account)
+        if self.mode == INSTANT:
+            self._fill(order, quantity, self.slippage.apply(side, price))
+        else:
+            self.pending.setdefault(instrument_id, []).append(order)
+        return order
+
+    def cancel(self, order):
+        """Removes a working order. Returns True if it was still working."""
+        orders = self.pending.get(order.instrument_id)
+        if not orders or order not in orders:
+            return False
+        orders.remove(order)
+        if not orders:
+            del self.pending[order.instrument_id]
+        order.cancelled = True
+        return True
+
+    def cancelExpired(self, date):
+        """Cancels the working orders on options that expired before `date`. Returns them."""
+        expiry_date = self.instruments.expiry_date
+        cancelled = []
+        for instrument_id in list(self.pending):
+            expiry = expiry_date(instrument_id)
+            if expiry is not None and expiry < date:
+                cancelled.extend(self.pending.pop(instrument_id))
+        for order in cancelled:
+            order.cancelled = True
+        return cancelled
+
+    def onBar(self, instrument_id, time, open_price, high, low, volume):
+        """Matches the working orders of `instrument_id` against its bar at `time`."""
+        orders = self.pending[instrument_id]
+        capacity = math.inf
+        if self.max_participation is not None and volume == volume:
+            capacity = self.max_participation * volume
+        bar_volume = volume if volume == volume else None
+
+        working = []
+        for order in orders:
+            # Orders placed on this bar (or later) wait for the next one
+            if capacity <= 0 or (order.time is not None and order.time >= time):
+                working.append(order)
+                continue
+            price = self._touch(order, open_price, high, low)
+            if price is None:
+                working.append(order)
+                continue
+            quantity = min(order.remaining, capacity)
+            capacity -= quantity
+            if order.order_type == MARKET:
+                price = self.slippage.apply(order.side, price, quantity, bar_volume)
+            self._fill(order, quantity, price)
+            if order.remaining > _QUANTITY_EPSILON:
+                working.append(order)
+
+        if working:
+            self.pending[instrument_id] = working
+        else:
+            del self.pending[instrument_id]
+
+    def _touch(self, order, open_price, high, low):
+        """Fill price of `order` on a bar, or None if the bar does not reach it."""
+        if order.order_type == MARKET:
+            return open_price
+        limit = order.limit_price
+        if order.side == 'BUY':
+            if open_price <= limit:
+                return open_price
+            if self.mode == OHLC and low <= limit:
+                return limit
+        else:
+            if open_price >= limit:
+                return open_price
+            if self.mode == OHLC and high >= limit:
+                return limit
+        return None
+
+    def _underlying_price(self, instrument_id):
+        instruments = self.instruments
+        code = int(instruments.underlying[instrument_id])
+        futures_id = self._futures_ids.get(code)
+        if futures_id is None:
+            futures_id = next((i for i in range(len(instruments))
+                               if instruments.kind[i] == KIND_FUTURE and instruments.underlying[i] == code), None)
+            if futures_id is None:
+                return None
+            self._futures_ids[code] = futures_id
+        return self.prices.getById(futures_id)
+
+    def _fill(self, order, quantity, price):
+        schedule = self.fees.get(int(self.instruments.kind[order.instrument_id]))
+        fee = 0.0
+        if schedule is not None:
+            underlying_price = self._underlying_price(order.instrument_id) if schedule.on_underlying else None
+            fee = schedule.fee(price, quantity, underlying_price)
+        order.remaining -= quantity
+        order.filled_value += price * quantity
+        order.fees += fee
+        self.on_fill(order, quantity, price, fee)
@@ -1,7 +1,9 @@
 import pandas as pd
 from datetime import timedelta
+from utils.symbols import DEFAULT_UNDERLYING
 
-def get_closest_strikes(futures_price, current_time_obj, all_sim_df, price_deviation_percent=0.02):
+def get_closest_strikes(futures_price, current_time_obj, all_sim_df, price_deviation_percent=0.02, chain_index=None,
+                        universe=None, underlying=DEFAULT_UNDERLYING, expiry_days=3, as_of=None):
     """
     Finds the closest At-The-Money (ATM) call and put option symbols for a given futures price.
 
@@ -12,23 +14,49 @@ def get_closest_strikes(futures_price, current_time_obj, all_sim_df, price_devia
                                     both futures and options data with 'option_type' and 'strike_price' columns.
         price_deviation_percent (float): The maximum percentage deviation from the futures price
                                          for a strike to be considered ATM (e.g., 0.02 for 2%).
+        chain_index (OptionChainIndex, optional): Precomputed chain snapshots. When given, the lookup
+                                                  is a binary search over that day's strikes and
+                                                  all_sim_df is not touched.
+        universe (SymbolUniverse, optional): Listed contracts per expiry. When given, only listed
+                                             symbols are candidates; with no market data at all
+                                             (all_sim_df is None) the closest listed strikes are returned.
+                                             It must list `underlying`'s contracts.
+        underlying (str): Underlying asset of the options, e.g. 'BTC' or 'ETH'.
+        expiry_days (int): Expiry to trade, in days after the current simulation day.
+        as_of (int, optional): int64 ns timestamp (normally the current bar's); if given, only
+                               contracts that printed at or before it are candidates. Without it
+                               the whole day's chain is searched, including contracts that only
+                               print later that day (same-day look-ahead).
 
     Returns:
         tuple: (call_symbol, put_symbol) of the closest ATM options, or (None, None) if not found.
     """
 
     # Determine the target expiry date based on the current simulation day
-    # This matches your data fetching script's logic: expiry is 3 days from the current day
-    target_expiry_date_obj = current_time_obj.date() + timedelta(days=3)
+    # This matches your data fetching script's logic: expiry is expiry_days (by default 3) from the current day
+    target_expiry_date_obj = current_time_obj.date() + timedelta(days=expiry_days)
     target_expiry_str_for_symbol = target_expiry_date_obj.strftime("%d%m%y") # Format: DDMMYY, e.g., '220525'
 
+    listed = universe.symbols(target_expiry_date_obj) if universe is not None else None
+    if chain_index is not None:
+        return chain_index.closest_strikes(futures_price, current_time_obj.date(), target_expiry_date_obj,
+                                           price_deviation_percent, as_of=as_of, listed=listed,
+                                           underlying=underlying)
+    if all_sim_df is None and universe is not None:
+        return universe.closest_strikes(futures_price, target_expiry_date_obj, price_deviation_percent)
+
     # Filter the full simulation DataFrame for options relevant to the current day and target expiry
     # Ensure 'option_type' column is correctly filled (not NaN/empty string for options data)
     relevant_options = all_sim_df[
         (all_sim_df['time'].dt.date == current_time_obj.date()) &           # Options for the current simulation day
         (all_sim_df['option_type'].isin(['call', 'put'])) &                 # Ensure it's explicitly a 'call' or 'put'
-        (all_sim_df['symbol'].str.contains(target_expiry_str_for_symbol, na=False)) # Match expiry in symbol string
+        (all_sim_df['symbol'].str.contains(target_expiry_str_for_symbol, na=False)) & # Match expiry in symbol string
+        (all_sim_df['symbol'].str.contains(f"-{underlying}-", regex=False, na=False)) # And the underlying ('C-BTC-...')
     ].copy() # Use .copy() to avoid SettingWithCopyWarning if you modify this sub-DataFrame
+    if listed is not None:
+        relevant_options = relevant_options[relevant_options['symbol'].isin(listed)] # Only contracts the exchange listed
+    if as_of is not None:
+        relevant_options = relevant_options[relevant_options['time'] <= pd.Timestamp(as_of)] # Only contracts printed so far
 
     if relevant_options.empty:
         # print(f"DEBUG: No relevant options found for {current_time_obj.date()} with expiry {target_expiry_str_for_symbol}")
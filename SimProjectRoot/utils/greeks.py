@@ -0,0 +1,226 @@
+from collections import OrderedDict
+from datetime import datetime, time as dtime
+
+import numpy as np
+
+from utils.instruments import futures_underlying
+from utils.symbols import parse_option_symbol
+
+try:
+    from scipy.special import ndtr as _norm_cdf
+except ImportError:  # scipy is optional; fall back to a NumPy erfc approximation
+    def _norm_cdf(x):
+        # Numerical Recipes erfcc (Chebyshev fit, fractional error < 1.2e-7), vectorized
+        z = np.abs(x) / np.sqrt(2.0)
+        t = 1.0 / (1.0 + 0.5 * z)
+        poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+            -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+                -0.82215223 + t * 0.17087277))))))))
+        erfc = t * np.exp(poly)
+        return np.where(x >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+EXPIRY_TIME_UTC = dtime(12, 0)  # Delta Exchange BTC options settle at 12:00 UTC on the expiry date
+MIN_VOL, MAX_VOL = 1e-4, 5.0
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def _d1_d2(F, K, T, sigma):
+    sqrt_t = np.sqrt(T)
+    d1 = (np.log(F / K) + 0.5 * sigma * sigma * T) / (sigma * sqrt_t)
+    return d1, d1 - sigma * sqrt_t
+
+
+def black76_price(F, K, T, sigma, is_call, r=0.0):
+    """
+    Black-76 option price on a futures price, vectorized over NumPy arrays.
+
+    Args:
+        F (array): Futures (forward) price.
+        K (array): Strike.
+        T (array): Time to expiry in years.
+        sigma (array): Volatility (annualized).
+        is_call (array of bool): True for calls, False for puts.
+        r (float): Discount rate.
+    """
+    F, K, T, sigma = (np.asarray(a, dtype=np.float64) for a in (F, K, T, sigma))
+    d1, d2 = _d1_d2(F, K, T, sigma)
+    discount = np.exp(-r * T)
+    call = discount * (F * _norm_cdf(d1) - K * _norm_cdf(d2))
+    put = discount * (K * _norm_cdf(-d2) - F * _norm_cdf(-d1))
+    return np.where(is_call, call, put)
+
+
+def black76_greeks(F, K, T, sigma, is_call, r=0.0):
+    """
+    Black-76 Greeks, vectorized.
+
+    Returns:
+        dict: 'delta' (per 1 unit of F), 'gamma', 'vega' (per 1.00 of vol),
+              'theta' (change in value per year of calendar time).
+    """
+    F, K, T, sigma = (np.asarray(a, dtype=np.float64) for a in (F, K, T, sigma))
+    d1, d2 = _d1_d2(F, K, T, sigma)
+    discount = np.exp(-r * T)
+    sqrt_t = np.sqrt(T)
+    pdf_d1 = _norm_pdf(d1)
+
+    delta = np.where(is_call, discount * _norm_cdf(d1), -discount * _norm_cdf(-d1))
+    gamma = discount * pdf_d1 / (F * sigma * sqrt_t)
+    vega = discount * F * pdf_d1 * sqrt_t
+    price = black76_price(F, K, T, sigma, is_call, r)
+    theta = -discount * F * pdf_d1 * sigma / (2 * sqrt_t) + r * price
+    return {'delta': delta, 'gamma': gamma, 'vega': vega, 'theta': theta}
+
+
+def implied_vol(price, F, K, T, is_call, r=0.0, tol=1e-8, max_iter=100):
+    """
+    Black-76 implied volatility for whole arrays at once.
+
+    Newton steps on vega, safeguarded by a bisection bracket [MIN_VOL, MAX_VOL] so every
+    element converges even where vega is tiny. Prices outside the no-arbitrage bounds
+    (below intrinsic value or above the bound at MAX_VOL) give NaN, and so do prices within
+    float noise of a bound (e.g. a deep out-of-the-money option priced 0, or one priced at
+    exactly intrinsic), where no volatility is identifiable.
+    """
+    price, F, K, T = (np.asarray(a, dtype=np.float64) for a in (price, F, K, T))
+    price, F, K, T, is_call = np.broadcast_arrays(price, F, K, T, np.asarray(is_call, dtype=bool))
+
+    low = np.full(price.shape, MIN_VOL)
+    high = np.full(price.shape, MAX_VOL)
+    # The bounds carry cancellation error of order eps * (F + K), hence the relative margin
+    margin = 1e-10 * (np.abs(F) + np.abs(K))
+    with np.errstate(all='ignore'):
+        valid = ((T > 0) & (price > black76_price(F, K, T, low, is_call, r) + margin)
+                 & (price < black76_price(F, K, T, high, is_call, r) - margin))
+    T = np.where(valid, T, 1.0)  # Keep the solver finite on the elements that are reported as NaN
+    sigma = np.full(price.shape, 0.5)
+    active = valid.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        model = black76_price(F, K, T, sigma, is_call, r)
+        diff = model - price
+        vega = black76_greeks(F, K, T, sigma, is_call, r)['vega']
+        # A price match where vega is 0 says nothing about sigma: keep bisecting
+        converged = (np.abs(diff) <= tol * np.maximum(price, 1.0)) & (vega > 0)
+        active &= ~converged & (high - low > tol)
+        # Tighten the bracket around the root, then take a Newton step if it stays inside it
+        high = np.where(active & (diff > 0), sigma, high)
+        low = np.where(active & (diff <= 0), sigma, low)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = sigma - diff / vega
+        step = np.where((newton > low) & (newton < high), newton, 0.5 * (low + high))
+        sigma = np.where(active, step, sigma)
+
+    return np.where(valid, sigma, np.nan)
+
+
+def year_fraction(time, expiry_date):
+    """Years from `time` (naive UTC datetime) until settlement on `expiry_date`."""
+    settlement = datetime.combine(expiry_date, EXPIRY_TIME_UTC)
+    return (settlement - time.replace(tzinfo=None)).total_seconds() / SECONDS_PER_YEAR
+
+
+class GreeksEngine:
+    """
+    Implied vol and Greeks for option chains, cached per (timestamp, futures price, symbol) and
+    valid for the option price they were solved at.
+
+    Contracts (type, strike, expiry) are parsed from their symbols once. A chain request
+    solves every uncached symbol at that timestamp in one vectorized call, as well as every
+    symbol whose price changed since it was cached (an option printing later in the same
+    timestamp); repeated requests at the same bar and prices (e.g. portfolio Greeks for several
+    strategies) are cache hits. Only the most recent `max_cached_times` (timestamp, futures price) keys are kept.
+    """
+
+    FIELDS = ('price', 'iv', 'delta', 'gamma', 'vega', 'theta')
+
+    def __init__(self, rate=0.0, max_cached_times=4):
+        self.rate = rate
+        self.max_cached_times = max_cached_times
+        self._contracts = {}           # symbol -> (is_call, strike, expiry_date) or None
+        self._cache = OrderedDict()    # (timestamp, futures price) -> {symbol: {field: value}}
+
+    def _contract(self, symbol):
+        contract = self._contracts.get(symbol, False)
+        if contract is False:
+            parsed = parse_option_symbol(symbol)
+            contract = (parsed[0] == 'call', parsed[2], parsed[3]) if parsed else None
+            self._contracts[symbol] = contract
+        return contract
+
+    def chainGreeks(self, time, futures_price, prices):
+        """
+        Implied vol and Greeks for a set of option symbols at one timestamp.
+
+        Args:
+            time (datetime): Evaluation time (naive UTC).
+            futures_price (float): Underlying futures price at `time`.
+            prices (dict): symbol -> option price at `time`.
+
+        Returns:
+            dict: symbol -> {'price', 'iv', 'delta', 'gamma', 'vega', 'theta'}; non-option
+                  symbols are skipped, unsolvable ones have NaN fields.
+        """
+        # A futures print later in the same timestamp changes every IV, so it is part of the key
+        key = (time, float(futures_price))
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._cache[key] = {}
+            while len(self._cache) > self.max_cached_times:
+                self._cache.popitem(last=False)
+
+        # Unsolved symbols, and those whose option price changed since they were solved
+        missing = [s for s in prices if self._contract(s) is not None
+                   and (s not in cached or cached[s]['price'] != float(prices[s]))]
+        if missing:
+            contracts = [self._contract(s) for s in missing]
+            is_call = np.array([c[0] for c in contracts])
+            K = np.array([c[1] for c in contracts])
+            T = np.array([year_fraction(time, c[2]) for c in contracts])
+            price = np.array([prices[s] for s in missing], dtype=np.float64)
+            F = np.full(len(missing), float(futures_price))
+
+            iv = implied_vol(price, F, K, T, is_call, self.rate)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                greeks = black76_greeks(F, K, T, iv, is_call, self.rate)
+            for i, symbol in enumerate(missing):
+                cached[symbol] = {
+                    'price': price[i], 'iv': iv[i], 'delta': greeks['delta'][i], 'gamma': greeks['gamma'][i],
+                    'vega': greeks['vega'][i], 'theta': greeks['theta'][i],
+                }
+
+        return {s: cached[s] for s in prices if s in cached}
+
+    def portfolioGreeks(self, time, futures_price, positions, prices):
+        """
+        Position-weighted Greeks of a portfolio.
+
+        Args:
+            positions (dict): symbol -> signed quantity. Futures positions (quoted symbols such
+                              as 'BTCUSDT') add their quantity to delta; other non-option
+                              symbols are ignored.
+            prices (dict): symbol -> current price (e.g. Simulator.currentPrice).
+
+        Returns:
+            dict: Summed 'delta', 'gamma', 'vega', 'theta' (NaN legs are skipped).
+        """
+        option_prices = {s: prices[s] for s, q in positions.items() if q and s in prices and self._contract(s)}
+        chain = self.chainGreeks(time, futures_price, option_prices)
+        totals = {'delta': 0.0, 'gamma': 0.0, 'vega': 0.0, 'theta': 0.0}
+        for symbol, quantity in positions.items():
+            if not quantity:
+                continue
+            if symbol in chain:
+                for field in totals:
+                    value = chain[symbol][field]
+                    if not np.isnan(value):
+                        totals[field] += quantity * value
+            elif self._contract(symbol) is None and futures_underlying(symbol) != symbol:
+                totals['delta'] += quantity  # Futures ('BTCUSDT'): delta 1 per unit
+        return totals
@@ -0,0 +1,259 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from utils.latency import LatencyHistogram
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class Instrumentation:
+    """
+    Per-run timers, counters and memory high-water marks.
+
+    - phase(name): wall time (and, with trace_memory, the tracemalloc peak) of a run phase
+      such as 'readData' or 'replay'; a phase entered several times accumulates.
+    - timer(name): like phase(), for short sections that repeat (e.g. strike lookups), kept
+      as a latency histogram.
+    - wrap(name, fn): fn timed on every call (e.g. the strategy callback in the replay loop).
+    - count(name, n): event counters.
+
+    Disabled instances (enabled=False, see NULL_INSTRUMENTATION) return `fn` unwrapped from
+    wrap() and a shared no-op context from phase()/timer(), so leaving the calls in place costs
+    next to nothing.
+
+    Args:
+        enabled (bool): Record anything at all.
+        trace_memory (bool): Track Python allocations with tracemalloc for per-phase peaks.
+                             Slows the run down noticeably; the process RSS high-water mark
+                             is always reported.
+    """
+
+    def __init__(self, enabled=True, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.phases = {}      # name -> {'calls', 'seconds', 'peak_bytes'}
+        self.timers = {}      # name -> LatencyHistogram
+        self.counters = Counter()
+        self._started = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def _phase(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': None})
+            stats['calls'] += 1
+            stats['seconds'] += time.perf_counter() - start
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                stats['peak_bytes'] = max(stats['peak_bytes'] or 0, peak)
+
+    def phase(self, name):
+        return self._phase(name) if self.enabled else _NULL_CONTEXT
+
+    @contextmanager
+    def _timer(self, hist):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            hist.record(time.perf_counter() - start)
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_CONTEXT
+        hist = self.timers.get(name)
+        if hist is None:
+            hist = self.timers[name] = LatencyHistogram(name)
+        return self._timer(hist)
+
+    def wrap(self, name, fn):
+        """`fn`, timed per call into the `name` histogram (or `fn` itself when disabled)."""
+        if not self.enabled:
+            return fn
+        hist = self.timers.get(name)
+        if hist is None:
+            hist = self.timers[name] = LatencyHistogram(name)
+        record = hist.record
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(perf_counter() - start)
+        return timed
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def report(self):
+        """Everything recorded so far as a JSON-serializable dict."""
+        phases = {name: dict(stats) for name, stats in self.phases.items()}
+        rates = {}
+        replay, events = phases.get('replay'), self.timers.get('onMarketData')
+        if replay and events and replay['seconds'] > 0:
+            rates['rows_per_sec'] = events.count / replay['seconds']
+        memory = {}
+        if resource is not None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            memory['rss_peak_mb'] = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+        if self.trace_memory and tracemalloc.is_tracing():
+            memory['traced_current_mb'], memory['traced_peak_mb'] = (
+                value / 2 ** 20 for value in tracemalloc.get_traced_memory())
+        return {
+            'wall_seconds': time.perf_counter() - self._started,
+            'phases': phases,
+            'counters': dict(self.counters),
+            'timers': {name: hist.summary() for name, hist in self.timers.items()},
+            'rates': rates,
+            'memory': memory,
+        }
+
+    def export(self, output_file):
+        with open(output_file, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def format(self):
+        """Human-readable summary of report()."""
+        report = self.report()
+        lines = [f"Run time {report['wall_seconds']:.3f} s"]
+        for name, stats in report['phases'].items():
+            peak = f", peak {stats['peak_bytes'] / 2 ** 20:.1f} MB" if stats['peak_bytes'] is not None else ''
+            lines.append(f"  {name:<20} {stats['seconds']:9.4f} s  ({stats['calls']} calls{peak})")
+        for name, value in report['rates'].items():
+            lines.append(f"  {name:<20} {value:12,.0f}")
+        for name, value in report['counters'].items():
+            lines.append(f"  {name:<20} {value:12,}")
+        lines.extend(f"  {hist.format()}" for hist in self.timers.values())
+        for name, value in report['memory'].items():
+            lines.append(f"  {name:<20} {value:12.1f}")
+        return '\n'.join(lines)
+
+
+# Shared disabled instance: all calls are no-ops
+NULL_INSTRUMENTATION = Instrumentation(enabled=False)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread samples the stack of one thread every
+    `interval` seconds. Much lower overhead than cProfile on the per-event hot loop, at the
+    price of only approximate counts.
+
+    collapsed() returns the samples in the "collapsed stacks" format read by flamegraph.pl
+    and speedscope (one "outer;...;inner count" line per distinct stack).
+    """
+
+    def __init__(self, interval=0.002, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            frame = frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return '\n'.join(f"{stack} {n}" for stack, n in self.stacks.most_common())
+
+    def top(self, n=15):
+        """[(function, self samples, share)] of the functions most often on top of the stack."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return [(name, count, count / self.samples) for name, count in leaves.most_common(n)]
+
+
+@contextmanager
+def profiled(kind, output_file, top=15):
+    """
+    Profiles the enclosed block and writes the report to `output_file`.
+
+    Args:
+        kind (str): None (no profiling), 'cprofile' (pstats data, readable with
+                    `python -m pstats` or snakeviz) or 'sampling' (collapsed stacks).
+        output_file (str): Report path.
+        top (int): Number of functions in the summary printed at the end.
+    """
+    if kind is None:
+        yield
+        return
+    if kind == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_file)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(top)
+            print(summary.getvalue())
+            print(f"cProfile data written to {output_file}")
+    elif kind == 'sampling':
+        profiler = SamplingProfiler().start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(output_file, 'w') as f:
+                f.write(profiler.collapsed() + '\n')
+            print(f"\n{profiler.samples} samples; most frequent on-CPU functions:")
+            for name, count, share in profiler.top(top):
+                print(f"  {share:6.1%}  {count:6}  {name}")
+            print(f"Collapsed stacks written to {output_file}")
+    else:
+        raise ValueError(f"Unknown profiler {kind!r}; expected None, 'cprofile' or 'sampling'")
@@ -0,0 +1,286 @@
+import numpy as np
+import pandas as pd
+
+from utils.symbols import parse_option_symbol
+
+# Instrument kinds, indexable by the kind code: KIND_NAMES[kind] is the 'option_type' column value
+KIND_FUTURE, KIND_CALL, KIND_PUT = 0, 1, 2
+KIND_NAMES = ('', 'call', 'put')
+_KIND_CODES = {'call': KIND_CALL, 'put': KIND_PUT}
+_QUOTE_SUFFIXES = ('USDT', 'USD')
+
+# What PriceBook lookups do with a price older than max_age
+STALE_KEEP = 'last'        # Return it anyway (staleness can still be checked with isStale)
+STALE_MISSING = 'missing'  # Treat it like an instrument that has not printed (the caller's default applies)
+STALE_POLICIES = (STALE_KEEP, STALE_MISSING)
+
+
+def grow(array, size):
+    """Returns `array` zero-padded along its last axis to at least `size`, doubling so growth is amortized O(1)."""
+    capacity = array.shape[-1]
+    if size <= capacity:
+        return array
+    new_capacity = max(size, 2 * capacity, 16)
+    padding = np.zeros(array.shape[:-1] + (new_capacity - capacity,), dtype=array.dtype)
+    return np.concatenate([array, padding], axis=-1)
+
+
+def futures_underlying(symbol):
+    """Underlying asset of a futures/spot symbol, e.g. 'BTCUSDT' -> 'BTC'."""
+    for suffix in _QUOTE_SUFFIXES:
+        if symbol.endswith(suffix) and len(symbol) > len(suffix):
+            return symbol[:-len(suffix)]
+    return symbol
+
+
+class InstrumentRegistry:
+    """
+    Interns instrument symbols to dense integer ids, with their parsed fields in typed arrays.
+
+    Every symbol is parsed once, when first seen. After that the replay loop, the books and
+    the lookups work with ids and array indexing; the symbol string is only needed at the
+    Strategy API boundary (MarketEvent.symbol, onOrder).
+
+    Attributes:
+        symbols (list): id -> symbol.
+        underlyings (list): underlying code -> underlying asset name (e.g. 'BTC').
+        underlying (np.ndarray): int16 underlying code per id.
+        kind (np.ndarray): int8 KIND_FUTURE / KIND_CALL / KIND_PUT per id.
+        strike (np.ndarray): float64 strike per id (0 for futures).
+        expiry (np.ndarray): datetime64[D] expiry per id (NaT for futures).
+
+    The arrays have spare capacity; only the first len(registry) entries are meaningful.
+    """
+
+    def __init__(self, capacity=64):
+        self.ids = {}            # symbol -> id
+        self.symbols = []
+        self.underlyings = []
+        self._underlying_codes = {}
+        self.underlying = np.zeros(capacity, dtype=np.int16)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.strike = np.zeros(capacity, dtype=np.float64)
+        self.expiry = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[D]')
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.ids
+
+    def get(self, symbol, default=None):
+        return self.ids.get(symbol, default)
+
+    def intern(self, symbol):
+        """Returns the id of `symbol`, registering it on first use."""
+        instrument_id = self.ids.get(symbol)
+        if instrument_id is not None:
+            return instrument_id
+
+        instrument_id = len(self.symbols)
+        if instrument_id == len(self.kind):
+            size = instrument_id + 1
+            self.underlying, self.kind, self.strike = (grow(a, size) for a in (self.underlying, self.kind, self.strike))
+            expiry = np.full(len(self.underlying), np.datetime64('NaT'), dtype='datetime64[D]')
+            expiry[:instrument_id] = self.expiry[:instrument_id]
+            self.expiry = expiry
+
+        parsed = parse_option_symbol(symbol)
+        if parsed is None:
+            underlying, kind, strike, expiry_date = futures_underlying(symbol), KIND_FUTURE, 0.0, None
+        else:
+            option_type, underlying, strike, expiry_date = parsed
+            kind = _KIND_CODES[option_type]
+
+        code = self._underlying_codes.get(underlying)
+        if code is None:
+            code = self._underlying_codes[underlying] = len(self.underlyings)
+            self.underlyings.append(underlying)
+
+        self.underlying[instrument_id] = code
+        self.kind[instrument_id] = kind
+        self.strike[instrument_id] = strike
+        if expiry_date is not None:
+            self.expiry[instrument_id] = np.datetime64(expiry_date, 'D')
+        self.ids[symbol] = instrument_id
+        self.symbols.append(symbol)
+        return instrument_id
+
+    def intern_many(self, symbols):
+        """Interns an iterable of symbols. Returns their ids as an int32 array."""
+        return np.fromiter((self.intern(s) for s in symbols), dtype=np.int32)
+
+    def ids_for(self, symbol_column):
+        """
+        Instrument id of every row of a symbol column (categorical or strings).
+
+        Only the distinct symbols are interned; the per-row ids come from one array take.
+        """
+        if isinstance(symbol_column.dtype, pd.CategoricalDtype):
+            codes = symbol_column.cat.codes.to_numpy()
+            ids = self.intern_many(symbol_column.cat.categories)
+        else:
+            codes, uniques = pd.factorize(symbol_column)
+            ids = self.intern_many(uniques)
+        if (codes < 0).any():
+            raise ValueError("symbol column contains missing values")
+        return ids[codes]
+
+    def categorical(self, symbol_column):
+        """
+        Re-codes a symbol column so its categorical codes are the instrument ids.
+
+        The categories are the registry's symbols in id order, so frames coded by the same
+        registry concatenate (via union_categoricals) without re-coding.
+        """
+        ids = self.ids_for(symbol_column)
+        return pd.Categorical.from_codes(ids, categories=pd.Index(self.symbols, dtype=object))
+
+    def underlying_name(self, instrument_id):
+        """Underlying asset of an instrument, e.g. 'BTC' for both 'BTCUSDT' and 'C-BTC-104000-230525'."""
+        return self.underlyings[self.underlying[instrument_id]]
+
+    def underlying_names(self, ids):
+        """Underlying asset of every id in an int array, as an object array."""
+        return np.asarray(self.underlyings, dtype=object)[self.underlying[ids]]
+
+    def expiry_date(self, instrument_id):
+        """Expiry of an option as a datetime.date, or None for futures."""
+        if self.kind[instrument_id] == KIND_FUTURE:
+            return None
+        return self.expiry[instrument_id].astype(object)
+
+    def table(self):
+        """The registry as a DataFrame indexed by id (for inspection)."""
+        n = len(self)
+        return pd.DataFrame({
+            'symbol': self.symbols,
+            'underlying': self.underlying_names(np.arange(n)) if n else [],
+            'option_type': np.asarray(KIND_NAMES, dtype=object)[self.kind[:n]],
+            'strike_price': self.strike[:n],
+            'expiry': self.expiry[:n],
+        })
+
+
+# Ids are shared by everything in the process that works on the same market data
+# (Simulator, BatchSimulator, optimizer workers reusing one DataFrame)
+DEFAULT_REGISTRY = InstrumentRegistry()
+
+
+class PriceBook:
+    """
+    Last price per instrument and the time it was set, stored in lists indexed by instrument id.
+
+    Behaves like the {symbol: price} dict Simulator.currentPrice used to be (get, [], in,
+    items), while the replay loop writes `values[instrument_id] = price` and
+    `times[instrument_id] = time` directly. NaN marks an instrument that has not printed yet.
+
+    Option candles are sparse, so a last price can be hours old. With `max_age`, a price set
+    more than `max_age` before `clock()` is stale: isStale()/age() report it, and with the
+    STALE_MISSING policy get() and [] treat it as missing.
+
+    Args:
+        instruments (InstrumentRegistry): Registry the ids refer to.
+        max_age (datetime.timedelta, optional): Age after which a price is stale. None: never.
+        stale_policy (str): One of STALE_POLICIES.
+        clock (callable, optional): Returns the current (simulation) time.
+    """
+
+    def __init__(self, instruments, max_age=None, stale_policy=STALE_KEEP, clock=None):
+        if stale_policy not in STALE_POLICIES:
+            raise ValueError(f"Unknown stale price policy {stale_policy!r}; expected one of {STALE_POLICIES}")
+        self.instruments = instruments
+        self.values = []
+        self.times = []
+        self.max_age = max_age
+        self.stale_policy = stale_policy
+        self.clock = clock
+
+    def reserve(self, size):
+        """Makes room for ids below `size`. Extends in place, so references to `values`/`times` stay valid."""
+        missing = size - len(self.values)
+        if missing > 0:
+            self.values.extend([np.nan] * missing)
+            self.times.extend([None] * missing)
+
+    def snapshot(self):
+        """(values, times) copies, for checkpoints."""
+        return list(self.values), list(self.times)
+
+    def restore(self, state):
+        """Resumes from snapshot(). The lists are refilled in place, so references to them stay valid."""
+        self.values[:], self.times[:] = state
+
+    def _stale(self, instrument_id, now=None):
+        if self.max_age is None:
+            return False
+        now = self.clock() if now is None and self.clock is not None else now
+        updated = self.times[instrument_id]
+        return now is not None and updated is not None and now - updated > self.max_age
+
+    def get(self, symbol, default=None):
+        instrument_id = self.instruments.ids.get(symbol)
+        if instrument_id is None or instrument_id >= len(self.values):
+            return default
+        return self.getById(instrument_id, default)
+
+    def getById(self, instrument_id, default=None):
+        price = self.values[instrument_id] if instrument_id < len(self.values) else np.nan
+        if price != price or (self.stale_policy == STALE_MISSING and self._stale(instrument_id)):
+            return default
+        return price
+
+    def lastUpdate(self, symbol):
+        """Time `symbol`'s price was last set, or None if it has not printed."""
+        instrument_id = self.instruments.ids.get(symbol)
+        if instrument_id is None or instrument_id >= len(self.times):
+            return None
+        return self.times[instrument_id]
+
+    def age(self, symbol, now=None):
+        """How long ago `symbol` last printed, as of `now` (default: clock()); None if unknown."""
+        updated = self.lastUpdate(symbol)
+        now = self.clock() if now is None and self.clock is not None else now
+        return None if updated is None or now is None else now - updated
+
+    def isStale(self, symbol, now=None):
+        """True if `symbol` has a price older than max_age (False without max_age or a price)."""
+        instrument_id = self.instruments.ids.get(symbol)
+        if instrument_id is None or instrument_id >= len(self.times):
+            return False
+        return self._stale(instrument_id, now)
+
+    def __getitem__(self, symbol):
+        price = self.get(symbol)
+        if price is None:
+            raise KeyError(symbol)
+        return price
+
+    def __setitem__(self, symbol, price):
+        instrument_id = self.instruments.intern(symbol)
+        self.reserve(instrument_id + 1)
+        self.values[instrument_id] = price
+        self.times[instrument_id] = self.clock() if self.clock is not None else None
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
+
+    def __iter__(self):
+        symbols = self.instruments.symbols
+        return (symbols[i] for i, price in enumerate(self.values) if price == price)
+
+    def __len__(self):
+        return sum(1 for price in self.values if price == price)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        symbols = self.instruments.symbols
+        return [(symbols[i], price) for i, price in enumerate(self.values) if price == price]
+
+    def array(self, size=None):
+        """Prices as a float64 array indexed by id (0 where an instrument has not printed)."""
+        size = len(self.values) if size is None else size
+        self.reserve(size)
+        return np.nan_to_num(np.array(self.values[:size], dtype=np.float64), nan=0.0)
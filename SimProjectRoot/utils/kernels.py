@@ -0,0 +1,27 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Optional: without Numba the kernels run as plain Python
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+def compile_kernel(fn):
+    """
+    `fn` compiled with Numba (nopython mode, cached on disk) when it is installed, else `fn`
+    itself. Kernels must stick to what Numba compiles: scalars, NumPy arrays and loops, no
+    Python objects.
+    """
+    return njit(cache=True)(fn) if NUMBA_AVAILABLE else fn
+
+
+def kernel_inputs(*arrays):
+    """
+    The input arrays as the kernels take them: contiguous NumPy arrays for Numba; Python lists
+    for the interpreted fallback, which indexes them several times faster than NumPy arrays.
+    """
+    if NUMBA_AVAILABLE:
+        return tuple(np.ascontiguousarray(array) for array in arrays)
+    return tuple(np.asarray(array).tolist() for array in arrays)
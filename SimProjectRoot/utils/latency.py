@@ -0,0 +1,81 @@
+import math
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram, cheap enough to record every market event.
+
+    Buckets are `buckets_per_octave` per doubling of the latency in microseconds (8 gives
+    ~9% wide buckets), from 1 us up to 2**max_octaves us; quantiles are reported as the
+    upper edge of their bucket. Count, sum, min and max are exact.
+
+    Usage:
+        hist = LatencyHistogram('event')
+        start = time.perf_counter()
+        ...
+        hist.record(time.perf_counter() - start)
+        print(hist.format())
+    """
+
+    def __init__(self, name='', buckets_per_octave=8, max_octaves=32):
+        self.name = name
+        self.buckets_per_octave = buckets_per_octave
+        self.counts = [0] * (buckets_per_octave * max_octaves + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Adds one latency sample, in seconds."""
+        micros = seconds * 1e6
+        index = int(math.log2(micros) * self.buckets_per_octave) + 1 if micros > 1.0 else 0
+        counts = self.counts
+        counts[index if index < len(counts) else -1] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Adds the samples of another histogram with the same bucket layout."""
+        if other.buckets_per_octave != self.buckets_per_octave or len(other.counts) != len(self.counts):
+            raise ValueError("Histograms have different bucket layouts")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """Latency (seconds) below which a fraction `q` of the samples fall; None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                upper = 2 ** (index / self.buckets_per_octave) * 1e-6
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self):
+        """dict of count and mean/p50/p90/p99/p99.9/max latencies in milliseconds."""
+        if not self.count:
+            return {'count': 0}
+        result = {'count': self.count, 'mean_ms': self.total / self.count * 1e3}
+        for label, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p99.9', 0.999)):
+            result[f'{label}_ms'] = self.quantile(q) * 1e3
+        result['max_ms'] = self.max * 1e3
+        return result
+
+    def format(self):
+        """One-line summary, e.g. "event: n=2885 mean 0.021 ms p50 0.016 ... max 1.204 ms"."""
+        summary = self.summary()
+        if not summary['count']:
+            return f"{self.name}: no samples"
+        stats = ' '.join(f"{key[:-3]} {value:.3f}" for key, value in summary.items() if key != 'count')
+        return f"{self.name}: n={summary['count']} {stats} ms"
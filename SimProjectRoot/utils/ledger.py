@@ -0,0 +1,132 @@
+import heapq
+
+from utils.symbols import parse_option_symbol
+
+
+def _symbol_expiry(symbol):
+    parsed = parse_option_symbol(symbol)
+    return parsed[3] if parsed is not None else None
+
+
+class PositionLedger:
+    """
+    Incremental position and P&L ledger.
+
+    Keeps running totals of cash (sell value - buy value) and market value (quantity * mark)
+    over the open symbols, so the total P&L is available after every event in O(1). Fills and
+    price marks only touch the symbol that changed. Expired option contracts are settled at
+    their last mark and moved into `realizedPnl`, so the set of tracked symbols does not keep
+    growing across expiries.
+
+    The total always equals what Simulator.printPnl used to recompute from scratch:
+        sum over symbols of sellValue - buyValue + currQuantity * currentPrice
+
+    Positions are keyed by whatever identifies an instrument to the caller: symbol strings by
+    default, or instrument ids with `expiry_of=registry.expiry_date` (see utils.instruments).
+
+    With `group_of`, the book is also split into sub-books (e.g. one per underlying):
+    groupPnl() sums the open positions per group on demand, so the per-event updates cost
+    the same as for a single book.
+
+    Args:
+        expiry_of (callable, optional): key -> expiry datetime.date, or None for instruments
+                                        that never expire. Defaults to parsing option symbols.
+        group_of (callable, optional): key -> sub-book name, e.g. registry.underlying_name.
+    """
+
+    def __init__(self, expiry_of=None, group_of=None):
+        self.expiry_of = expiry_of or _symbol_expiry
+        self.group_of = group_of
+        self.positions = {}       # key -> [quantity, cash, mark_price]
+        self.cash = 0.0           # Sum of cash over tracked symbols
+        self.marketValue = 0.0    # Sum of quantity * mark_price over tracked symbols
+        self.realizedPnl = 0.0    # Settled P&L of evicted (expired) contracts
+        self.realizedByGroup = {} # Settled P&L of evicted contracts per group (with group_of)
+        self._expiries = []       # Heap of (expiry_date, key) for tracked option contracts
+
+    def onFill(self, symbol, quantity, cash_flow, mark_price):
+        """
+        Books a fill.
+
+        Args:
+            symbol: Traded instrument (symbol or instrument id).
+            quantity (float): Signed quantity (+ for BUY, - for SELL).
+            cash_flow (float): Signed cash (- trade value for BUY, + trade value for SELL).
+            mark_price (float): Current mark of the symbol (0 if it has never printed).
+        """
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = [0.0, 0.0, mark_price]
+            expiry_date = self.expiry_of(symbol)
+            if expiry_date is not None:
+                heapq.heappush(self._expiries, (expiry_date, symbol))
+
+        old_quantity, _, old_mark = position
+        position[0] = old_quantity + quantity
+        position[1] += cash_flow
+        position[2] = mark_price
+        self.cash += cash_flow
+        self.marketValue += position[0] * mark_price - old_quantity * old_mark
+
+    def mark(self, symbol, price):
+        """Updates the mark of a tracked symbol. Callers can skip untracked symbols via `symbol in ledger.positions`."""
+        position = self.positions.get(symbol)
+        if position is not None:
+            self.marketValue += position[0] * (price - position[2])
+            position[2] = price
+
+    def symbolPnl(self, symbol):
+        """P&L of one tracked symbol (cash plus marked position value)."""
+        quantity, cash, mark_price = self.positions[symbol]
+        return cash + quantity * mark_price
+
+    def totalPnl(self):
+        """Realized P&L of evicted contracts plus cash and market value of the tracked symbols."""
+        return self.realizedPnl + self.cash + self.marketValue
+
+    def groupPnl(self):
+        """
+        P&L per group (see `group_of`), as a dict; the values add up to totalPnl().
+        Without group_of everything is in one group, None.
+        """
+        pnl = dict(self.realizedByGroup) if self.group_of is not None else {None: self.realizedPnl}
+        for symbol, (quantity, cash, mark_price) in self.positions.items():
+            group = self.group_of(symbol) if self.group_of is not None else None
+            pnl[group] = pnl.get(group, 0.0) + cash + quantity * mark_price
+        return pnl
+
+    def snapshot(self):
+        """Positions and running totals, for checkpoints (expiry_of/group_of come from the constructor)."""
+        return {
+            'positions': self.positions, 'cash': self.cash, 'marketValue': self.marketValue,
+            'realizedPnl': self.realizedPnl, 'realizedByGroup': self.realizedByGroup, 'expiries': self._expiries,
+        }
+
+    def restore(self, state):
+        """Resumes from snapshot()."""
+        self.positions = state['positions']
+        self.cash = state['cash']
+        self.marketValue = state['marketValue']
+        self.realizedPnl = state['realizedPnl']
+        self.realizedByGroup = state['realizedByGroup']
+        self._expiries = state['expiries']
+
+    def evictExpired(self, date):
+        """
+        Settles every option contract whose expiry date is before `date` at its last mark.
+
+        Also re-sums the running totals over the remaining symbols, so floating point drift
+        from the incremental updates cannot build up across days.
+        """
+        expiries = self._expiries
+        while expiries and expiries[0][0] < date:
+            _, symbol = heapq.heappop(expiries)
+            settled = self.symbolPnl(symbol)
+            self.realizedPnl += settled
+            if self.group_of is not None:
+                group = self.group_of(symbol)
+                self.realizedByGroup[group] = self.realizedByGroup.get(group, 0.0) + settled
+            del self.positions[symbol]
+
+        self.cash = sum(position[1] for position in self.positions.values())
+        self.marketValue = sum(position[0] * position[2] for position in self.positions.values())
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Queue overflow policies of CandleFeed
+BLOCK = 'block'              # Stop reading the socket until there is room: the server is slowed down
+DROP_OLDEST = 'drop_oldest'  # Keep reading and discard the oldest queued candle
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST)
+
+
+def candle_message(time_us, symbol, open_price, high, low, close, volume, resolution='5m'):
+    """
+    Feed message of one candle, in the shape of Delta Exchange's candlestick websocket channel.
+
+    `time_us` is the candle start as unix microseconds; a NaN volume is sent as null.
+    """
+    return {
+        'type': f'candlestick_{resolution}', 'symbol': symbol, 'candle_start_time': time_us,
+        'open': open_price, 'high': high, 'low': low, 'close': close,
+        'volume': volume if volume == volume else None,
+    }
+
+
+def parse_candle(message):
+    """Candle message -> (time, symbol, open, high, low, close, volume), time as a naive UTC datetime."""
+    volume = message.get('volume')
+    return (
+        _EPOCH + timedelta(microseconds=message['candle_start_time']),
+        message['symbol'],
+        float(message['open']), float(message['high']), float(message['low']), float(message['close']),
+        float('nan') if volume is None else float(volume),
+    )
+
+
+class ReplayFeedServer:
+    """
+    Local stand-in for a websocket candle feed: replays a DataFrame of bars over TCP.
+
+    Every connection receives the bars in time order as newline-delimited JSON messages (see
+    candle_message), followed by {"type": "end"}. The server awaits the socket's drain() after
+    every timestamp, so a client that stops reading slows the replay down (TCP backpressure)
+    instead of making the server buffer without bound.
+
+    Args:
+        df (pd.DataFrame): Time-sorted bars with 'time', 'symbol', 'price' (close) and optionally
+                           'open', 'high', 'low', 'volume' columns, e.g. Simulator.df.
+        speed (float, optional): Replay speed relative to the bars' timestamps (60 = one hour
+                                 of data per minute). None sends as fast as the client reads.
+
+    Usage:
+        async with ReplayFeedServer(sim.df) as server:
+            feed = CandleFeed(server.host, server.port)
+    """
+
+    def __init__(self, df, host='127.0.0.1', port=0, speed=None, resolution='5m'):
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.resolution = resolution
+        self.server = None
+        times = df['time'].to_numpy(dtype='datetime64[us]').astype(np.int64)
+        price = df['price'].to_numpy(dtype=np.float64)
+        bar = {name: df[name].to_numpy(dtype=np.float64) if name in df else price for name in ('open', 'high', 'low')}
+        volume = df['volume'].to_numpy(dtype=np.float64) if 'volume' in df else np.full(len(df), np.nan)
+        self._rows = list(zip(times.tolist(), df['symbol'].astype(str).tolist(), bar['open'].tolist(),
+                              bar['high'].tolist(), bar['low'].tolist(), price.tolist(), volume.tolist()))
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.host, self.port = self.server.sockets[0].getsockname()[:2]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _serve(self, reader, writer):
+        try:
+            previous = None
+            for row in self._rows:
+                time_us = row[0]
+                if previous is not None and time_us != previous:
+                    await writer.drain()
+                    if self.speed:
+                        await asyncio.sleep((time_us - previous) / 1e6 / self.speed)
+                previous = time_us
+                writer.write(json.dumps(candle_message(*row, resolution=self.resolution)).encode() + b'\n')
+            writer.write(b'{"type": "end"}\n')
+            await writer.drain()
+        except ConnectionError:
+            pass  # Client went away
+        finally:
+            writer.close()
+
+
+class CandleFeed:
+    """
+    Async client of a newline-delimited JSON candle feed (ReplayFeedServer, or a bridge from an
+    exchange websocket speaking the same messages).
+
+    A reader task parses messages into a bounded queue; iterating the feed yields
+    (received, candle) pairs, where `received` is the time.perf_counter() at which the message
+    came off the socket and `candle` is parse_candle()'s tuple. The queue bound is the
+    backpressure point: with BLOCK the reader stops reading when the consumer falls behind; with
+    DROP_OLDEST it keeps up with the socket and drops the stalest candles (counted in `dropped`).
+
+    Args:
+        host (str), port (int): Feed address.
+        maxsize (int): Queue capacity in messages.
+        overflow (str): One of OVERFLOW_POLICIES.
+    """
+
+    def __init__(self, host, port, maxsize=1024, overflow=BLOCK):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; expected one of {OVERFLOW_POLICIES}")
+        self.host = host
+        self.port = port
+        self.overflow = overflow
+        self.queue = asyncio.Queue(maxsize)
+        self.received = 0
+        self.dropped = 0
+        self.high_water = 0
+        self._task = None
+
+    async def _read(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        queue = self.queue
+        try:
+            async for line in reader:
+                received = time.perf_counter()
+                message = json.loads(line)
+                kind = message.get('type', '')
+                if kind == 'end':
+                    break
+                if not kind.startswith('candlestick'):
+                    continue
+                self.received += 1
+                item = (received, parse_candle(message))
+                if self.overflow == BLOCK:
+                    await queue.put(item)
+                else:
+                    if queue.full():
+                        queue.get_nowait()
+                        self.dropped += 1
+                    queue.put_nowait(item)
+                if queue.qsize() > self.high_water:
+                    self.high_water = queue.qsize()
+        finally:
+            writer.close()
+            await queue.put(None)  # End of feed
+
+    def __aiter__(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._read())
+        return self
+
+    async def __anext__(self):
+        item = await self.queue.get()
+        if item is None:
+            await self._task  # Surfaces connection errors
+            raise StopAsyncIteration
+        return item
+
+    def stats(self):
+        return {'received': self.received, 'dropped': self.dropped, 'queue_high_water': self.high_water,
+                'queue_size': self.queue.maxsize}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import pandas as pd
+
+    from utils.dayStream import iter_day_frames
+
+    parser = argparse.ArgumentParser(description="Replay day folders as a local candle feed.")
+    parser.add_argument('--data-path', default='data/')
+    parser.add_argument('--start', default='2025-05-19')
+    parser.add_argument('--end', default='2025-05-25')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--speed', type=float, default=None, help="Replay speed (60 = an hour per minute)")
+    args = parser.parse_args()
+
+    frames = list(iter_day_frames(datetime.strptime(args.start, '%Y-%m-%d'), datetime.strptime(args.end, '%Y-%m-%d'),
+                                  args.data_path))
+    data = pd.concat(frames, ignore_index=True).sort_values('time', kind='stable')
+
+    async def serve():
+        server = await ReplayFeedServer(data, port=args.port, speed=args.speed).start()
+        print(f"Replaying {len(data)} candles on {server.host}:{server.port}")
+        await server.server.serve_forever()
+
+    asyncio.run(serve())
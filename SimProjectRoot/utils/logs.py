@@ -0,0 +1,42 @@
+import logging
+import sys
+
+# Root of the simulator's loggers ('sim.strategy', 'sim.simulator', ...)
+LOGGER_NAME = 'sim'
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time, so contextlib.redirect_stdout still captures it."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def get_logger(name=None):
+    """The 'sim' logger, or its child 'sim.<name>'."""
+    return logging.getLogger(f'{LOGGER_NAME}.{name}' if name else LOGGER_NAME)
+
+
+def set_level(level):
+    """Sets the level of every simulator logger: a logging level or its name ('DEBUG', 'INFO', 'WARNING', ...)."""
+    get_logger().setLevel(level.upper() if isinstance(level, str) else level)
+
+
+# Messages print to stdout exactly as the print() calls they replaced did (no level or logger
+# prefix). At the default INFO level nothing changes; at WARNING the per-trade and per-day
+# messages are skipped without even formatting them.
+_root = get_logger()
+if not _root.handlers:
+    _handler = _StdoutHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    _root.addHandler(_handler)
+    _root.setLevel(logging.INFO)
+    _root.propagate = False
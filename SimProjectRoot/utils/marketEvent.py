@@ -0,0 +1,80 @@
+import numpy as np
+
+from utils.instruments import DEFAULT_REGISTRY
+
+
+class MarketEvent:
+    """
+    Lightweight market data record handed to Strategy.onMarketData.
+
+    Replaces the pandas Series that DataFrame.iterrows() used to build for every candle.
+    Fields are plain attributes (event.time, event.price, ...), and __getitem__ is kept
+    so strategies written against iterrows() rows (row['time'], row['price']) keep working.
+    `instrument_id` is the symbol's id in the simulator's InstrumentRegistry; `price` is the
+    bar's close and open/high/low/volume the rest of the bar (volume is NaN if unknown).
+    """
+
+    __slots__ = ('time', 'symbol', 'price', 'strike_price', 'option_type', 'instrument_id',
+                 'open', 'high', 'low', 'volume')
+
+    def __init__(self, time, symbol, price, strike_price=0.0, option_type='', instrument_id=None,
+                 open=None, high=None, low=None, volume=float('nan')):
+        self.time = time
+        self.symbol = symbol
+        self.price = price
+        self.strike_price = strike_price
+        self.option_type = option_type
+        self.instrument_id = instrument_id
+        self.open = price if open is None else open
+        self.high = price if high is None else high
+        self.low = price if low is None else low
+        self.volume = volume
+
+    def __getitem__(self, key):
+        # Compatibility shim for row['column'] style access
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return (f"MarketEvent(time={self.time}, symbol={self.symbol!r}, price={self.price}, "
+                f"strike_price={self.strike_price}, option_type={self.option_type!r})")
+
+
+def build_event_columns(df, instruments=None):
+    """
+    Converts the simulator DataFrame into the columnar arrays used by the replay loop.
+
+    Args:
+        df (pd.DataFrame): Sorted market data with 'time', 'symbol', 'price',
+                           'strike_price' and 'option_type' columns, and optionally the
+                           bar's 'open', 'high', 'low' (default: price) and 'volume' (NaN).
+        instruments (InstrumentRegistry, optional): Registry the ids refer to. Defaults to
+                                                    the process-wide DEFAULT_REGISTRY.
+
+    Returns:
+        dict: NumPy arrays keyed by column name, plus:
+              'day'          - int64 day number of every row (for cheap date rollover checks)
+              'instrument_id'- int32 instrument id of every row
+              'symbols'      - array of the registry's symbols, indexable by instrument id
+    """
+    instruments = DEFAULT_REGISTRY if instruments is None else instruments
+    times = df['time'].to_numpy(dtype='datetime64[ns]')
+    instrument_ids = instruments.ids_for(df['symbol'])
+    price = df['price'].to_numpy(dtype=np.float64)
+    return {
+        'time': times,
+        'day': times.astype('datetime64[D]').astype(np.int64),
+        'instrument_id': instrument_ids,
+        'symbols': np.asarray(instruments.symbols, dtype=object),
+        'price': price,
+        'strike_price': df['strike_price'].to_numpy(dtype=np.float64),
+        'option_type': df['option_type'].to_numpy(dtype=object),
+        **{name: df[name].to_numpy(dtype=np.float64) if name in df else price
+           for name in ('open', 'high', 'low')},
+        'volume': df['volume'].to_numpy(dtype=np.float64) if 'volume' in df else np.full(len(df), np.nan),
+    }
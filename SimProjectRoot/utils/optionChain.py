@@ -0,0 +1,232 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+from utils.instruments import DEFAULT_REGISTRY, KIND_NAMES
+from utils.symbols import DEFAULT_UNDERLYING
+
+
+class ChainSide:
+    """
+    One side (calls or puts) of the option chain for a single (date, expiry).
+
+    Attributes:
+        strikes (np.ndarray): Strike prices, sorted ascending.
+        symbols (list): Option symbols aligned with `strikes`.
+        first_times (np.ndarray): int64 ns timestamp of each symbol's first bar on that date.
+        series (dict): symbol -> (times, prices) of that symbol's bars on that date, time-sorted
+                       (arrays, or lists once append() has extended them).
+    """
+
+    __slots__ = ('strikes', 'symbols', 'first_times', 'series', '_listed_mask')
+
+    def __init__(self, strikes, symbols, first_times, series):
+        self.strikes = strikes
+        self.symbols = symbols
+        self.first_times = first_times
+        self.series = series
+        self._listed_mask = None  # (listed set, mask of self.symbols in it) from the last lookup
+
+    def listed_mask(self, listed):
+        """Boolean mask of the symbols in `listed`, cached for as long as the same set object is passed."""
+        cached = self._listed_mask
+        if cached is None or cached[0] is not listed:
+            mask = np.fromiter((s in listed for s in self.symbols), dtype=bool, count=len(self.symbols))
+            cached = self._listed_mask = (listed, mask)
+        return cached[1]
+
+    def closest(self, futures_price, price_deviation_percent, as_of=None, listed=None):
+        """
+        Binary-searches the strike closest to `futures_price`.
+
+        Returns the symbol, or None if no strike is within `price_deviation_percent`.
+        Ties are broken by the smaller symbol, matching the order the old DataFrame scan used.
+        If `listed` (a set of symbols) is given, other contracts are not candidates; pass the same
+        set object on every call (SymbolUniverse.symbols does) so its mask is built only once.
+        """
+        strikes = self.strikes
+        symbols = self.symbols
+        if as_of is not None or listed is not None:
+            # Only contracts that have already printed by `as_of` / that are listed
+            if as_of is None:
+                keep = self.listed_mask(listed)
+            else:
+                keep = self.first_times <= as_of
+                if listed is not None:
+                    keep &= self.listed_mask(listed)
+            strikes = strikes[keep]
+            symbols = [s for s, ok in zip(symbols, keep) if ok]
+
+        n = len(strikes)
+        if n == 0:
+            return None
+
+        i = int(np.searchsorted(strikes, futures_price))
+        best = None
+        for j in range(max(i - 1, 0), min(i + 1, n)):
+            candidate = (abs(strikes[j] - futures_price), symbols[j], strikes[j])
+            if best is None or candidate[:2] < best[:2]:
+                best = candidate
+
+        distance, symbol, strike = best
+        if strike == 0 or distance / futures_price > price_deviation_percent:
+            return None
+        return symbol
+
+    def append(self, symbol, strike, time, price):
+        """
+        Adds one bar of `symbol` at `time` (int64 ns, not before its previous bar). A new symbol
+        is inserted in strike order, O(strikes); a bar of a known one is an O(1) append.
+        """
+        series = self.series.get(symbol)
+        if series is None:
+            lo = int(np.searchsorted(self.strikes, strike, side='left'))
+            hi = int(np.searchsorted(self.strikes, strike, side='right'))
+            i = lo + bisect_left(self.symbols[lo:hi], symbol)  # Same strike: by symbol, as add() sorts
+            self.strikes = np.insert(self.strikes, i, strike)
+            self.symbols.insert(i, symbol)
+            self.first_times = np.insert(self.first_times, i, time)
+            self.series[symbol] = ([time], [price])
+            self._listed_mask = None
+            return
+        times, prices = series
+        if not isinstance(times, list):
+            times, prices = times.tolist(), prices.tolist()
+            self.series[symbol] = (times, prices)
+        times.append(time)
+        prices.append(price)
+
+    def latest_price(self, symbol, as_of):
+        """Returns the last close of `symbol` at or before `as_of` (int64 ns), or None."""
+        times, prices = self.series.get(symbol, (None, None))
+        if times is None:
+            return None
+        i = bisect_right(times, as_of)
+        return float(prices[i - 1]) if i else None
+
+
+class OptionChainIndex:
+    """
+    Precomputed option chain snapshots, one index per underlying keyed by (date, expiry_date).
+
+    Built once from the simulator DataFrame so that ATM lookups are a binary search over
+    one day's sorted strikes instead of a scan of the whole backtest. Underlyings and expiries
+    come from the InstrumentRegistry, so no symbol is parsed more than once per process. Every
+    (date, expiry_date) present in the data is indexed, so any number of concurrent expiries
+    per underlying can be searched.
+    """
+
+    def __init__(self, df=None, instruments=None):
+        self.instruments = DEFAULT_REGISTRY if instruments is None else instruments
+        self.chains = {}  # underlying -> {(date, expiry_date) -> {'call': ChainSide, 'put': ChainSide}}
+        if df is not None:
+            self.add(df)
+
+    def add(self, df):
+        """Indexes the option rows of `df`. Rows for an already indexed (date, expiry) replace it."""
+        options = df[df['option_type'].isin(['call', 'put'])]
+        if options.empty:
+            return
+
+        # Underlying and expiry per row from the registry's typed arrays instead of parsing every symbol
+        symbol_codes, unique_symbols = pd.factorize(options['symbol'])
+        unique_ids = self.instruments.intern_many(unique_symbols)
+        expiries = self.instruments.expiry[unique_ids]
+        underlyings = self.instruments.underlying_names(unique_ids)
+
+        times = options['time'].to_numpy(dtype='datetime64[ns]')
+        frame = pd.DataFrame({
+            'underlying': underlyings[symbol_codes],
+            'date': times.astype('datetime64[D]'),
+            'expiry': expiries[symbol_codes],
+            'option_type': options['option_type'].to_numpy(),
+            'symbol': options['symbol'].to_numpy(),
+            'strike': options['strike_price'].to_numpy(dtype=np.float64),
+            't': times.astype(np.int64),
+            'price': options['price'].to_numpy(dtype=np.float64),
+        })
+        frame = frame[frame['expiry'].notna()]
+        frame = frame.sort_values(['underlying', 'date', 'expiry', 'option_type', 'strike', 'symbol', 't'], kind='stable')
+
+        for (underlying, date, expiry, option_type), side in frame.groupby(['underlying', 'date', 'expiry', 'option_type'],
+                                                                          sort=False):
+            by_symbol = side.groupby('symbol', sort=False)
+            firsts = by_symbol.first()
+            series = {
+                symbol: (rows['t'].to_numpy(), rows['price'].to_numpy())
+                for symbol, rows in by_symbol
+            }
+            chain = self.chains.setdefault(underlying, {}).setdefault((date.date(), expiry.date()), {})
+            chain[option_type] = ChainSide(
+                strikes=firsts['strike'].to_numpy(),
+                symbols=firsts.index.tolist(),
+                first_times=firsts['t'].to_numpy(),
+                series=series,
+            )
+
+    def append(self, instrument_id, time, price):
+        """
+        Indexes one option bar as it arrives, e.g. from a live feed (see paperTrading.py).
+
+        The bar goes to its (date, expiry) chain side without rebuilding anything, so a day of
+        bars costs O(bars + contracts * strikes) instead of add()'s full rebuild per update.
+        Bars must come in time order; futures and contracts without an expiry are ignored.
+
+        Args:
+            instrument_id (int): Id of the option in `instruments`.
+            time (int): Bar time as int64 ns.
+            price (float): Bar close.
+        """
+        instruments = self.instruments
+        option_type = KIND_NAMES[instruments.kind[instrument_id]]
+        expiry = instruments.expiry_date(instrument_id)
+        if option_type not in ('call', 'put') or expiry is None:
+            return
+        date = np.datetime64(time, 'ns').astype('datetime64[D]').astype(object)
+        chain = self.chains.setdefault(instruments.underlying_name(instrument_id), {}).setdefault((date, expiry), {})
+        side = chain.get(option_type)
+        if side is None:
+            side = chain[option_type] = ChainSide(np.empty(0), [], np.empty(0, dtype=np.int64), {})
+        side.append(instruments.symbols[instrument_id], float(instruments.strike[instrument_id]), time, price)
+
+    def underlyings(self):
+        """Underlyings with at least one indexed chain."""
+        return list(self.chains)
+
+    def expiries(self, date, underlying=DEFAULT_UNDERLYING):
+        """Sorted expiry dates of the chains of `underlying` that traded on `date`."""
+        return sorted(expiry for day, expiry in self.chains.get(underlying, {}) if day == date)
+
+    def get(self, date, expiry_date, option_type, underlying=DEFAULT_UNDERLYING):
+        """Returns the ChainSide for (date, expiry_date, option_type) of `underlying`, or None."""
+        return self.chains.get(underlying, {}).get((date, expiry_date), {}).get(option_type)
+
+    def closest_strikes(self, futures_price, date, expiry_date, price_deviation_percent=0.02, as_of=None, listed=None,
+                        underlying=DEFAULT_UNDERLYING):
+        """
+        Finds the closest ATM call and put for `futures_price` in the (date, expiry_date) chain of `underlying`.
+
+        Args:
+            futures_price (float): The current price of the underlying futures contract.
+            date (datetime.date): The simulation day.
+            expiry_date (datetime.date): The option expiry to search.
+            price_deviation_percent (float): Max relative distance between strike and futures price.
+            as_of (int, optional): int64 ns timestamp; if given, only contracts that printed
+                                   at or before it are considered.
+            listed (set, optional): If given, only these symbols are considered.
+            underlying (str): Underlying asset whose chain is searched, e.g. 'ETH'.
+
+        Returns:
+            tuple: (call_symbol, put_symbol), either of which may be None.
+        """
+        symbols = []
+        for option_type in ('call', 'put'):
+            side = self.get(date, expiry_date, option_type, underlying)
+            symbols.append(side.closest(futures_price, price_deviation_percent, as_of, listed) if side else None)
+        return tuple(symbols)
+
+    def latest_price(self, date, expiry_date, symbol, option_type, as_of, underlying=DEFAULT_UNDERLYING):
+        """Returns the last close of an option symbol at or before `as_of` (int64 ns), or None."""
+        side = self.get(date, expiry_date, option_type, underlying)
+        return side.latest_price(symbol, as_of) if side else None
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from utils.instruments import DEFAULT_REGISTRY
+
+
+def as_timedelta(value):
+    """
+    A max age or interval as a pd.Timedelta: numbers are minutes (as in config.price_max_age),
+    anything else goes to pd.Timedelta ('2h', timedelta, ...). None stays None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        return pd.Timedelta(minutes=float(value))
+    return pd.Timedelta(value)
+
+
+def _ns(time):
+    """int64 ns timestamp of a datetime / pd.Timestamp / np.datetime64."""
+    return np.datetime64(pd.Timestamp(time).to_datetime64(), 'ns').astype(np.int64)
+
+
+class AsOfPriceIndex:
+    """
+    Per-instrument price history for "price as of t" lookups.
+
+    The rows are grouped by instrument id and time-sorted within each instrument, so every
+    instrument's bars are a contiguous slice of `times`/`prices` starting at `offsets[id]`. A
+    lookup is one binary search (np.searchsorted) over that slice: O(log n) instead of
+    filtering the simulator DataFrame.
+
+    A bar counts as known at its own timestamp (time <= t), the same convention as the chain
+    snapshots' `as_of` in utils.optionChain.
+
+    Args:
+        df (pd.DataFrame): Market data with 'time', 'symbol' and 'price' columns.
+        instruments (InstrumentRegistry, optional): Registry the ids refer to. Defaults to
+                                                    the process-wide DEFAULT_REGISTRY.
+    """
+
+    def __init__(self, df, instruments=None):
+        self.instruments = DEFAULT_REGISTRY if instruments is None else instruments
+        ids = self.instruments.ids_for(df['symbol'])
+        times = df['time'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        # Stable within each instrument, so rows sharing a timestamp keep the replay order
+        order = np.lexsort((times, ids))
+        self.times = times[order]
+        self.prices = df['price'].to_numpy(dtype=np.float64)[order]
+        self.offsets = np.searchsorted(ids[order], np.arange(len(self.instruments) + 1))
+
+    def _slice(self, symbol):
+        instrument_id = self.instruments.ids.get(symbol)
+        if instrument_id is None or instrument_id + 1 >= len(self.offsets):
+            return 0, 0
+        return int(self.offsets[instrument_id]), int(self.offsets[instrument_id + 1])
+
+    def lookup(self, symbol, time, max_age=None):
+        """
+        Last bar of `symbol` at or before `time`.
+
+        Returns:
+            tuple: (bar time as pd.Timestamp, price), or None if `symbol` has not printed by
+                   `time` or its last bar is more than `max_age` old (a timedelta, offset
+                   string or number of minutes, see as_timedelta).
+        """
+        start, end = self._slice(symbol)
+        t = _ns(time)
+        i = start + int(np.searchsorted(self.times[start:end], t, side='right')) - 1
+        if i < start:
+            return None
+        if max_age is not None and t - self.times[i] > as_timedelta(max_age).value:
+            return None
+        return pd.Timestamp(self.times[i]), float(self.prices[i])
+
+    def priceAsOf(self, symbol, time, default=None, max_age=None):
+        """Price of `symbol`'s last bar at or before `time` (see lookup), or `default`."""
+        found = self.lookup(symbol, time, max_age)
+        return default if found is None else found[1]
+
+    def pricesAsOf(self, symbols, time, max_age=None):
+        """Prices of several symbols as of `time`, as a float64 array with NaN where unknown."""
+        t = _ns(time)
+        limit = None if max_age is None else as_timedelta(max_age).value
+        result = np.full(len(symbols), np.nan)
+        for k, symbol in enumerate(symbols):
+            start, end = self._slice(symbol)
+            i = start + int(np.searchsorted(self.times[start:end], t, side='right')) - 1
+            if i >= start and (limit is None or t - self.times[i] <= limit):
+                result[k] = self.prices[i]
+        return result
+
+    def history(self, symbol):
+        """All bars of `symbol` as (int64 ns times, prices) array views, time-sorted."""
+        start, end = self._slice(symbol)
+        return self.times[start:end], self.prices[start:end]
@@ -0,0 +1,155 @@
+import json
+import math
+import threading
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.downloader import RESOLUTION_SECONDS
+from utils.symbols import parse_option_symbol
+
+PRODUCT_STRIKES = range(80000, 130001, 200)
+
+
+def synthetic_candles(symbol, start, end, resolution='5m'):
+    """
+    Deterministic candles for `symbol` between unix seconds `start` and `end`, newest first like the API.
+
+    Futures wander around 105000; options are priced off that path with a crude time-value
+    term, so strike/expiry relationships look plausible without being realistic.
+    """
+    step = RESOLUTION_SECONDS[resolution]
+    seed = zlib.crc32(symbol.encode())
+    parsed = parse_option_symbol(symbol)
+    candles = []
+    for t in range(start - start % step, end, step):
+        if t < start:
+            continue
+        underlying = 105000 + 2500 * math.sin(t / 86400) + 300 * math.sin(t / 3600 + seed % 7)
+        if parsed is None:
+            price = underlying
+        else:
+            option_type, _, strike, _ = parsed
+            intrinsic = max(0.0, underlying - strike) if option_type == 'call' else max(0.0, strike - underlying)
+            price = intrinsic + 400 * math.exp(-abs(underlying - strike) / 3000)
+        candles.append({
+            'close': round(price, 1), 'high': round(price * 1.001, 1), 'low': round(price * 0.999, 1),
+            'open': round(price * (1 + ((seed + t) % 11 - 5) * 1e-4), 1), 'time': t, 'volume': (seed + t // step) % 50,
+        })
+    return candles[::-1]
+
+
+class StubCandleServer:
+    """
+    Local HTTP server mimicking Delta Exchange's /v2/history/candles and /v2/products
+    (option listings, paginated with meta.after) for downloader tests.
+
+    Args:
+        listed (callable, optional): symbol -> bool; unlisted symbols get an empty result and
+                                     are left out of /v2/products (which offers PRODUCT_STRIKES).
+                                     Defaults to every symbol being listed.
+        fail_every (int, optional): Answer every n-th request with `fail_status` to exercise retries.
+        fail_status (int): Status code of the injected failures.
+
+    Usage:
+        with StubCandleServer(fail_every=5) as server:
+            client = CandleClient(base_url=server.url, rate_limit=None)
+    """
+
+    def __init__(self, listed=None, fail_every=None, fail_status=429, host='127.0.0.1', port=0):
+        self.listed = listed or (lambda symbol: True)
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.requests = []  # (symbol, status) of every request served
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                symbol = query.get('symbol', '')
+                with server._lock:
+                    n = len(server.requests) + 1
+                    fail = server.fail_every and n % server.fail_every == 0
+                    status = server.fail_status if fail else 200
+                    if parsed.path.rstrip('/') == '/v2/products':
+                        pass
+                    elif parsed.path != '/v2/history/candles':
+                        status = 404
+                    elif not fail and (query.get('resolution') not in RESOLUTION_SECONDS
+                                       or 'start' not in query or 'end' not in query):
+                        status = 400
+                    server.requests.append((symbol, status))
+
+                if status == 200 and parsed.path.rstrip('/') == '/v2/products':
+                    body = server._products(query)
+                elif status == 200:
+                    result = (synthetic_candles(symbol, int(query['start']), int(query['end']), query['resolution'])
+                              if server.listed(symbol) else [])
+                    body = {'success': True, 'result': result}
+                else:
+                    body = {'success': False, 'error': {'code': status}}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                if status == 429:
+                    self.send_header('Retry-After', '0')
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _products(self, query):
+        underlying = query.get('underlying_asset_symbols', 'BTC')
+        expiry = datetime.strptime(query['expiry_date'], '%d-%m-%Y').strftime('%d%m%y')
+        symbols = [f"{char}-{underlying}-{strike}-{expiry}" for strike in PRODUCT_STRIKES for char in ('C', 'P')]
+        products = [{'symbol': symbol, 'contract_type': 'call_options' if symbol[0] == 'C' else 'put_options',
+                     'strike_price': symbol.split('-')[2]} for symbol in symbols if self.listed(symbol)]
+        offset = int(query.get('after', 0))
+        page_size = int(query.get('page_size', 100))
+        after = offset + page_size if offset + page_size < len(products) else None
+        return {'success': True, 'result': products[offset:offset + page_size],
+                'meta': {'after': str(after) if after else None}}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve synthetic /v2/history/candles data locally.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-every', type=int, default=None)
+    args = parser.parse_args()
+    stub = StubCandleServer(fail_every=args.fail_every, port=args.port)
+    print(f"Stub candles server on {stub.url}")
+    stub.httpd.serve_forever()
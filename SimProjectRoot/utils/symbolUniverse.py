@@ -0,0 +1,156 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.greeks import EXPIRY_TIME_UTC
+from utils.symbols import parse_option_symbol
+
+PRODUCTS_PATH = "/v2/products"
+
+
+class SymbolUniverse:
+    """
+    The option contracts actually listed per expiry, from the exchange's products endpoint.
+
+    Listings are cached as one JSON file per (underlying, expiry) under `cache_dir`. Expired
+    listings never change and are cached for good; live ones are re-fetched after `ttl`
+    seconds, since strikes get added as the market moves. Without a client (e.g. inside a
+    backtest) only the cache is read, and an expiry that was never fetched is unknown (None).
+
+    Args:
+        cache_dir (str): Directory of the per-expiry JSON files.
+        client (CandleClient, optional): Used to query the products endpoint.
+        underlying (str): Underlying asset symbol, e.g. 'BTC'.
+        ttl (float): Seconds a live expiry's listing stays valid.
+    """
+
+    def __init__(self, cache_dir, client=None, underlying='BTC', ttl=3600, page_size=500):
+        self.cache_dir = cache_dir
+        self.client = client
+        self.underlying = underlying
+        self.ttl = ttl
+        self.page_size = page_size
+        self._listings = {}  # expiry_date -> {'call': (strikes, symbols), 'put': (strikes, symbols)} or None
+        self._symbol_sets = {}  # expiry_date -> frozenset of the listed symbols
+
+    def _cache_file(self, expiry_date):
+        return os.path.join(self.cache_dir, f"{self.underlying}-{expiry_date.strftime('%d%m%y')}.json")
+
+    def _read_cache(self, expiry_date):
+        file_path = self._cache_file(expiry_date)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path) as f:
+            cached = json.load(f)
+        if not cached['expired'] and time.time() - cached['fetched_at'] > self.ttl and self.client is not None:
+            return None
+        return cached['symbols']
+
+    def _fetch(self, expiry_date):
+        """Queries every page of listed call/put contracts for one expiry. Returns the symbols, or None on failure."""
+        # Contracts trade until settlement at 12:00 UTC on the expiry date, so they are still live that morning
+        settlement = datetime.combine(expiry_date, EXPIRY_TIME_UTC, tzinfo=timezone.utc)
+        expired = datetime.now(timezone.utc) >= settlement
+        params = {
+            'contract_types': 'call_options,put_options',
+            'underlying_asset_symbols': self.underlying,
+            'expiry_date': expiry_date.strftime('%d-%m-%Y'),
+            'states': 'expired' if expired else 'live',
+            'page_size': self.page_size,
+        }
+        symbols = []
+        while True:
+            label = f"{self.underlying} products expiring {params['expiry_date']}"
+            body = self.client.get_json(PRODUCTS_PATH, params, label=label)
+            if body is None or not body.get('success', True):
+                return None
+            symbols.extend(item['symbol'] for item in body.get('result', []) if item.get('symbol'))
+            after = (body.get('meta') or {}).get('after')
+            if not after:
+                break
+            params['after'] = after
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._cache_file(expiry_date) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched_at': time.time(), 'expired': expired, 'symbols': symbols}, f)
+        os.replace(tmp_path, self._cache_file(expiry_date))
+        return symbols
+
+    def listing(self, expiry_date):
+        """
+        Listed contracts for `expiry_date` (datetime.date).
+
+        Returns:
+            dict: 'call' and 'put' -> (strikes np.ndarray ascending, symbols list aligned with it),
+                  or None if the listing is unknown.
+        """
+        if expiry_date in self._listings:
+            return self._listings[expiry_date]
+
+        symbols = self._read_cache(expiry_date)
+        if symbols is None and self.client is not None:
+            symbols = self._fetch(expiry_date)
+        if symbols is None:
+            return None  # Not cached: a later call may still fetch it
+
+        sides = {'call': [], 'put': []}
+        for symbol in symbols:
+            parsed = parse_option_symbol(symbol)
+            if parsed and parsed[1] == self.underlying and parsed[3] == expiry_date:
+                sides[parsed[0]].append((parsed[2], symbol))
+        listing = {}
+        for option_type, contracts in sides.items():
+            contracts.sort()
+            listing[option_type] = (np.array([c[0] for c in contracts], dtype=np.float64), [c[1] for c in contracts])
+        self._listings[expiry_date] = listing
+        return listing
+
+    def symbols(self, expiry_date):
+        """
+        Frozenset of listed call and put symbols for `expiry_date`, or None if unknown.
+
+        The same set object is returned on every call, so chain lookups can cache their masks on it.
+        """
+        if expiry_date in self._symbol_sets:
+            return self._symbol_sets[expiry_date]
+        listing = self.listing(expiry_date)
+        if listing is None:
+            return None
+        symbols = self._symbol_sets[expiry_date] = frozenset(listing['call'][1]) | frozenset(listing['put'][1])
+        return symbols
+
+    def contracts(self, expiry_date):
+        """Listed (symbol, option_type, strike) tuples for `expiry_date`, by strike; None if unknown."""
+        listing = self.listing(expiry_date)
+        if listing is None:
+            return None
+        return sorted(
+            ((symbol, option_type, strike) for option_type, (strikes, symbols) in listing.items()
+             for strike, symbol in zip(strikes.tolist(), symbols)),
+            key=lambda contract: (contract[2], contract[1]))
+
+    def closest_strikes(self, futures_price, expiry_date, price_deviation_percent=0.02):
+        """
+        Closest listed call and put to `futures_price`, without any market data.
+
+        Returns:
+            tuple: (call_symbol, put_symbol), either of which may be None.
+        """
+        listing = self.listing(expiry_date)
+        result = []
+        for option_type in ('call', 'put'):
+            strikes, symbols = listing[option_type] if listing else (np.empty(0), [])
+            if not len(strikes):
+                result.append(None)
+                continue
+            i = int(np.searchsorted(strikes, futures_price))
+            # Ties go to the smaller symbol, like ChainSide.closest()
+            j = min((k for k in (i - 1, i) if 0 <= k < len(strikes)),
+                    key=lambda k: (abs(strikes[k] - futures_price), symbols[k]))
+            within = abs(strikes[j] - futures_price) / futures_price <= price_deviation_percent
+            result.append(symbols[j] if within else None)
+        return tuple(result)
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+OPTION_TYPES = {'C': 'call', 'P': 'put'}
+
+# Underlying asset assumed wherever none is given (the original single-asset BTC setup)
+DEFAULT_UNDERLYING = 'BTC'
+
+
+def parse_option_symbol(symbol):
+    """
+    Parses an option symbol as produced by perp_futures_btc.py.
+
+    Args:
+        symbol (str): Option symbol in the form '<C|P>-<UNDERLYING>-<STRIKE>-<DDMMYY>',
+                      e.g. 'C-BTC-102400-220525'.
+
+    Returns:
+        tuple: (option_type, underlying, strike, expiry_date), e.g.
+               ('call', 'BTC', 102400.0, datetime.date(2025, 5, 22)),
+               or None if the symbol is not an option symbol (e.g. 'BTCUSDT').
+    """
+    parts = symbol.split('-')
+    if len(parts) != 4 or parts[0] not in OPTION_TYPES:
+        return None
+    try:
+        strike = float(parts[2])
+        expiry_date = datetime.strptime(parts[3], "%d%m%y").date()
+    except ValueError:
+        return None
+    return OPTION_TYPES[parts[0]], parts[1], strike, expiry_date
@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+
+from utils.dataCache import file_sha1
+
+# Bump when the manifest layout changes, so old manifests are rebuilt from the CSVs
+MANIFEST_VERSION = 1
+MANIFEST_NAME = '.manifest.json'
+
+
+def lines_checksum(lines, checksum=0):
+    """CRC32 over CSV data lines (without line terminators); pass the previous value to extend it."""
+    for line in lines:
+        checksum = zlib.crc32(line.encode() + b'\n', checksum)
+    return checksum
+
+
+def _unix_time(value):
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+
+class DayManifest:
+    """
+    What is already on disk for one data/YYYYMMDD folder, per symbol.
+
+    Each symbol entry records the file holding its rows, the number of rows, the last candle
+    time, a CRC32 over its CSV lines (extended on every append), and `synced_to`: the time up
+    to which the API has been asked. A symbol with `synced_to` at the end of the day and no
+    rows is known to have no listing for that day and is never requested again.
+
+    File fingerprints (size, mtime, sha1) guard against CSVs edited or replaced behind the
+    manifest's back; any mismatch rebuilds the manifest from the CSVs.
+    """
+
+    def __init__(self, folder, start, end, resolution):
+        self.folder = folder
+        self.start = start
+        self.end = end
+        self.resolution = resolution
+        self.symbols = {}  # symbol -> {'file', 'rows', 'last_time', 'checksum', 'synced_to'}
+        self.files = {}    # file name -> {'mtime_ns', 'size', 'sha1'}
+
+    @property
+    def path(self):
+        return os.path.join(self.folder, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, folder, start, end, resolution, step):
+        """Loads the folder's manifest, rebuilding it from the CSVs if it is missing, stale or for another window."""
+        manifest = cls(folder, start, end, resolution)
+        unlisted = {}
+        if os.path.exists(manifest.path):
+            with open(manifest.path) as f:
+                saved = json.load(f)
+            if (saved.get('version') == MANIFEST_VERSION and saved.get('start') == start
+                    and saved.get('end') == end and saved.get('resolution') == resolution):
+                manifest.symbols = saved['symbols']
+                manifest.files = saved['files']
+                if manifest._files_match():
+                    return manifest
+                # The CSVs changed, but which symbols had no listing is still known
+                unlisted = {s: entry for s, entry in manifest.symbols.items() if manifest.is_unlisted(s)}
+        manifest.rebuild(step)
+        for symbol, entry in unlisted.items():
+            manifest.symbols.setdefault(symbol, entry)
+        return manifest
+
+    def _fingerprint(self, name, with_hash=True):
+        file_path = os.path.join(self.folder, name)
+        stat = os.stat(file_path)
+        fingerprint = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        if with_hash:
+            fingerprint['sha1'] = file_sha1(file_path)
+        return fingerprint
+
+    def _csv_names(self):
+        return {name for name in os.listdir(self.folder) if name.endswith('.csv')} if os.path.isdir(self.folder) else set()
+
+    def _files_match(self):
+        # A CSV added to (or removed from) the folder, e.g. a new calls_/puts_ file, is a change too
+        if self._csv_names() != set(self.files):
+            return False
+        for name, old in self.files.items():
+            if not os.path.exists(os.path.join(self.folder, name)):
+                return False
+            current = self._fingerprint(name, with_hash=False)
+            if old['size'] != current['size']:
+                return False
+            if old['mtime_ns'] != current['mtime_ns'] and old['sha1'] != file_sha1(os.path.join(self.folder, name)):
+                return False
+        return True
+
+    def rebuild(self, step):
+        """
+        Re-derives every symbol entry by scanning the CSVs in the folder.
+
+        Without a record of what was requested, a symbol counts as synced up to one bar after
+        its last candle, and symbols absent from the files will be requested again.
+        """
+        self.symbols, self.files = {}, {}
+        for name in sorted(self._csv_names()):
+            # Every CSV is fingerprinted, even one without rows, so the folder listing matches it
+            self.files[name] = self._fingerprint(name)
+            with open(os.path.join(self.folder, name), newline='') as f:
+                lines = f.read().splitlines()
+            if not lines:
+                continue
+            header = next(csv.reader(lines[:1]))
+            if 'symbol' not in header or 'time' not in header:
+                continue
+            symbol_col, time_col = header.index('symbol'), header.index('time')
+            # Checksums cover the raw lines, as record() does; csv handles quoted fields
+            for line, fields in zip(lines[1:], csv.reader(lines[1:])):
+                entry = self.symbols.setdefault(fields[symbol_col], {
+                    'file': name, 'rows': 0, 'last_time': None, 'checksum': 0, 'synced_to': self.start})
+                t = _unix_time(fields[time_col])
+                entry['rows'] += 1
+                entry['last_time'] = t if entry['last_time'] is None else max(entry['last_time'], t)
+                entry['checksum'] = lines_checksum([line], entry['checksum'])
+                entry['synced_to'] = min(self.end, max(entry['synced_to'], t + step))
+
+    def fetch_start(self, symbol):
+        entry = self.symbols.get(symbol)
+        return self.start if entry is None else entry['synced_to']
+
+    def is_unlisted(self, symbol):
+        entry = self.symbols.get(symbol)
+        return entry is not None and entry['rows'] == 0 and entry['synced_to'] >= self.end
+
+    def record(self, symbol, file_name, lines, last_time, synced_to):
+        """Registers rows appended for `symbol` (`lines` are their CSV data lines) and the new sync point."""
+        entry = self.symbols.setdefault(symbol, {
+            'file': file_name, 'rows': 0, 'last_time': None, 'checksum': 0, 'synced_to': self.start})
+        if lines:
+            entry['file'] = file_name
+            entry['rows'] += len(lines)
+            entry['last_time'] = last_time
+            entry['checksum'] = lines_checksum(lines, entry['checksum'])
+        entry['synced_to'] = max(entry['synced_to'], synced_to)
+
+    def touch_file(self, file_name):
+        self.files[file_name] = self._fingerprint(file_name)
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        payload = {
+            'version': MANIFEST_VERSION, 'start': self.start, 'end': self.end, 'resolution': self.resolution,
+            'symbols': self.symbols, 'files': self.files,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.path)
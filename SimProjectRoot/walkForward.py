@@ -0,0 +1,235 @@
+# walkForward.py
+#
+# Walk-forward validation of the Strategy parameters (see optimizer.py for the one-shot sweep).
+# The date range is split into rolling train/test windows: every parameter set is evaluated on
+# the train window (one BatchSimulator pass), the best one is run on the following test window,
+# and the test windows' equity curves are stitched into one out-of-sample curve.
+# Windows run concurrently on a process pool. Each worker loads the whole date range once (from
+# the memory-mapped day cache) and slices its windows out of it, so overlapping windows share
+# the loaded data instead of reading their days again.
+#
+# Run from SimProjectRoot:
+#     python walkForward.py --train-days 3 --test-days 1
+#     python walkForward.py --train-days 3 --test-days 1 --anchored --search random --samples 100
+
+import argparse
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+import config
+from Simulator import Simulator
+from optimizer import (DEFAULT_GRID, DEFAULT_RANDOM_SPACE, grid_search_space, init_worker, load_market_data,
+                       random_search_space, run_batch_backtest, worker_market_data)
+from stats.riskStats import compute_risk_stats
+
+
+def walk_forward_windows(start_date, end_date, train_days, test_days, step_days=None, anchored=False):
+    """
+    Splits the days start_date..end_date (inclusive) into consecutive train/test windows.
+
+    Args:
+        start_date (datetime.datetime): First day.
+        end_date (datetime.datetime): Last day (inclusive).
+        train_days (int): Length of the (first) train window.
+        test_days (int): Length of every test window.
+        step_days (int, optional): Shift between windows; defaults to test_days, which makes the
+                                   test windows back to back.
+        anchored (bool): Keep every train window starting at start_date (expanding) instead of
+                         rolling it forward.
+
+    Returns:
+        list: Dicts with 'train_start', 'train_end', 'test_start', 'test_end' (ends exclusive,
+              all at midnight); the last test window ends the day after end_date.
+    """
+    step = timedelta(days=step_days or test_days)
+    first = datetime(start_date.year, start_date.month, start_date.day)
+    last = datetime(end_date.year, end_date.month, end_date.day) + timedelta(days=1)
+    windows = []
+    train_start, train_end = first, first + timedelta(days=train_days)
+    while train_end + timedelta(days=test_days) <= last:
+        windows.append({
+            'train_start': train_start, 'train_end': train_end,
+            'test_start': train_end, 'test_end': train_end + timedelta(days=test_days),
+        })
+        train_end += step
+        if not anchored:
+            train_start += step
+    return windows
+
+
+def _slice_days(df, start, end):
+    """Rows of the time-sorted `df` with start <= time < end; end=None runs to the end of the data."""
+    times = df['time'].to_numpy()
+    first = np.searchsorted(times, np.datetime64(start, 'ns'), side='left')
+    last = len(df) if end is None else np.searchsorted(times, np.datetime64(end, 'ns'), side='left')
+    return df.iloc[first:last].reset_index(drop=True)
+
+
+def run_window(window, param_sets, rank_by='final_pnl', last=False):
+    """
+    Optimizes on one train window and evaluates the winner on its test window.
+
+    The chain index of the whole loaded range is shared by both runs. Its snapshots are per
+    (date, expiry), so no window sees another day's chain; both runs also select strikes
+    point-in-time (Simulator.pointInTimeChain), among the contracts printed by the entry bar,
+    so the test window does not pick contracts that only print later in its day.
+
+    Args:
+        window (dict): As returned by walk_forward_windows.
+        param_sets (list): Candidate parameter dicts.
+        rank_by (str): Train result column the best parameter set is chosen by (descending).
+                       Sharpe and Sortino need train windows of many days to mean anything.
+        last (bool): The test window runs to the end of the loaded data (the last day folder
+                     extends past midnight).
+
+    Returns:
+        dict: The window, the chosen params, their train stats ('train_*'), and the test run's
+              'test_pnl_history', 'test_times' / 'test_equity' (equity curve) and 'test_trades'.
+    """
+    df, chain_index = worker_market_data()
+    train_df = _slice_days(df, window['train_start'], window['train_end'])
+    test_df = _slice_days(df, window['test_start'], None if last else window['test_end'])
+    if train_df.empty or test_df.empty:
+        raise ValueError(f"No market data in window {window}")
+
+    results = run_batch_backtest(param_sets, train_df, chain_index, point_in_time_chain=True)
+    scores = [result[rank_by] for result in results]
+    best = results[int(np.argmax([-np.inf if score != score else score for score in scores]))]
+    names = list(dict.fromkeys(name for params in param_sets for name in params))
+    params = {name: best[name] for name in names}
+
+    sim = Simulator(strategy_params=params)
+    sim.df = test_df
+    sim.chainIndex = chain_index
+    sim.pointInTimeChain = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.startSimulation()
+
+    if sim.equityRecorder is not None:
+        times, equity = sim.equityRecorder.toArrays()
+    else:
+        times, equity = None, np.asarray(sim.pnl_history, dtype=np.float64)
+    return {
+        **window,
+        'params': params,
+        **{f'train_{name}': value for name, value in best.items() if name not in names},
+        'test_pnl_history': list(sim.pnl_history),
+        'test_times': times,
+        'test_equity': equity,
+        'test_trades': len(sim.strategy.trades),
+    }
+
+
+def stitch_equity(window_results):
+    """
+    Chains the test windows' equity curves: each one starts where the previous one ended.
+
+    Returns:
+        tuple: (pd.DataFrame with 'time' (if the curves have times), 'equity', 'window' columns,
+                np.ndarray of the stitched per-day P&L history)
+    """
+    frames, daily = [], []
+    offset = 0.0
+    for i, result in enumerate(window_results):
+        equity = np.asarray(result['test_equity'], dtype=np.float64) + offset
+        frame = pd.DataFrame({'equity': equity, 'window': i})
+        if result['test_times'] is not None:
+            frame.insert(0, 'time', result['test_times'])
+        frames.append(frame)
+        daily.extend(np.asarray(result['test_pnl_history'], dtype=np.float64) + offset)
+        if len(result['test_pnl_history']):
+            offset += result['test_pnl_history'][-1]
+    return pd.concat(frames, ignore_index=True), np.asarray(daily)
+
+
+def walk_forward(param_sets, start_date=None, end_date=None, train_days=3, test_days=1, step_days=None,
+                 anchored=False, workers=None, rank_by='final_pnl'):
+    """
+    Runs the walk-forward validation on a process pool, one task per window.
+
+    Returns:
+        tuple: (pd.DataFrame with one row per window: dates, chosen params, train and test stats;
+                pd.DataFrame of the stitched out-of-sample equity curve;
+                dict of risk stats of the stitched out-of-sample daily P&L)
+    """
+    start_date = start_date or config.simStartDate
+    end_date = end_date or config.simEndDate
+    param_sets = list(param_sets)
+    windows = walk_forward_windows(start_date, end_date, train_days, test_days, step_days, anchored)
+    if not windows:
+        raise ValueError(f"{start_date:%Y-%m-%d}..{end_date:%Y-%m-%d} is too short for "
+                         f"{train_days} train + {test_days} test days")
+
+    if not config.use_data_cache:
+        print("Warning: use_data_cache is off, every worker will parse the CSVs itself")
+    else:
+        load_market_data(start_date, end_date)  # Warm the day cache once so workers only memory-map it
+
+    workers = min(workers or os.cpu_count(), len(windows))
+    is_last = [i == len(windows) - 1 for i in range(len(windows))]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(start_date, end_date)) as pool:
+        results = list(pool.map(run_window, windows, repeat(param_sets), repeat(rank_by), is_last))
+
+    equity, daily = stitch_equity(results)
+    oos_stats = compute_risk_stats(daily) if len(daily) else {}
+    rows = []
+    for result in results:
+        test_changes = np.diff(np.concatenate([[0.0], result['test_pnl_history']]))
+        rows.append({
+            'train_start': result['train_start'].date(), 'train_end': (result['train_end'] - timedelta(days=1)).date(),
+            'test_start': result['test_start'].date(), 'test_end': (result['test_end'] - timedelta(days=1)).date(),
+            **result['params'],
+            **{name: value for name, value in result.items() if name.startswith('train_') and name not in
+               ('train_start', 'train_end')},
+            'test_pnl': float(result['test_pnl_history'][-1]) if result['test_pnl_history'] else 0.0,
+            'test_worst_day': float(test_changes.min()) if len(test_changes) else 0.0,
+            'test_trades': result['test_trades'],
+        })
+    return pd.DataFrame(rows), equity, oos_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward validation of the straddle Strategy parameters.')
+    parser.add_argument('--start', default=None, help='First day, YYYY-MM-DD (default: config.simStartDate)')
+    parser.add_argument('--end', default=None, help='Last day, YYYY-MM-DD (default: config.simEndDate)')
+    parser.add_argument('--train-days', type=int, default=3)
+    parser.add_argument('--test-days', type=int, default=1)
+    parser.add_argument('--step-days', type=int, default=None, help='Window shift (default: --test-days)')
+    parser.add_argument('--anchored', action='store_true', help='Expanding train windows from --start')
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=50, help='Parameter sets drawn by the random search')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rank-by', default='final_pnl',
+                        help='Train result column to pick the parameters by; sharpe/sortino need long train windows')
+    parser.add_argument('--output', default='walk_forward.csv')
+    parser.add_argument('--equity-output', default='walk_forward_equity.csv')
+    args = parser.parse_args()
+
+    start_date = datetime.strptime(args.start, '%Y-%m-%d') if args.start else None
+    end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else None
+    if args.search == 'grid':
+        param_sets = grid_search_space(DEFAULT_GRID)
+    else:
+        param_sets = random_search_space(DEFAULT_RANDOM_SPACE, args.samples, args.seed)
+
+    table, equity, oos_stats = walk_forward(param_sets, start_date, end_date, args.train_days, args.test_days,
+                                            args.step_days, args.anchored, args.workers, args.rank_by)
+    print(table.to_string())
+    if oos_stats:
+        print(f"\nOut-of-sample: final P&L {oos_stats['final_pnl']:.2f}, Sharpe {oos_stats['sharpe']:.2f}, "
+              f"max drawdown {oos_stats['max_drawdown']:.2f} over {len(table)} windows")
+    table.to_csv(args.output, index=False)
+    equity.to_csv(args.equity_output, index=False)
+    print(f"Window results exported to {args.output}, stitched equity to {args.equity_output}")
+
+
+if __name__ == '__main__':
+    main()